@@ -0,0 +1 @@
+"""Benchmarks for insurance_calc."""
@@ -0,0 +1,65 @@
+"""
+Authentication overhead per request with the auth cache on and off.
+
+Resolves the current user of the seeded admin token the way every
+authenticated endpoint does, in a fresh session per request.
+
+    python -m benchmarks.auth_cache --requests 2000
+"""
+
+import asyncio
+
+import orjson
+import typer
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.utils import measure, summarize
+from insurance_calc.settings import settings
+from insurance_calc.utils.auth import obtain_token
+from insurance_calc.web.api.auth.service import (
+    UserService,
+    get_current_user,
+    token_cache,
+    user_cache,
+)
+
+cli = typer.Typer()
+
+
+async def run(db_url: str, requests: int) -> dict:
+    engine = create_async_engine(db_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+
+    async with session_factory() as session:
+        user = await UserService(session).get_user_by_username(settings.admin_email)
+        if user is None:
+            raise typer.BadParameter("Run `python -m insurance_calc deploy` first")
+        token = obtain_token(user)
+
+    async def authenticate() -> None:
+        async with session_factory() as session:
+            await get_current_user(token, UserService(session))
+
+    report: dict = {}
+    for name, enabled in (("cache_off", False), ("cache_on", True)):
+        settings.auth_cache_enabled = enabled
+        token_cache.clear()
+        user_cache.clear()
+        await authenticate()
+        samples = await measure(authenticate, [()] * requests)
+        report[name] = summarize(samples)
+
+    await engine.dispose()
+    return report
+
+
+@cli.command()
+def main(requests: int = 2000, db_url: str = str(settings.db_url)) -> None:
+    """Compare authentication with and without the auth cache."""
+
+    report = asyncio.run(run(db_url, requests))
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,116 @@
+"""
+Throughput of loading rates row by row and with the bulk upsert.
+
+Rows are written to the insurance table under a dedicated
+cargo type prefix and removed afterwards.
+
+    python -m benchmarks.bulk_upsert --cargo-types 100 --days 365
+"""
+
+import asyncio
+import time
+from datetime import date, timedelta
+
+import orjson
+import typer
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.settings import settings
+from insurance_calc.web.api.insurance.service import InsuranceService
+
+cli = typer.Typer()
+
+PREFIX = "bench_upsert_"
+
+
+def make_rows(cargo_types: int, days: int, rate: float) -> list[dict]:
+    start = date(2000, 1, 1)
+    return [
+        {
+            "cargo_type": f"{PREFIX}{cargo_type}",
+            "date": start + timedelta(days=day),
+            "rate": rate,
+        }
+        for cargo_type in range(cargo_types)
+        for day in range(days)
+    ]
+
+
+async def upsert_row(
+    session: AsyncSession, date: date, cargo_type: str, rate: float
+) -> Insurance:
+    # Row by row upsert the service used to do, one read and one commit per row
+    query = select(Insurance).filter_by(date=date, cargo_type=cargo_type)
+    insurance = await session.execute(query)
+    insurance = insurance.scalar_one_or_none()
+
+    if not insurance:
+        insurance = Insurance(cargo_type=cargo_type, rate=rate, date=date)
+        session.add(insurance)
+    elif insurance.rate != rate:
+        insurance.rate = rate
+    else:
+        return insurance
+
+    await session.commit()
+    return insurance
+
+
+async def run(db_url: str, cargo_types: int, days: int, row_by_row_limit: int) -> dict:
+    engine = create_async_engine(db_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    report: dict = {}
+
+    async def cleanup() -> None:
+        async with session_factory() as session:
+            await session.execute(
+                delete(Insurance).where(Insurance.cargo_type.startswith(PREFIX))
+            )
+            await session.commit()
+
+    await cleanup()
+    rows = make_rows(cargo_types, days, rate=0.01)
+
+    # Row by row is slow, so only a sample is measured
+    sample = rows[:row_by_row_limit]
+    async with session_factory() as session:
+        start = time.perf_counter()
+        for row in sample:
+            await upsert_row(session, **row)
+        elapsed = time.perf_counter() - start
+    report["row_by_row"] = {
+        "rows": len(sample),
+        "rows_per_second": len(sample) / elapsed,
+    }
+    await cleanup()
+
+    for name, rate in (("bulk_insert", 0.01), ("bulk_update", 0.02)):
+        async with session_factory() as session:
+            service = InsuranceService(session)
+            start = time.perf_counter()
+            await service.bulk_upsert(make_rows(cargo_types, days, rate))
+            elapsed = time.perf_counter() - start
+        report[name] = {"rows": len(rows), "rows_per_second": len(rows) / elapsed}
+
+    await cleanup()
+    await engine.dispose()
+    return report
+
+
+@cli.command()
+def main(
+    cargo_types: int = 100,
+    days: int = 365,
+    row_by_row_limit: int = 2000,
+    db_url: str = str(settings.db_url),
+) -> None:
+    """Compare row by row upserts with the bulk upsert."""
+
+    report = asyncio.run(run(db_url, cargo_types, days, row_by_row_limit))
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,143 @@
+"""
+Query latency of the insurance table before and after migration 002.
+
+Two scratch tables are shaped like the insurance table before
+(string date, primary key only) and after (typed date and unique
+cargo type/date index) the migration. Both are filled with the same
+rows, then the lookups done by query_insurance are timed.
+
+    python -m benchmarks.insurance_index --cargo-types 1000 --days 1000
+"""
+
+import asyncio
+import random
+from datetime import date, timedelta
+
+import orjson
+import typer
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from benchmarks.utils import measure, summarize
+from insurance_calc.settings import settings
+
+cli = typer.Typer()
+
+START_DATE = date(2000, 1, 1)
+
+TABLES = {
+    "before": {
+        "date_type": "VARCHAR(64)",
+        "date_value": "to_char(DATE '2000-01-01' + d, 'YYYY-MM-DD')",
+        "index": None,
+    },
+    "after": {
+        "date_type": "DATE",
+        "date_value": "DATE '2000-01-01' + d",
+        "index": "CREATE UNIQUE INDEX ON {table} (cargo_type, date)",
+    },
+}
+
+
+async def create_table(
+    conn: AsyncConnection, name: str, cargo_types: int, days: int
+) -> str:
+    """Create and fill a scratch table."""
+
+    table = f"bench_insurance_{name}"
+    spec = TABLES[name]
+    await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    await conn.execute(
+        text(
+            f"CREATE UNLOGGED TABLE {table} ("
+            "id SERIAL PRIMARY KEY, "
+            "cargo_type VARCHAR(64) NOT NULL, "
+            "rate FLOAT NOT NULL, "
+            f"date {spec['date_type']} NOT NULL, "
+            "created_date TIMESTAMP NOT NULL, "
+            "modified_date TIMESTAMP NOT NULL)"
+        )
+    )
+    await conn.execute(
+        text(
+            f"INSERT INTO {table} (cargo_type, rate, date, created_date, modified_date) "  # noqa: S608
+            f"SELECT 'cargo_' || c, random() / 10, {spec['date_value']}, now(), now() "
+            "FROM generate_series(1, :cargo_types) AS c, "
+            "generate_series(0, :days - 1) AS d"
+        ),
+        {"cargo_types": cargo_types, "days": days},
+    )
+    if spec["index"]:
+        await conn.execute(text(spec["index"].format(table=table)))
+    await conn.execute(text(f"ANALYZE {table}"))
+    return table
+
+
+async def run(db_url: str, cargo_types: int, days: int, queries: int) -> dict:
+    engine = create_async_engine(db_url, isolation_level="AUTOCOMMIT")
+    lookups = [
+        (f"cargo_{random.randint(1, cargo_types)}", random.randrange(days))
+        for _ in range(queries)
+    ]
+    report: dict = {"rows": cargo_types * days}
+
+    async with engine.connect() as conn:
+        for name in TABLES:
+            table = await create_table(conn, name, cargo_types, days)
+            as_date = name == "after"
+
+            def day(offset: int, as_date: bool = as_date) -> date | str:
+                value = START_DATE + timedelta(days=offset)
+                return value if as_date else value.isoformat()
+
+            by_key = text(
+                f"SELECT * FROM {table} WHERE cargo_type = :cargo_type AND date = :date"  # noqa: S608
+            )
+            by_cargo_type = text(
+                f"SELECT * FROM {table} WHERE cargo_type = :cargo_type"  # noqa: S608
+            )
+
+            async def query(statement, params):
+                return (await conn.execute(statement, params)).all()
+
+            report[name] = {
+                "cargo_type_and_date": summarize(
+                    await measure(
+                        query,
+                        [
+                            (by_key, {"cargo_type": cargo, "date": day(offset)})
+                            for cargo, offset in lookups
+                        ],
+                    )
+                ),
+                "cargo_type": summarize(
+                    await measure(
+                        query,
+                        [
+                            (by_cargo_type, {"cargo_type": cargo})
+                            for cargo, _ in lookups
+                        ],
+                    )
+                ),
+            }
+            await conn.execute(text(f"DROP TABLE {table}"))
+
+    await engine.dispose()
+    return report
+
+
+@cli.command()
+def main(
+    cargo_types: int = 1000,
+    days: int = 1000,
+    queries: int = 200,
+    db_url: str = str(settings.db_url),
+) -> None:
+    """Compare lookup latency before and after the insurance indexes."""
+
+    report = asyncio.run(run(db_url, cargo_types, days, queries))
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,219 @@
+"""
+Cost of publishing insurance change events.
+
+Compares the old per-request send (start and stop the producer, one
+partition, formatted strings) with the event publisher. Both run against
+a local stand-in broker that simulates connection setup and round trips
+and hashes keys with the aiokafka partitioner.
+
+    python -m benchmarks.kafka_events --requests 200 --events 50
+"""
+
+import asyncio
+import statistics
+import time
+import timeit
+from collections import Counter
+from datetime import datetime
+from types import SimpleNamespace
+
+import orjson
+import typer
+from aiokafka.partitioner import DefaultPartitioner
+
+from benchmarks.utils import measure, summarize
+from insurance_calc.services.kafka.publisher import (
+    EventPublisher,
+    EventType,
+    encode_event,
+    encode_events,
+)
+
+cli = typer.Typer()
+
+TOPIC = "insurance"
+LEGACY_MESSAGE = (
+    "User with ID {user_id} has created {table} with ID {instance_id} at {timestamp}."
+)
+
+
+class StandInBatch:
+    def __init__(self) -> None:
+        self.records: list[tuple[bytes | None, bytes]] = []
+
+    def append(self, key: bytes | None, value: bytes, timestamp: int | None) -> object:
+        self.records.append((key, value))
+        return object()
+
+    def record_count(self) -> int:
+        return len(self.records)
+
+
+class StandInProducer:
+    """Stand-in for AIOKafkaProducer with simulated network costs."""
+
+    def __init__(self, partitions: int, connect_ms: float, rtt_ms: float) -> None:
+        self.partitions = list(range(partitions))
+        self.connect = connect_ms / 1000
+        self.rtt = rtt_ms / 1000
+        self.partitioner = DefaultPartitioner()
+        self.records: Counter[int] = Counter()
+        self.bytes = 0
+        self._pending: list[asyncio.Future] = []
+        self._flush: asyncio.Task | None = None
+
+    def _record(self, partition: int, key: bytes | None, value: bytes) -> None:
+        self.records[partition] += 1
+        self.bytes += len(value) + len(key or b"")
+
+    async def start(self) -> None:
+        await asyncio.sleep(self.connect)
+
+    async def stop(self) -> None:
+        await asyncio.sleep(self.connect)
+
+    async def partitions_for(self, topic: str) -> set[int]:
+        return set(self.partitions)
+
+    def create_batch(self) -> StandInBatch:
+        return StandInBatch()
+
+    async def send_batch(self, batch: StandInBatch, topic: str, partition: int) -> None:
+        for key, value in batch.records:
+            self._record(partition, key, value)
+        await asyncio.sleep(self.rtt)
+
+    async def send(
+        self, topic: str, value: bytes, key: bytes | None = None
+    ) -> asyncio.Future:
+        partition = self.partitioner(key, self.partitions, self.partitions)
+        self._record(partition, key, value)
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        if self._flush is None:
+            self._flush = asyncio.create_task(self._send_pending())
+        return future
+
+    async def _send_pending(self) -> None:
+        # Batches of all partitions are in flight at once
+        await asyncio.sleep(self.rtt)
+        pending, self._pending, self._flush = self._pending, [], None
+        for future in pending:
+            future.set_result(None)
+
+
+async def legacy_send_batch(
+    producer: StandInProducer, user_id: int, instance_list: list
+) -> None:
+    await producer.start()
+    partition = list(await producer.partitions_for(TOPIC))[0]
+    batch = producer.create_batch()
+    for instance in instance_list:
+        msg = LEGACY_MESSAGE.format(
+            user_id=user_id,
+            table="insurance",
+            instance_id=instance.id,
+            timestamp=datetime.now(),
+        ).encode("utf-8")
+        batch.append(key=None, value=msg, timestamp=None)
+    await producer.send_batch(batch, TOPIC, partition=partition)
+    await producer.stop()
+
+
+async def publisher_send_batch(
+    publisher: EventPublisher, user_id: int, instance_list: list
+) -> int:
+    return await publisher.send(
+        encode_events(
+            EventType.CREATE,
+            "insurance",
+            user_id,
+            [instance.id for instance in instance_list],
+        )
+    )
+
+
+def partition_report(producer: StandInProducer, events: int) -> dict:
+    counts = [producer.records[partition] for partition in producer.partitions]
+    return {
+        "bytes_per_event": producer.bytes / events,
+        "partitions_used": sum(1 for count in counts if count),
+        "max_partition_share": max(counts) / events,
+    }
+
+
+async def run(
+    requests: int, events: int, partitions: int, connect_ms: float, rtt_ms: float
+) -> dict:
+    calls = [
+        (
+            1,
+            [SimpleNamespace(id=request * events + i) for i in range(events)],
+        )
+        for request in range(requests)
+    ]
+    report: dict = {}
+
+    legacy = StandInProducer(partitions, connect_ms, rtt_ms)
+    samples = await measure(
+        lambda user_id, instances: legacy_send_batch(legacy, user_id, instances),
+        calls,
+    )
+    report["legacy"] = {
+        **summarize(samples),
+        "events_per_second": requests * events / sum(samples),
+        **partition_report(legacy, requests * events),
+    }
+
+    producer = StandInProducer(partitions, connect_ms, rtt_ms)
+    await producer.start()
+    publisher = EventPublisher(producer, TOPIC)
+    samples = await measure(
+        lambda user_id, instances: publisher_send_batch(publisher, user_id, instances),
+        calls,
+    )
+    report["publisher"] = {
+        **summarize(samples),
+        "events_per_second": requests * events / sum(samples),
+        **partition_report(producer, requests * events),
+    }
+    await producer.stop()
+
+    now = datetime.now()
+    ts = int(time.time() * 1000)
+    number = 100_000
+    legacy_encode = timeit.repeat(
+        lambda: LEGACY_MESSAGE.format(
+            user_id=1, table="insurance", instance_id=123456, timestamp=now
+        ).encode("utf-8"),
+        number=number,
+        repeat=5,
+    )
+    compact_encode = timeit.repeat(
+        lambda: encode_event(EventType.CREATE, "insurance", 123456, 1, ts),
+        number=number,
+        repeat=5,
+    )
+    report["encode_us_per_event"] = {
+        "legacy": statistics.median(legacy_encode) / number * 1e6,
+        "publisher": statistics.median(compact_encode) / number * 1e6,
+    }
+    return report
+
+
+@cli.command()
+def main(
+    requests: int = 200,
+    events: int = 50,
+    partitions: int = 6,
+    connect_ms: float = 20.0,
+    rtt_ms: float = 2.0,
+) -> None:
+    """Compare the per-request kafka send with the event publisher."""
+
+    report = asyncio.run(run(requests, events, partitions, connect_ms, rtt_ms))
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,446 @@
+"""
+Throughput and latency of a mix of API traffic.
+
+Seeds the database with the rates of seed.json scaled up to a number
+of cargo types and dates, then keeps a fixed number of concurrent
+clients replaying a weighted mix of uploads, queries, calculations and
+updates. The traffic runs against the application in process, through
+real uvicorn workers, or both.
+
+In process the application runs without redis and kafka. The uvicorn
+workers run the full application with its own settings, so redis and
+kafka have to be up, e.g. with docker-compose.
+
+Scaled rows get their own cargo types (``Glass-0``, ``Plastic-1``...),
+so mutations never touch the rows of seed.json.
+
+    python -m benchmarks.load_test --cargo-types 100 --dates 365 \\
+        --mix query=40,calculate=40,upload=10,update=10 --mode both \\
+        --output load_test.json
+"""
+
+import asyncio
+import datetime
+import enum
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import httpx
+import orjson
+import typer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.utils import init_app_state, summarize
+from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.pre_start import populate_default_user, populate_role
+from insurance_calc.settings import settings
+from insurance_calc.web.api.auth.service import UserService
+from insurance_calc.web.api.insurance.importer import ImportRateRow
+from insurance_calc.web.api.insurance.service import InsuranceService
+from insurance_calc.web.application import get_app
+
+cli = typer.Typer()
+
+SEED_CHUNK_SIZE = 10000
+
+
+class Mode(str, enum.Enum):
+    """Where the application under load runs."""
+
+    IN_PROCESS = "in_process"
+    UVICORN = "uvicorn"
+    BOTH = "both"
+
+
+@dataclass
+class Workload:
+    """Rows and credentials the traffic is drawn from."""
+
+    ids: list[int]
+    cargo_types: list[str]
+    dates: list[datetime.date]
+    headers: dict[str, str]
+    rng: random.Random
+
+
+Operation = Callable[[httpx.AsyncClient, Workload], Awaitable[httpx.Response]]
+
+
+async def query(client: httpx.AsyncClient, work: Workload) -> httpx.Response:
+    return await client.request(
+        "GET",
+        "/api/insurance/query_insurance",
+        json={"cargo_type": work.rng.choice(work.cargo_types)},
+    )
+
+
+async def calculate(client: httpx.AsyncClient, work: Workload) -> httpx.Response:
+    return await client.request(
+        "GET",
+        "/api/insurance/calculate_insurance",
+        json={"id": work.rng.choice(work.ids), "price": 1000},
+    )
+
+
+async def upload(client: httpx.AsyncClient, work: Workload) -> httpx.Response:
+    # Uploads replace rates of seeded rows, so the table doesn't grow
+    date = work.rng.choice(work.dates).isoformat()
+    items = [
+        {"cargo_type": cargo_type, "rate": round(work.rng.uniform(0.01, 0.1), 4)}
+        for cargo_type in work.rng.sample(
+            work.cargo_types, min(10, len(work.cargo_types))
+        )
+    ]
+    return await client.post(
+        "/api/insurance/upload_insurance", json={date: items}, headers=work.headers
+    )
+
+
+async def update(client: httpx.AsyncClient, work: Workload) -> httpx.Response:
+    return await client.post(
+        "/api/insurance/update_insurance",
+        json={
+            "id": work.rng.choice(work.ids),
+            "new_rate": round(work.rng.uniform(0.01, 0.1), 4),
+        },
+        headers=work.headers,
+    )
+
+
+OPERATIONS: dict[str, Operation] = {
+    "query": query,
+    "calculate": calculate,
+    "upload": upload,
+    "update": update,
+}
+
+
+def parse_mix(mix: str) -> dict[str, float]:
+    """Parse a mix like ``query=40,calculate=60`` into weights."""
+
+    weights: dict[str, float] = {}
+    for part in mix.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise typer.BadParameter(
+                f"Unknown operation {name!r}, expected one of {', '.join(OPERATIONS)}"
+            )
+        try:
+            weights[name] = float(weight or 1)
+        except ValueError:
+            raise typer.BadParameter(f"Invalid weight of {name!r}: {weight!r}")
+    if not any(weights.values()):
+        raise typer.BadParameter("The mix needs at least one positive weight")
+    return weights
+
+
+def scaled_rows(
+    seed: dict, cargo_types: int, dates: int
+) -> tuple[list[str], list[datetime.date], AsyncIterator[list[ImportRateRow]]]:
+    """Scale the seed rates up to cargo types x consecutive dates."""
+
+    seed_dates = sorted(seed["Insurance"])
+    seed_rates = [
+        {item["cargo_type"]: item["rate"] for item in seed["Insurance"][date]}
+        for date in seed_dates
+    ]
+    base_types = sorted(seed_rates[0])
+    names = [f"{base_types[i % len(base_types)]}-{i}" for i in range(cargo_types)]
+    start = datetime.date.fromisoformat(seed_dates[0])
+    days = [start + datetime.timedelta(days=j) for j in range(dates)]
+
+    async def chunks() -> AsyncIterator[list[ImportRateRow]]:
+        chunk: list[ImportRateRow] = []
+        for i, name in enumerate(names):
+            base_type = base_types[i % len(base_types)]
+            for j, day in enumerate(days):
+                rates = seed_rates[j % len(seed_rates)]
+                rate = rates.get(base_type, seed_rates[0][base_type])
+                chunk.append(ImportRateRow(cargo_type=name, date=day, rate=rate))
+                if len(chunk) >= SEED_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    return names, days, chunks()
+
+
+async def seed_database(
+    db_url: str, cargo_types: int, dates: int, seed: bool
+) -> tuple[list[int], list[str], list[datetime.date]]:
+    """Seed the scaled rates and return the rows the traffic uses."""
+
+    with open("seed.json", "rb") as f:
+        data = orjson.loads(f.read())
+    names, days, chunks = scaled_rows(data, cargo_types, dates)
+
+    engine = create_async_engine(db_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+    async with session_factory() as session:
+        if seed:
+            user_service = UserService(session)
+            await populate_role(data, user_service)
+            await populate_default_user(user_service)
+            start = time.perf_counter()
+            rows = await InsuranceService(session).import_rates(chunks)
+            typer.echo(
+                f"Seeded {rows} rows in {time.perf_counter() - start:.1f}s", err=True
+            )
+
+        result = await session.execute(
+            select(Insurance.id).where(Insurance.cargo_type.in_(names))
+        )
+        ids = list(result.scalars())
+    await engine.dispose()
+
+    if not ids:
+        raise typer.BadParameter("No seeded rows found, run with --seed")
+    return ids, names, days
+
+
+async def worker(
+    client: httpx.AsyncClient,
+    work: Workload,
+    weights: dict[str, float],
+    deadline: float,
+    samples: dict[str, list[float]],
+    statuses: dict[str, Counter],
+) -> None:
+    names = list(weights)
+    weight_values = list(weights.values())
+    while time.perf_counter() < deadline:
+        (name,) = work.rng.choices(names, weights=weight_values)
+        start = time.perf_counter()
+        response = await OPERATIONS[name](client, work)
+        elapsed = time.perf_counter() - start
+        statuses[name][response.status_code] += 1
+        if response.is_success:
+            samples[name].append(elapsed)
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    ids: list[int],
+    names: list[str],
+    days: list[datetime.date],
+    weights: dict[str, float],
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    rng_seed: int,
+) -> dict:
+    response = await client.post(
+        "/api/auth/access-token",
+        json={"username": settings.admin_email, "password": settings.admin_password},
+    )
+    response.raise_for_status()
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def run_workers(seconds: float) -> tuple[dict, dict, float]:
+        samples: dict[str, list[float]] = {name: [] for name in weights}
+        statuses: dict[str, Counter] = {name: Counter() for name in weights}
+        deadline = time.perf_counter() + seconds
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(
+                worker(
+                    client,
+                    Workload(ids, names, days, headers, random.Random(rng_seed + i)),
+                    weights,
+                    deadline,
+                    samples,
+                    statuses,
+                )
+                for i in range(concurrency)
+            )
+        )
+        return samples, statuses, time.perf_counter() - start
+
+    if warmup > 0:
+        await run_workers(warmup)
+    samples, statuses, elapsed = await run_workers(duration)
+
+    report: dict = {
+        "requests_per_second": sum(map(len, samples.values())) / elapsed,
+        "errors": sum(
+            count
+            for counter in statuses.values()
+            for code, count in counter.items()
+            if code >= 400
+        ),
+    }
+    all_samples = [sample for name in samples for sample in samples[name]]
+    if all_samples:
+        report["total"] = summarize(all_samples)
+    for name in weights:
+        report[name] = {
+            **(summarize(samples[name]) if samples[name] else {"count": 0}),
+            "requests_per_second": len(samples[name]) / elapsed,
+            "statuses": {str(code): n for code, n in statuses[name].items()},
+        }
+    return report
+
+
+async def run_in_process(db_url: str, concurrency: int, **load: object) -> dict:
+    app = get_app()
+    engine = create_async_engine(
+        db_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+    )
+    init_app_state(app, engine, rate_table=settings.rate_table_enabled)
+    if app.state.rate_table:
+        await app.state.rate_table.refresh()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        report = await run_load(client, concurrency=concurrency, **load)
+
+    await engine.dispose()
+    return report
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen) -> None:
+    """Wait until the server answers health checks."""
+
+    deadline = time.perf_counter() + 60
+    while time.perf_counter() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+        try:
+            response = await client.get("/api/health")
+            if response.is_success:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("uvicorn did not become ready in 60s")
+
+
+async def run_uvicorn(
+    app: str, workers: int, port: int, concurrency: int, **load: object
+) -> dict:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            app,
+            "--factory",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        # Without a configured key every worker would sign tokens with its own
+        env={"INSURANCE_CALC_SECRET_KEY": settings.secret_key, **os.environ},
+    )
+    limits = httpx.Limits(
+        max_connections=concurrency, max_keepalive_connections=concurrency
+    )
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=30
+        ) as client:
+            await wait_ready(client, server)
+            report = await run_load(client, concurrency=concurrency, **load)
+    finally:
+        server.terminate()
+        server.wait()
+
+    return {"workers": workers, **report}
+
+
+async def run(
+    db_url: str,
+    mode: Mode,
+    cargo_types: int,
+    dates: int,
+    seed: bool,
+    app: str,
+    workers: int,
+    port: int,
+    concurrency: int,
+    **load: object,
+) -> dict:
+    ids, names, days = await seed_database(db_url, cargo_types, dates, seed)
+    load = {"ids": ids, "names": names, "days": days, **load}
+
+    report: dict = {
+        "rows": len(ids),
+        "concurrency": concurrency,
+        "mix": load["weights"],
+    }
+    if mode in {Mode.IN_PROCESS, Mode.BOTH}:
+        report["in_process"] = await run_in_process(db_url, concurrency, **load)
+    if mode in {Mode.UVICORN, Mode.BOTH}:
+        report["uvicorn"] = await run_uvicorn(app, workers, port, concurrency, **load)
+    return report
+
+
+@cli.command()
+def main(
+    cargo_types: int = 100,
+    dates: int = 365,
+    mix: str = "query=40,calculate=40,upload=10,update=10",
+    mode: Mode = Mode.IN_PROCESS,
+    concurrency: int = 32,
+    duration: float = 10.0,
+    warmup: float = 2.0,
+    seed: bool = True,
+    rng_seed: int = 0,
+    workers: int = settings.workers_count,
+    port: int = 8765,
+    app: str = "insurance_calc.web.application:get_app",
+    db_url: str = str(settings.db_url),
+    output: Path | None = None,
+) -> None:
+    """Replay a mix of API traffic and report latency and throughput."""
+
+    # Logging every request would slow down the clients under measurement
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    report = asyncio.run(
+        run(
+            db_url,
+            mode,
+            cargo_types,
+            dates,
+            seed,
+            app,
+            workers,
+            port,
+            concurrency,
+            weights=parse_mix(mix),
+            duration=duration,
+            warmup=warmup,
+            rng_seed=rng_seed,
+        )
+    )
+    report = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+    # The application logs to stdout too, a file keeps the report clean
+    if output:
+        output.write_bytes(report)
+    typer.echo(report.decode())
+
+
+if __name__ == "__main__":
+    cli()
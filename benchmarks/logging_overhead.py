@@ -0,0 +1,129 @@
+"""
+Event loop time spent per request with every logging mode.
+
+Sends requests through the ASGI app in process to an endpoint writing
+a few log lines, with logs written to a file. Modes take turns for
+a few rounds and the median is reported. Time is taken from the
+clock of the event loop thread, so lines formatted and written by the
+background writer don't count, the way they don't hold up requests.
+The ``before`` mode walks frames for every record the way the
+intercept handler used to.
+
+    python -m benchmarks.logging_overhead --requests 2000 --rounds 5
+"""
+
+import asyncio
+import logging
+import statistics
+import sys
+import tempfile
+import time
+
+import httpx
+import orjson
+import typer
+from fastapi import FastAPI
+from loguru import logger
+
+from benchmarks.utils import measure, summarize
+from insurance_calc.log import configure_logging
+from insurance_calc.settings import settings
+from insurance_calc.web.application import get_app
+
+cli = typer.Typer()
+
+
+class FrameWalkingHandler(logging.Handler):
+    """Intercept handler finding the caller by walking frames, as before."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        frame, depth = logging.currentframe(), 2
+        while frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+
+        logger.opt(depth=depth, exception=record.exc_info).log(
+            record.levelname, record.getMessage()
+        )
+
+
+def build_app(lines: int) -> FastAPI:
+    app = get_app()
+
+    @app.get("/bench")
+    async def bench() -> None:
+        for line in range(lines):
+            logging.info(f"Handled step {line} of the request")
+
+    return app
+
+
+async def run_mode(app: FastAPI, requests: int) -> dict:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+
+        async def request() -> None:
+            (await client.get("/bench")).raise_for_status()
+
+        await measure(request, [()] * 100)
+
+        loop_start = time.thread_time()
+        samples = await measure(request, [()] * requests)
+        loop_time = time.thread_time() - loop_start
+
+    return {**summarize(samples), "loop_per_request_us": loop_time / requests * 1e6}
+
+
+def run(requests: int, lines: int, sample_rate: float, rounds: int) -> dict:
+    modes = {
+        "before": (False, False, 1.0),
+        "text": (False, False, 1.0),
+        "json": (True, False, 1.0),
+        "json_background": (True, True, 1.0),
+        "json_background_sampled": (True, True, sample_rate),
+    }
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    stdout = sys.stdout
+    results: dict[str, list[dict]] = {mode: [] for mode in modes}
+
+    with tempfile.TemporaryFile("w") as output:
+        sys.stdout = output
+        try:
+            for _ in range(rounds):
+                for mode, (log_json, background, rate) in modes.items():
+                    settings.log_json = log_json
+                    settings.log_background = background
+                    settings.log_access_sample_rate = rate
+                    app = build_app(lines)
+                    if mode == "before":
+                        logging.getLogger().handlers = [FrameWalkingHandler()]
+
+                    results[mode].append(asyncio.run(run_mode(app, requests)))
+                    # Drains the background writer before the next mode
+                    logger.remove()
+        finally:
+            sys.stdout = stdout
+
+    configure_logging()
+    return {
+        mode: {
+            key: statistics.median(result[key] for result in mode_results)
+            for key in mode_results[0]
+        }
+        for mode, mode_results in results.items()
+    }
+
+
+@cli.command()
+def main(
+    requests: int = 2000, lines: int = 3, sample_rate: float = 0.1, rounds: int = 5
+) -> None:
+    """Compare event loop time per request of the logging modes."""
+
+    report = run(requests, lines, sample_rate, rounds)
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
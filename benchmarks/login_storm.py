@@ -0,0 +1,146 @@
+"""
+Latency of other endpoints during a storm of logins.
+
+Runs the application in process and keeps many concurrent logins of the
+seeded admin going, while another client measures a cheap endpoint and
+a database backed one. Passwords are checked either in the default
+thread pool, as before, or in the bounded process pool.
+
+    python -m benchmarks.login_storm --concurrency 64 --duration 10
+"""
+
+import asyncio
+import time
+from collections import Counter
+
+import httpx
+import orjson
+import typer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.utils import init_app_state, summarize
+from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.services.passwords.hasher import PasswordHasher
+from insurance_calc.settings import settings
+from insurance_calc.web.application import get_app
+
+cli = typer.Typer()
+
+
+async def storm(
+    client: httpx.AsyncClient,
+    stop: asyncio.Event,
+    statuses: Counter,
+    samples: list[float],
+) -> None:
+    credentials = {
+        "username": settings.admin_email,
+        "password": settings.admin_password,
+    }
+    while not stop.is_set():
+        start = time.perf_counter()
+        response = await client.post("/api/auth/access-token", json=credentials)
+        statuses[response.status_code] += 1
+        if response.status_code == 200:
+            samples.append(time.perf_counter() - start)
+        elif response.status_code == 429:
+            await asyncio.sleep(float(response.headers["Retry-After"]))
+
+
+async def probe(
+    client: httpx.AsyncClient, path: str, json: dict | None, duration: float
+) -> list[float]:
+    samples: list[float] = []
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.request("GET", path, json=json)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def run_mode(
+    db_url: str,
+    hasher: PasswordHasher | None,
+    concurrency: int,
+    duration: float,
+) -> dict:
+    app = get_app()
+    engine = create_async_engine(db_url)
+    init_app_state(app, engine, password_hasher=hasher)
+
+    async with app.state.db_session_factory() as session:
+        insurance_id = await session.scalar(select(Insurance.id).limit(1))
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        # Warm up the pool workers before measuring
+        await probe(client, "/api/health", None, 0.1)
+        await client.post(
+            "/api/auth/access-token",
+            json={
+                "username": settings.admin_email,
+                "password": settings.admin_password,
+            },
+        )
+
+        stop = asyncio.Event()
+        statuses: Counter = Counter()
+        logins: list[float] = []
+        tasks = [
+            asyncio.create_task(storm(client, stop, statuses, logins))
+            for _ in range(concurrency)
+        ]
+        health = await probe(client, "/api/health", None, duration / 2)
+        calculate = await probe(
+            client,
+            "/api/insurance/calculate_insurance",
+            {"id": insurance_id, "price": 100},
+            duration / 2,
+        )
+        stop.set()
+        await asyncio.gather(*tasks)
+
+    await engine.dispose()
+    return {
+        "health": summarize(health),
+        "calculate_insurance": summarize(calculate),
+        "logins": summarize(logins) if logins else {},
+        "login_statuses": {str(code): count for code, count in statuses.items()},
+    }
+
+
+async def run(
+    db_url: str, concurrency: int, duration: float, workers: int, queue_size: int
+) -> dict:
+    report = {"thread_pool": await run_mode(db_url, None, concurrency, duration)}
+
+    hasher = PasswordHasher(workers=workers, queue_size=queue_size)
+    try:
+        report["process_pool"] = await run_mode(db_url, hasher, concurrency, duration)
+    finally:
+        hasher.shutdown()
+
+    return report
+
+
+@cli.command()
+def main(
+    concurrency: int = 64,
+    duration: float = 10.0,
+    workers: int = settings.password_hash_workers,
+    queue_size: int = settings.password_hash_queue_size,
+    db_url: str = str(settings.db_url),
+) -> None:
+    """Compare other endpoints during a login storm for both hashing modes."""
+
+    report = asyncio.run(run(db_url, concurrency, duration, workers, queue_size))
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,118 @@
+"""
+Throughput and latency of calculate_insurance with micro-batched lookups.
+
+Runs the application in process with the rate table, the redis cache and
+single-flight lookups disabled, and keeps a fixed number of concurrent
+requests for random rates going, once without batching and once for
+every batch window. Longer windows send fewer queries per request at
+the cost of the time requests wait for their batch.
+
+    python -m benchmarks.micro_batching --windows 0,0.001,0.002,0.005 \\
+        --batch-size 100 --concurrency 200
+"""
+
+import asyncio
+import random
+import time
+
+import httpx
+import orjson
+import typer
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.utils import init_app_state, summarize
+from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.settings import settings
+from insurance_calc.utils.batcher import MicroBatcher
+from insurance_calc.web.application import get_app
+
+cli = typer.Typer()
+
+
+async def load(
+    client: httpx.AsyncClient,
+    ids: list[int],
+    deadline: float,
+    samples: list[float],
+) -> None:
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.request(
+            "GET",
+            "/api/insurance/calculate_insurance",
+            json={"id": rng.choice(ids), "price": 100},
+        )
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+
+
+async def run_window(
+    db_url: str,
+    window: float | None,
+    batch_size: int,
+    concurrency: int,
+    duration: float,
+    rates: int,
+) -> dict:
+    app = get_app()
+    engine = create_async_engine(
+        db_url, pool_size=settings.db_pool_size, max_overflow=settings.db_max_overflow
+    )
+    init_app_state(app, engine)
+    if window is not None:
+        app.state.rate_batcher = MicroBatcher(window, batch_size, name="benchmark")
+
+    async with app.state.db_session_factory() as session:
+        ids = list(await session.scalars(select(Insurance.id).limit(rates)))
+
+    queries = [0]
+
+    def count_query(*_args: object) -> None:
+        queries[0] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count_query)
+
+    samples: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(load(client, ids, deadline, samples) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+
+    await engine.dispose()
+    return {
+        **summarize(samples),
+        "requests_per_second": len(samples) / elapsed,
+        "queries_per_request": queries[0] / len(samples),
+    }
+
+
+@cli.command()
+def main(
+    windows: str = "0,0.001,0.002,0.005",
+    batch_size: int = settings.rate_batch_size,
+    concurrency: int = 200,
+    duration: float = 5.0,
+    rates: int = 1000,
+    db_url: str = str(settings.db_url),
+) -> None:
+    """Compare calculate_insurance without batching and for batch windows."""
+
+    report = {"unbatched": None, **dict.fromkeys(windows.split(","))}
+    for name in report:
+        window = None if name == "unbatched" else float(name)
+        report[name] = asyncio.run(
+            run_window(db_url, window, batch_size, concurrency, duration, rates)
+        )
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
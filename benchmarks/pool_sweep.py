@@ -0,0 +1,115 @@
+"""
+Throughput and latency of calculate_insurance for several pool sizes.
+
+Runs the application in process with the rate table and the redis cache
+disabled, so every request checks out a database connection, and keeps
+a fixed number of concurrent requests going for every pool size.
+
+    python -m benchmarks.pool_sweep --pool-sizes 2,5,10,20 --concurrency 50
+"""
+
+import asyncio
+import time
+
+import httpx
+import orjson
+import typer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.utils import init_app_state, summarize
+from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.db.pool import TimedQueuePool
+from insurance_calc.settings import settings
+from insurance_calc.web.application import get_app
+
+cli = typer.Typer()
+
+
+async def load(
+    client: httpx.AsyncClient, payload: dict, deadline: float, samples: list[float]
+) -> None:
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        response = await client.request(
+            "GET", "/api/insurance/calculate_insurance", json=payload
+        )
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+
+
+async def run_pool(
+    db_url: str,
+    pool_size: int,
+    max_overflow: int,
+    concurrency: int,
+    duration: float,
+    statement_cache_size: int,
+) -> dict:
+    app = get_app()
+    engine = create_async_engine(
+        db_url,
+        poolclass=TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        connect_args={"prepared_statement_cache_size": statement_cache_size},
+    )
+    init_app_state(app, engine)
+
+    async with app.state.db_session_factory() as session:
+        insurance_id = await session.scalar(select(Insurance.id).limit(1))
+    payload = {"id": insurance_id, "price": 100}
+
+    samples: list[float] = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        deadline = time.perf_counter() + duration
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(load(client, payload, deadline, samples) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+
+    pool: TimedQueuePool = engine.pool
+    report = {
+        **summarize(samples),
+        "requests_per_second": len(samples) / elapsed,
+        "connections": pool.size() + max(pool.overflow(), 0),
+        "pool_wait_mean_ms": pool.wait_time_total / pool.checkouts * 1000,
+        "pool_wait_max_ms": pool.wait_time_max * 1000,
+    }
+    await engine.dispose()
+    return report
+
+
+@cli.command()
+def main(
+    pool_sizes: str = "2,5,10,20",
+    max_overflow: int = 0,
+    concurrency: int = 50,
+    duration: float = 5.0,
+    statement_cache_size: int = settings.db_statement_cache_size,
+    db_url: str = str(settings.db_url),
+) -> None:
+    """Sweep pool sizes against concurrent calculate_insurance requests."""
+
+    report = {
+        pool_size: asyncio.run(
+            run_pool(
+                db_url,
+                int(pool_size),
+                max_overflow,
+                concurrency,
+                duration,
+                statement_cache_size,
+            )
+        )
+        for pool_size in pool_sizes.split(",")
+    }
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,87 @@
+"""
+CPU time per lookup with statements built per request and reused.
+
+Runs the lookups of query_insurance and get_insurance without the rate
+table and the redis cache, once building the statement for every
+request as before and once through the service's reused statements.
+CPU time is taken from the process clock, so it leaves out time spent
+waiting on the database.
+
+    python -m benchmarks.query_plans --requests 5000
+"""
+
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+import orjson
+import typer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.utils import measure, summarize
+from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.services.rates.row import RATE_COLUMNS
+from insurance_calc.settings import settings
+from insurance_calc.web.api.insurance.schema import QueryInsurancePayload
+from insurance_calc.web.api.insurance.service import InsuranceService
+
+cli = typer.Typer()
+
+
+async def run_lookup(func: Callable[[], Awaitable[object]], requests: int) -> dict:
+    await measure(func, [()] * 100)
+
+    cpu_start = time.process_time()
+    samples = await measure(func, [()] * requests)
+    cpu = time.process_time() - cpu_start
+
+    return {**summarize(samples), "cpu_per_request_us": cpu / requests * 1e6}
+
+
+async def run(db_url: str, requests: int) -> dict:
+    engine = create_async_engine(db_url)
+    session_factory = async_sessionmaker(engine, class_=AsyncSession)
+
+    async with session_factory() as session:
+        row = (await session.execute(select(*RATE_COLUMNS).limit(1))).one()
+        service = InsuranceService(session)
+        payload = QueryInsurancePayload(cargo_type=row.cargo_type)
+
+        async def query_built() -> None:
+            query = select(*RATE_COLUMNS).filter_by(cargo_type=row.cargo_type)
+            (await session.execute(query)).all()
+
+        async def get_built() -> None:
+            query = select(*RATE_COLUMNS).where(Insurance.id == row.id)
+            (await session.execute(query)).one()
+
+        report = {
+            "query_insurance": {
+                "built": await run_lookup(query_built, requests),
+                "reused": await run_lookup(
+                    lambda: service.query_insurance(payload), requests
+                ),
+            },
+            "get_insurance": {
+                "built": await run_lookup(get_built, requests),
+                "reused": await run_lookup(
+                    lambda: service.get_insurance(row.id), requests
+                ),
+            },
+        }
+
+    await engine.dispose()
+    return report
+
+
+@cli.command()
+def main(requests: int = 5000, db_url: str = str(settings.db_url)) -> None:
+    """Compare lookups with statements built per request and reused."""
+
+    report = asyncio.run(run(db_url, requests))
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
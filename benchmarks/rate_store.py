@@ -0,0 +1,169 @@
+"""
+Memory and lookup time of the columnar rate store against row objects.
+
+Builds random rates for a number of cargo types over consecutive dates
+and keeps them once the way the rate table used to, as rows indexed by
+ID, by cargo type and date and by effective date, and once in the
+columnar store. Memory of the rows is measured with tracemalloc, lookups
+are timed one at a time and as one vectorized call, and the store is
+published as a snapshot and mapped back.
+
+    python -m benchmarks.rate_store --rows 1000000 --lookups 100000
+"""
+
+import datetime
+import random
+import tempfile
+import time
+import tracemalloc
+from bisect import bisect_right
+from collections import defaultdict
+from collections.abc import Iterable
+from pathlib import Path
+
+import orjson
+import typer
+
+from insurance_calc.services.rates.row import RateRow
+from insurance_calc.services.rates.store import (
+    ColumnarRateStore,
+    load_snapshot,
+    publish_snapshot,
+)
+
+cli = typer.Typer()
+
+
+class EffectiveRateIndex:
+    """
+    Rates of every cargo type sorted by date, as the rate table kept them.
+
+    The rate effective on a date is the latest rate whose date
+    is not after it, found with a binary search.
+    """
+
+    def __init__(self, rows: Iterable[RateRow]) -> None:
+        by_cargo_type: dict[str, list[RateRow]] = defaultdict(list)
+        for row in rows:
+            by_cargo_type[row.cargo_type].append(row)
+
+        self._dates: dict[str, list[datetime.date]] = {}
+        self._rows: dict[str, list[RateRow]] = {}
+        for cargo_type, items in by_cargo_type.items():
+            items.sort(key=lambda row: row.date)
+            self._dates[cargo_type] = [row.date for row in items]
+            self._rows[cargo_type] = items
+
+    def get(self, cargo_type: str, on: datetime.date) -> RateRow | None:
+        """Get the rate effective on a date for a given cargo type."""
+
+        dates = self._dates.get(cargo_type)
+        if not dates:
+            return None
+
+        position = bisect_right(dates, on)
+        if not position:
+            return None
+
+        return self._rows[cargo_type][position - 1]
+
+
+def build_rows(count: int, cargo_types: int) -> list[tuple]:
+    rng = random.Random(0)
+    start = datetime.date(2000, 1, 1)
+    created = datetime.datetime(2024, 1, 1)
+    return [
+        (
+            row_id,
+            f"cargo-{row_id % cargo_types}",
+            round(rng.uniform(0.01, 0.1), 4),
+            start + datetime.timedelta(days=row_id // cargo_types),
+            created,
+        )
+        for row_id in range(count)
+    ]
+
+
+def timed(func: object, *args: object) -> tuple[object, float]:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def per_lookup_us(seconds: float, lookups: int) -> float:
+    return seconds / lookups * 1e6
+
+
+@cli.command()
+def main(rows: int = 1000000, cargo_types: int = 100, lookups: int = 100000) -> None:
+    """Compare rows indexed in dicts with the columnar store."""
+
+    data = build_rows(rows, cargo_types)
+    rng = random.Random(1)
+    sample = [data[rng.randrange(rows)] for _ in range(lookups)]
+    ids = [row[0] for row in sample]
+    names = [row[1] for row in sample]
+    dates = [row[3] + datetime.timedelta(days=rng.randrange(3)) for row in sample]
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    table_rows = [RateRow(*row) for row in data]
+    by_id = {row.id: row for row in table_rows}
+    by_key = {(row.cargo_type, row.date): row for row in table_rows}
+    index = EffectiveRateIndex(table_rows)
+    rows_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    _, by_id_time = timed(lambda: [by_id.get(row_id) for row_id in ids])
+    _, by_key_time = timed(
+        lambda: [by_key.get(key) for key in zip(names, dates, strict=True)]
+    )
+    _, effective_time = timed(
+        lambda: [index.get(*key) for key in zip(names, dates, strict=True)]
+    )
+
+    store, build_time = timed(ColumnarRateStore.from_rows, data)
+    _, scalar_time = timed(
+        lambda: [store.rates_at(store.positions_by_id([row_id])) for row_id in ids]
+    )
+    _, vector_id_time = timed(lambda: store.rates_at(store.positions_by_id(ids)))
+    _, vector_key_time = timed(
+        lambda: store.rates_at(store.positions_by_key(names, dates))
+    )
+    _, vector_effective_time = timed(
+        lambda: store.rates_at(store.effective_positions(names, dates))
+    )
+
+    with tempfile.TemporaryDirectory() as root:
+        _, publish_time = timed(publish_snapshot, Path(root), store)
+        (mapped, _), load_time = timed(load_snapshot, Path(root))
+        _, mapped_time = timed(
+            lambda: mapped.rates_at(mapped.effective_positions(names, dates))
+        )
+
+    report = {
+        "rows": {
+            "bytes_per_rate": rows_bytes / rows,
+            "by_id_us": per_lookup_us(by_id_time, lookups),
+            "by_key_us": per_lookup_us(by_key_time, lookups),
+            "effective_us": per_lookup_us(effective_time, lookups),
+        },
+        "store": {
+            "bytes_per_rate": store.nbytes / rows,
+            "build_s": build_time,
+            "by_id_scalar_us": per_lookup_us(scalar_time, lookups),
+            "by_id_us": per_lookup_us(vector_id_time, lookups),
+            "by_key_us": per_lookup_us(vector_key_time, lookups),
+            "effective_us": per_lookup_us(vector_effective_time, lookups),
+        },
+        "snapshot": {
+            "publish_s": publish_time,
+            "load_s": load_time,
+            "mapped_effective_us": per_lookup_us(mapped_time, lookups),
+        },
+    }
+    typer.echo(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
+
+
+if __name__ == "__main__":
+    cli()
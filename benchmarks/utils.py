@@ -0,0 +1,85 @@
+import statistics
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from insurance_calc.services.passwords.hasher import PasswordHasher
+from insurance_calc.services.rates.table import RateTable
+from insurance_calc.settings import settings
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """
+    Summarize latency samples.
+
+    :param samples: latencies in seconds.
+    :return: mean and percentiles in milliseconds.
+    """
+    samples = sorted(samples)
+    cuts = statistics.quantiles(samples, n=100) if len(samples) > 1 else samples * 99
+    return {
+        "count": len(samples),
+        "mean_ms": statistics.fmean(samples) * 1000,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+async def measure(
+    func: Callable[..., Awaitable[Any]],
+    args: list[tuple[Any, ...]],
+) -> list[float]:
+    """
+    Await a function once per argument tuple and time every call.
+
+    :param func: coroutine function to measure.
+    :param args: arguments for every call.
+    :return: latencies in seconds.
+    """
+    samples: list[float] = []
+    for call_args in args:
+        start = time.perf_counter()
+        await func(*call_args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def init_app_state(
+    app: FastAPI,
+    engine: AsyncEngine,
+    rate_table: bool = False,
+    password_hasher: PasswordHasher | None = None,
+) -> None:
+    """
+    Set up the application state for in-process runs without the lifespan.
+
+    Redis and kafka are left out. Mutations still write their events
+    to the outbox, but nothing relays them.
+
+    :param app: application to set up.
+    :param engine: engine of the database to run against.
+    :param rate_table: whether to serve rates from the in-process table.
+    :param password_hasher: process pool for passwords, threads if None.
+    """
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    app.state.db_engine = engine
+    app.state.db_session_factory = session_factory
+    app.state.db_read_session_factory = async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        expire_on_commit=False,
+    )
+    app.state.db_replica_monitor = None
+    app.state.db_replica_session_factory = None
+    app.state.rate_table = (
+        RateTable(session_factory, ttl=settings.rate_table_ttl) if rate_table else None
+    )
+    app.state.rate_flights = None
+    app.state.rate_batcher = None
+    app.state.redis_pool = None
+    app.state.rate_cache = None
+    app.state.rate_version = None
+    app.state.password_hasher = password_hasher
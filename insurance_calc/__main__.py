@@ -1,13 +1,16 @@
 import asyncio
 import logging
+from pathlib import Path
 
 import typer
 import uvicorn
 
 from insurance_calc.gunicorn_runner import GunicornApplication
 from insurance_calc.log import configure_logging
-from insurance_calc.pre_start import db_deploy
+from insurance_calc.pre_start import db_deploy, db_import
+from insurance_calc.services.metrics.metrics import prepare_multiprocess_dir
 from insurance_calc.settings import settings
+from insurance_calc.web.api.insurance.importer import ImportFormat
 
 cli = typer.Typer()
 
@@ -21,6 +24,15 @@ def deploy() -> None:
     logging.info("Initial data created")
 
 
+@cli.command("import")
+def import_rates(path: Path, format: ImportFormat = ImportFormat.NDJSON) -> None:
+    """Stream a large NDJSON or CSV rate file into the database."""
+
+    configure_logging()
+    rows = asyncio.run(db_import(path, format))
+    logging.info(f"{rows} insurance records imported")
+
+
 @cli.command()
 def run() -> None:
     """Entrypoint of the application."""
@@ -32,21 +44,21 @@ def run() -> None:
             port=settings.port,
             reload=settings.reload,
             log_level=settings.log_level.value.lower(),
+            access_log=False,
             factory=True,
         )
     else:
         # We choose gunicorn only if reload
         # option is not used, because reload
         # feature doesn't work with gunicorn workers.
+        prepare_multiprocess_dir()
         GunicornApplication(
             "insurance_calc.web.application:get_app",
             host=settings.host,
             port=settings.port,
             workers=settings.workers_count,
             factory=True,
-            accesslog="-",
             loglevel=settings.log_level.value.lower(),
-            access_log_format='%r "-" %s "-" %Tf',  # noqa: WPS323
         ).run()
 
 
@@ -1,6 +1,7 @@
 from collections.abc import AsyncGenerator
 
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from starlette.requests import Request
 
 
@@ -8,6 +9,9 @@ async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]
     """
     Create and get database session.
 
+    Changes must be committed explicitly,
+    anything left uncommitted is rolled back.
+
     :param request: current request.
     :yield: database session.
     """
@@ -16,5 +20,55 @@ async def get_db_session(request: Request) -> AsyncGenerator[AsyncSession, None]
     try:  # noqa: WPS501
         yield session
     finally:
-        await session.commit()
+        await session.close()
+
+
+def get_read_session_factory(app: FastAPI) -> async_sessionmaker[AsyncSession]:
+    """
+    Get session factory for read-only queries.
+
+    Read sessions run in autocommit mode, so a query
+    is a single round trip without BEGIN and COMMIT.
+
+    :param app: current application.
+    :return: replica session factory if the replica is healthy,
+        primary read session factory otherwise.
+    """
+    monitor = app.state.db_replica_monitor
+    if monitor and monitor.healthy:
+        return app.state.db_replica_session_factory
+    return app.state.db_read_session_factory
+
+
+async def get_db_read_session(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and get database session for read-only queries.
+
+    :param request: current request.
+    :yield: database session.
+    """
+    session: AsyncSession = get_read_session_factory(request.app)()
+
+    try:  # noqa: WPS501
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_db_primary_read_session(
+    request: Request,
+) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Create and get database session for reads that must see every commit.
+
+    The session connects on its first query only.
+
+    :param request: current request.
+    :yield: database session.
+    """
+    session: AsyncSession = request.app.state.db_read_session_factory()
+
+    try:  # noqa: WPS501
+        yield session
+    finally:
         await session.close()
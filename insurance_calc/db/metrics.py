@@ -0,0 +1,61 @@
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from insurance_calc.services.metrics.metrics import DB_QUERY_DURATION
+from insurance_calc.utils.spans import add_span
+
+_STARTED_AT = "metrics_statement_started_at"
+
+_OPERATIONS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+
+# Label children are looked up once, statements are timed on every execute.
+# They are bound on first use, metrics files of multiprocess mode
+# can't be opened at import time.
+_histograms: dict[str, Any] = {}
+
+
+def _histogram(statement: str) -> Any:
+    operation = statement.lstrip()[:6].upper()
+    if operation not in _OPERATIONS:
+        operation = "OTHER"
+    histogram = _histograms.get(operation)
+    if histogram is None:
+        histogram = _histograms[operation] = DB_QUERY_DURATION.labels(operation)
+    return histogram
+
+
+def _before_cursor_execute(connection: Connection, *_args) -> None:
+    connection.info.setdefault(_STARTED_AT, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(
+    connection: Connection, _cursor, statement: str, *_args
+) -> None:
+    elapsed = time.perf_counter() - connection.info[_STARTED_AT].pop()
+    _histogram(statement).observe(elapsed)
+    add_span("db", elapsed)
+
+
+def _handle_error(context: ExceptionContext) -> None:
+    if context.connection is not None and context.connection.info.get(_STARTED_AT):
+        context.connection.info[_STARTED_AT].pop()
+
+
+def track_query_duration(engine: AsyncEngine) -> None:
+    """
+    Record latency of every statement of an engine.
+
+    Statements are labeled with their operation and added
+    to the spans of a profiled request, failed statements
+    aren't recorded.
+
+    :param engine: engine to track.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
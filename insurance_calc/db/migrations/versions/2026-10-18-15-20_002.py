@@ -0,0 +1,54 @@
+"""typed insurance date and cargo type/date index
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-18 15:20:12.418903
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "002"
+down_revision = "001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Backfill existing rows: free-form date strings are parsed by postgres
+    op.alter_column(
+        "insurance",
+        "date",
+        existing_type=sa.String(length=64),
+        type_=sa.Date(),
+        existing_nullable=False,
+        postgresql_using="date::date",
+    )
+    # Keep only the latest rate for every cargo type and date,
+    # otherwise the unique index can't be created
+    op.execute(
+        "DELETE FROM insurance AS older USING insurance AS newer "
+        "WHERE older.cargo_type = newer.cargo_type "
+        "AND older.date = newer.date "
+        "AND older.id < newer.id"
+    )
+    op.create_index(
+        "ix_insurance_cargo_type_date",
+        "insurance",
+        ["cargo_type", "date"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_insurance_cargo_type_date", table_name="insurance")
+    op.alter_column(
+        "insurance",
+        "date",
+        existing_type=sa.Date(),
+        type_=sa.String(length=64),
+        existing_nullable=False,
+        postgresql_using="to_char(date, 'YYYY-MM-DD')",
+    )
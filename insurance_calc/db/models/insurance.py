@@ -1,7 +1,8 @@
-from datetime import datetime
+import datetime
 
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy.types import Float, String
+from sqlalchemy.types import Date, Float, String
 
 from insurance_calc.db.base import Base
 
@@ -10,7 +11,10 @@ class Insurance(Base):
     """Main model for calculating insurance rates."""
 
     __tablename__ = "insurance"
+    __table_args__ = (
+        Index("ix_insurance_cargo_type_date", "cargo_type", "date", unique=True),
+    )
 
     cargo_type: Mapped[str] = mapped_column(String(64), nullable=False)
     rate: Mapped[float] = mapped_column(Float(), nullable=False)
-    date: Mapped[datetime] = mapped_column(String(64), nullable=False)
+    date: Mapped[datetime.date] = mapped_column(Date(), nullable=False)
@@ -0,0 +1,13 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import LargeBinary
+
+from insurance_calc.db.base import Base
+
+
+class OutboxEvent(Base):
+    """Change event waiting to be relayed to kafka."""
+
+    __tablename__ = "outbox"
+
+    key: Mapped[bytes] = mapped_column(LargeBinary(), nullable=False)
+    value: Mapped[bytes] = mapped_column(LargeBinary(), nullable=False)
@@ -0,0 +1,60 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class ReplicaMonitor:
+    """Checks a read replica in the background and tracks whether it's usable."""
+
+    def __init__(self, engine: AsyncEngine, interval: float, timeout: float):
+        self.engine = engine
+        self.interval = interval
+        self.timeout = timeout
+        self.healthy = False
+        self._task: asyncio.Task | None = None
+
+    async def _ping(self) -> None:
+        async with self.engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    async def check(self) -> bool:
+        """Ping the replica and update its health."""
+
+        try:
+            await asyncio.wait_for(self._ping(), self.timeout)
+        except Exception:
+            if self.healthy:
+                logging.exception("Read replica is unhealthy, reading from primary")
+            self.healthy = False
+        else:
+            if not self.healthy:
+                logging.info("Read replica is healthy")
+            self.healthy = True
+        return self.healthy
+
+    async def run(self) -> None:
+        """Check the replica until cancelled."""
+
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.check()
+
+    async def start(self) -> None:
+        """Check the replica once and start the background checks."""
+
+        if not await self.check():
+            logging.warning("Read replica is unavailable, reading from primary")
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the background checks."""
+
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
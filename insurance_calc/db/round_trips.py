@@ -0,0 +1,49 @@
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+# Counter of the current request, a list so that copies of the context share it
+round_trips: ContextVar[list[int] | None] = ContextVar("round_trips", default=None)
+
+# The driver sends BEGIN lazily with the first statement of a transaction
+_STARTED = "round_trips_transaction_started"
+
+
+def _count(number: int = 1) -> None:
+    counter = round_trips.get()
+    if counter is not None:
+        counter[0] += number
+
+
+def _in_transaction(connection: Connection) -> bool:
+    return connection.get_execution_options().get("isolation_level") != "AUTOCOMMIT"
+
+
+def _before_cursor_execute(connection: Connection, *_args) -> None:
+    if _in_transaction(connection) and not connection.info.get(_STARTED):
+        connection.info[_STARTED] = True
+        _count(2)
+    else:
+        _count()
+
+
+def _end_transaction(connection: Connection) -> None:
+    if connection.info.pop(_STARTED, False):
+        _count()
+
+
+def track_round_trips(engine: AsyncEngine) -> None:
+    """
+    Count database round trips of an engine in the current request.
+
+    Statements, and BEGIN, COMMIT or ROLLBACK of transactions
+    that reached the database, are counted.
+
+    :param engine: engine to track.
+    """
+    sync_engine = engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "commit", _end_transaction)
+    event.listen(sync_engine, "rollback", _end_transaction)
@@ -4,6 +4,8 @@ from gunicorn.app.base import BaseApplication
 from gunicorn.util import import_app
 from uvicorn.workers import UvicornWorker as BaseUvicornWorker
 
+from insurance_calc.services.metrics.metrics import mark_worker_dead
+
 try:
     import uvloop  # noqa: WPS433 (Found nested import)
 except ImportError:
@@ -48,6 +50,7 @@ class GunicornApplication(BaseApplication):
             "bind": f"{host}:{port}",
             "workers": workers,
             "worker_class": "insurance_calc.gunicorn_runner.UvicornWorker",
+            "child_exit": mark_worker_dead,
             **kwargs,
         }
         self.app = app
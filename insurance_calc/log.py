@@ -1,10 +1,27 @@
+import atexit
 import logging
+import queue
 import sys
+import threading
+import traceback
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any, TextIO
 
+import orjson
 from loguru import logger
 
 from insurance_calc.settings import settings
 
+# ID of the request being handled, added to every log record
+request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+# Standard record being passed to loguru by the current thread
+_std_record = threading.local()
+
+# Lines written at once by the background writer
+LOG_BATCH_SIZE = 512
+
 
 class InterceptHandler(logging.Handler):
     """
@@ -28,16 +45,102 @@ class InterceptHandler(logging.Handler):
         except ValueError:
             level = record.levelno
 
-        # Find caller from where originated the logged message
-        frame, depth = logging.currentframe(), 2
-        while frame.f_code.co_filename == logging.__file__:
-            frame = frame.f_back  # type: ignore
-            depth += 1
+        # The caller is taken from the record by the patcher,
+        # walking frames to find it is slow
+        _std_record.value = record
+        try:
+            logger.opt(exception=record.exc_info).log(level, record.getMessage())
+        finally:
+            _std_record.value = None
+
+
+def _patch_record(record: dict[str, Any]) -> None:
+    std_record: logging.LogRecord | None = getattr(_std_record, "value", None)
+    if std_record is not None:
+        record["name"] = std_record.name
+        record["module"] = std_record.module
+        record["function"] = std_record.funcName
+        record["line"] = std_record.lineno
+        record["file"] = type(record["file"])(std_record.filename, std_record.pathname)
+    record["extra"]["request_id"] = request_id.get()
+
+
+def json_line(message: Any) -> str:
+    """Format a loguru message as a compact JSON line."""
+
+    record = message.record
+    line = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+        **record["extra"],
+    }
+    if record["exception"] is not None:
+        line["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    return orjson.dumps(line, default=str).decode() + "\n"
+
+
+class LogWriter:
+    """
+    Loguru sink formatting and writing log lines.
+
+    In the background, messages are put on a queue and a thread
+    formats them and writes all queued lines with a single flush,
+    so the event loop never waits on the stream. Loguru's own
+    ``enqueue`` pickles every record, which costs more than it saves.
+    """
 
-        logger.opt(depth=depth, exception=record.exc_info).log(
-            level,
-            record.getMessage(),
-        )
+    def __init__(
+        self, stream: TextIO, format_line: Callable[[Any], str], background: bool
+    ) -> None:
+        self.stream = stream
+        self.format_line = format_line
+        self._queue: queue.SimpleQueue | None = None
+        self._thread: threading.Thread | None = None
+        if background:
+            self._queue = queue.SimpleQueue()
+            self._thread = threading.Thread(
+                target=self._run, name="log-writer", daemon=True
+            )
+            self._thread.start()
+
+    def write(self, message: Any) -> None:
+        if self._queue is not None:
+            self._queue.put(message)
+            return
+
+        self.stream.write(self.format_line(message))
+        self.stream.flush()
+
+    def _run(self) -> None:
+        stopped = False
+        while not stopped:
+            batch = [self._queue.get()]
+            while len(batch) < LOG_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            stopped = None in batch
+            self.stream.write(
+                "".join(
+                    self.format_line(message)
+                    for message in batch
+                    if message is not None
+                )
+            )
+            self.stream.flush()
+
+    def stop(self) -> None:
+        """Write queued lines and stop the thread."""
+
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
 
 
 def configure_logging() -> None:  # pragma: no cover
@@ -50,13 +153,29 @@ def configure_logging() -> None:  # pragma: no cover
         if logger_name.startswith("uvicorn."):
             logging.getLogger(logger_name).handlers = []
 
-    # change handler for default uvicorn logger
+    # change handler for default uvicorn logger,
+    # requests are logged by the access log middleware
     logging.getLogger("uvicorn").handlers = [intercept_handler]
-    logging.getLogger("uvicorn.access").handlers = [intercept_handler]
+    logging.getLogger("uvicorn.access").handlers = []
+    logging.getLogger("uvicorn.access").propagate = False
 
     # set logs output, level and format
     logger.remove()
-    logger.add(
+    logger.configure(patcher=_patch_record)
+    if not settings.log_json and not settings.log_background:
+        logger.add(sys.stdout, level=settings.log_level.value)
+        return
+
+    writer = LogWriter(
         sys.stdout,
-        level=settings.log_level.value,
+        json_line if settings.log_json else str,
+        background=settings.log_background,
     )
+    atexit.register(writer.stop)
+    if settings.log_json:
+        # JSON lines are built from the record by the writer
+        logger.add(
+            writer, level=settings.log_level.value, format=lambda _record: "{message}"
+        )
+    else:
+        logger.add(writer, level=settings.log_level.value, colorize=sys.stdout.isatty())
@@ -1,3 +1,6 @@
+import datetime
+from collections.abc import AsyncIterator
+from pathlib import Path
 from typing import Any
 
 import aiofiles
@@ -7,6 +10,10 @@ from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_asyn
 from insurance_calc.db.models.user import User
 from insurance_calc.settings import settings
 from insurance_calc.web.api.auth.service import UserService
+from insurance_calc.web.api.insurance.importer import (
+    ImportFormat,
+    iter_validated_chunks,
+)
 from insurance_calc.web.api.insurance.service import InsuranceService
 
 
@@ -26,6 +33,27 @@ async def db_deploy() -> None:
         await populate_insurance(data, insurance_service)
 
 
+async def db_import(path: Path, format: ImportFormat) -> int:
+    engine = create_async_engine(str(settings.db_url))
+    async_session_maker = async_sessionmaker(engine, class_=AsyncSession)
+
+    async def read_file() -> AsyncIterator[bytes]:
+        async with aiofiles.open(path, "rb") as f:
+            while chunk := await f.read(1024 * 1024):
+                yield chunk
+
+    async with async_session_maker() as session:
+        insurance_service: InsuranceService = InsuranceService(session)
+        rows = await insurance_service.import_rates(
+            iter_validated_chunks(
+                read_file(), format, settings.insurance_import_chunk_size
+            )
+        )
+
+    await engine.dispose()
+    return rows
+
+
 async def populate_default_user(user_service: UserService) -> None:
     user: User | None = await user_service.get_user_by_username(
         username=settings.admin_email
@@ -48,7 +76,8 @@ async def populate_insurance(
     data: dict[str, Any], insurance_service: InsuranceService
 ) -> None:
     # Insurance seed structure is used as according to the TZ
-    for date, insurance_data in data.get("Insurance", {}).items():
-        for insurance_data_chunk in insurance_data:
-            insurance_data = {**insurance_data_chunk, "date": date}
-            await insurance_service.upsert_insurance(**insurance_data)
+    await insurance_service.bulk_upsert(
+        {**insurance_data_chunk, "date": datetime.date.fromisoformat(date)}
+        for date, insurance_data in data.get("Insurance", {}).items()
+        for insurance_data_chunk in insurance_data
+    )
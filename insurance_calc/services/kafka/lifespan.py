@@ -1,6 +1,9 @@
 from aiokafka import AIOKafkaProducer
 from fastapi import FastAPI
 
+from insurance_calc.services.kafka.outbox import OutboxRelay
+from insurance_calc.services.kafka.publisher import EventPublisher
+from insurance_calc.services.kafka.utils import KafkaTopic
 from insurance_calc.settings import settings
 
 
@@ -17,12 +20,21 @@ async def init_kafka(app: FastAPI) -> None:  # pragma: no cover
     because aiokafka has implicit pool
     inside the producer.
 
+    The producer stays open for the lifetime
+    of the application and is shared by
+    the event publisher.
+
     :param app: current application.
     """
     app.state.kafka_producer = AIOKafkaProducer(
         bootstrap_servers=settings.kafka_bootstrap_servers,
+        linger_ms=settings.kafka_linger_ms,
     )
     await app.state.kafka_producer.start()
+    app.state.event_publisher = EventPublisher(
+        app.state.kafka_producer,
+        KafkaTopic.INSURANCE.value,
+    )
 
 
 async def shutdown_kafka(app: FastAPI) -> None:  # pragma: no cover
@@ -35,3 +47,32 @@ async def shutdown_kafka(app: FastAPI) -> None:  # pragma: no cover
     :param app: current application.
     """
     await app.state.kafka_producer.stop()
+
+
+def init_outbox(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Start the outbox relay.
+
+    The relay sends change events written
+    to the outbox by insurance mutations,
+    so requests never wait for kafka.
+
+    :param app: current application.
+    """
+    app.state.outbox_relay = OutboxRelay(
+        app.state.db_session_factory,
+        app.state.event_publisher,
+        batch_size=settings.outbox_batch_size,
+        poll_interval=settings.outbox_poll_interval,
+        max_backoff=settings.outbox_max_backoff,
+    )
+    app.state.outbox_relay.start()
+
+
+async def shutdown_outbox(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stop the outbox relay.
+
+    :param app: current application.
+    """
+    await app.state.outbox_relay.stop()
@@ -0,0 +1,129 @@
+import asyncio
+import logging
+from collections.abc import Iterable
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from insurance_calc.db.models.outbox import OutboxEvent
+from insurance_calc.services.kafka.publisher import (
+    EventPublisher,
+    EventType,
+    encode_events,
+)
+
+# Advisory lock held by the relay draining the outbox
+RELAY_LOCK_ID = 0x6F7574626F78
+
+
+async def add_events(
+    session: AsyncSession,
+    event_type: EventType,
+    table: str,
+    user_id: int,
+    ids: Iterable[int],
+) -> None:
+    """
+    Write change events to the outbox.
+
+    Events are part of the session transaction, so they are
+    stored only if the change itself is committed.
+
+    :param session: session of the change.
+    :param event_type: type of the change.
+    :param table: changed table.
+    :param user_id: ID of the user who made the change.
+    :param ids: IDs of the changed rows.
+    """
+    records = encode_events(event_type, table, user_id, ids)
+    if records:
+        await session.execute(
+            insert(OutboxEvent),
+            [{"key": key, "value": value} for key, value in records],
+        )
+
+
+class OutboxRelay:
+    """Relays outbox events to kafka in a background task."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        publisher: EventPublisher,
+        batch_size: int,
+        poll_interval: float,
+        max_backoff: float,
+    ):
+        self.session_factory = session_factory
+        self.publisher = publisher
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_backoff = max_backoff
+        self._task: asyncio.Task | None = None
+
+    async def drain(self) -> int:
+        """
+        Send one batch of outbox events and remove them.
+
+        Relays of all workers share an advisory lock, so one of them
+        drains at a time and events of a row are sent in order.
+        The lock is released when the transaction ends.
+
+        :return: number of sent events, 0 if another relay is draining.
+        """
+        async with self.session_factory() as session:
+            locked = await session.scalar(
+                select(func.pg_try_advisory_xact_lock(RELAY_LOCK_ID))
+            )
+            if not locked:
+                return 0
+
+            events = await session.execute(
+                select(OutboxEvent.id, OutboxEvent.key, OutboxEvent.value)
+                .order_by(OutboxEvent.id)
+                .limit(self.batch_size)
+            )
+            events = events.all()
+            if not events:
+                return 0
+
+            await self.publisher.send((key, value) for _, key, value in events)
+            await session.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_([id for id, *_ in events]))
+            )
+            await session.commit()
+
+        return len(events)
+
+    async def run(self) -> None:
+        """Drain the outbox until cancelled, backing off on failures."""
+
+        backoff = self.poll_interval
+        while True:
+            try:
+                sent = await self.drain()
+            except Exception:
+                logging.exception(f"Outbox relay failed, retrying in {backoff:.1f}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.max_backoff)
+                continue
+
+            backoff = self.poll_interval
+            if sent < self.batch_size:
+                await asyncio.sleep(self.poll_interval)
+
+    def start(self) -> None:
+        """Start the relay task."""
+
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        """Stop the relay task, events left in the outbox are sent on next start."""
+
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -0,0 +1,116 @@
+import asyncio
+import enum
+import logging
+import time
+from collections.abc import Iterable
+
+import orjson
+from aiokafka import AIOKafkaProducer
+
+from insurance_calc.services.metrics.metrics import (
+    KAFKA_EVENTS_SENT,
+    KAFKA_SEND_DURATION,
+)
+from insurance_calc.utils.spans import add_span
+
+
+class EventType(str, enum.Enum):
+    """Change event types."""
+
+    CREATE = "create"
+    UPDATE = "update"
+    DELETE = "delete"
+
+
+def encode_event(
+    event_type: EventType,
+    table: str,
+    instance_id: int,
+    user_id: int,
+    timestamp_ms: int,
+) -> bytes:
+    """
+    Encode a change event as a compact JSON array.
+
+    Fields go in a fixed order:
+    ``[type, table, instance_id, user_id, timestamp_ms]``.
+
+    :param event_type: type of the change.
+    :param table: changed table.
+    :param instance_id: ID of the changed row.
+    :param user_id: ID of the user who made the change.
+    :param timestamp_ms: time of the change in milliseconds since epoch.
+    :return: encoded event.
+    """
+    return orjson.dumps([event_type, table, instance_id, user_id, timestamp_ms])
+
+
+def encode_key(table: str, instance_id: int) -> bytes:
+    """
+    Encode a partitioning key of a row.
+
+    Events of the same row share a key, so they land on the same
+    partition and keep their order.
+
+    :param table: changed table.
+    :param instance_id: ID of the changed row.
+    :return: encoded key.
+    """
+    return f"{table}:{instance_id}".encode()
+
+
+def encode_events(
+    event_type: EventType,
+    table: str,
+    user_id: int,
+    ids: Iterable[int],
+) -> list[tuple[bytes, bytes]]:
+    """
+    Encode change events of many rows made at the same time.
+
+    :param event_type: type of the change.
+    :param table: changed table.
+    :param user_id: ID of the user who made the change.
+    :param ids: IDs of the changed rows.
+    :return: pairs of encoded keys and events.
+    """
+    timestamp_ms = int(time.time() * 1000)
+    return [
+        (
+            encode_key(table, instance_id),
+            encode_event(event_type, table, instance_id, user_id, timestamp_ms),
+        )
+        for instance_id in ids
+    ]
+
+
+class EventPublisher:
+    """Publishes change events through the long-lived kafka producer."""
+
+    def __init__(self, producer: AIOKafkaProducer, topic: str):
+        self.producer = producer
+        self.topic = topic
+
+    async def send(self, records: Iterable[tuple[bytes, bytes]]) -> int:
+        """
+        Send encoded events and wait for delivery.
+
+        Keys are hashed across partitions by the producer
+        and the producer batches records by itself.
+
+        :param records: pairs of encoded keys and events.
+        :return: number of sent events.
+        """
+        start = time.perf_counter()
+        futures = [
+            await self.producer.send(self.topic, value=value, key=key)
+            for key, value in records
+        ]
+        await asyncio.gather(*futures)
+        elapsed = time.perf_counter() - start
+        KAFKA_SEND_DURATION.labels(self.topic).observe(elapsed)
+        add_span("kafka", elapsed)
+        KAFKA_EVENTS_SENT.labels(self.topic).inc(len(futures))
+
+        logging.info(f"{len(futures)} events sent to {self.topic}")
+        return len(futures)
@@ -0,0 +1,110 @@
+import logging
+import os
+from pathlib import Path
+from typing import Any
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+# Gunicorn workers write their values to files in this directory, it has
+# to be set before prometheus_client is imported by the master process
+MULTIPROC_DIR_ENV = "PROMETHEUS_MULTIPROC_DIR"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by route and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUEST_EXCEPTIONS = Counter(
+    "http_request_exceptions_total",
+    "HTTP requests that raised an unhandled exception.",
+    ["method", "route", "exception"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route, including streamed bodies.",
+    ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Database statement latency by operation.",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+KAFKA_SEND_DURATION = Histogram(
+    "kafka_send_duration_seconds",
+    "Time to send a batch of events to kafka and wait for delivery.",
+    ["topic"],
+)
+KAFKA_EVENTS_SENT = Counter(
+    "kafka_events_sent_total",
+    "Events delivered to kafka.",
+    ["topic"],
+)
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Cache lookups by cache and result.",
+    ["cache", "result"],
+)
+BATCH_SIZE = Histogram(
+    "batch_size",
+    "Keys loaded together by a micro-batching dispatcher.",
+    ["batcher"],
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+SINGLE_FLIGHT_LOOKUPS = Counter(
+    "single_flight_lookups_total",
+    "Lookups that queried, joined a running identical query or got a stale result.",
+    ["lookup", "result"],
+)
+
+
+def is_multiprocess() -> bool:
+    return MULTIPROC_DIR_ENV in os.environ
+
+
+def generate_metrics() -> bytes:
+    """Render metrics of all workers in the Prometheus text format."""
+
+    if not is_multiprocess():
+        return generate_latest(REGISTRY)
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry)
+
+
+def prepare_multiprocess_dir() -> None:
+    """Create the metrics directory and drop files of previous runs."""
+
+    if not is_multiprocess():
+        logging.warning(
+            f"{MULTIPROC_DIR_ENV} is not set, every worker reports only its own metrics"
+        )
+        return
+
+    path = Path(os.environ[MULTIPROC_DIR_ENV])
+    path.mkdir(parents=True, exist_ok=True)
+    for file in path.glob("*.db"):
+        file.unlink()
+
+
+def mark_worker_dead(_server: Any, worker: Any) -> None:
+    """Gunicorn hook dropping live gauges of an exited worker."""
+
+    if is_multiprocess():
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1 @@
+"""Password hashing service."""
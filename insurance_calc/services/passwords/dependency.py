@@ -0,0 +1,13 @@
+from starlette.requests import Request
+
+from insurance_calc.services.passwords.hasher import PasswordHasher
+
+
+def get_password_hasher(request: Request) -> PasswordHasher:  # pragma: no cover
+    """
+    Returns the password hashing pool.
+
+    :param request: current request.
+    :returns: password hasher from the state.
+    """
+    return request.app.state.password_hasher
@@ -0,0 +1,78 @@
+import asyncio
+import multiprocessing
+import os
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any
+
+from passlib.context import CryptContext
+
+# Built once per process, parsing the schemes is not free
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """Hash a password."""
+
+    return pwd_context.hash(password)
+
+
+def verify_password(password: str, password_hash: str) -> bool:
+    """Verify a password against its hash."""
+
+    return pwd_context.verify(password, password_hash)
+
+
+def _init_worker() -> None:
+    # Hashing yields the CPU to the event loops serving other requests
+    os.nice(10)
+
+
+class PasswordHasherBusyError(Exception):
+    """Raised when too many passwords are already waiting to be hashed."""
+
+
+class PasswordHasher:
+    """Hashes passwords in a bounded process pool with admission control."""
+
+    def __init__(self, workers: int, queue_size: int):
+        self.limit = workers + queue_size
+        self.in_flight = 0
+        # Spawned workers don't inherit the event loop or open connections
+        self.executor: Executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    @property
+    def busy(self) -> bool:
+        """Whether the queue is full and new work would be rejected."""
+
+        return self.in_flight >= self.limit
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self.busy:
+            raise PasswordHasherBusyError("Password hashing queue is full")
+
+        self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.in_flight -= 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password in the pool."""
+
+        return await self._run(hash_password, password)
+
+    async def verify(self, password: str, password_hash: str) -> bool:
+        """Verify a password in the pool."""
+
+        return await self._run(verify_password, password, password_hash)
+
+    def shutdown(self) -> None:
+        """Stop the pool workers."""
+
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,28 @@
+from fastapi import FastAPI
+
+from insurance_calc.services.passwords.hasher import PasswordHasher
+from insurance_calc.settings import settings
+
+
+def init_password_hasher(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the password hashing pool.
+
+    Workers are started on first use,
+    so they don't slow down startup.
+
+    :param app: current fastapi application.
+    """
+    app.state.password_hasher = PasswordHasher(
+        workers=settings.password_hash_workers,
+        queue_size=settings.password_hash_queue_size,
+    )
+
+
+def shutdown_password_hasher(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops the password hashing pool.
+
+    :param app: current fastapi application.
+    """
+    app.state.password_hasher.shutdown()
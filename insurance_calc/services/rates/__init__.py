@@ -0,0 +1 @@
+"""In-process rate table service."""
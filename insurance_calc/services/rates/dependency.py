@@ -0,0 +1,38 @@
+from starlette.requests import Request
+
+from insurance_calc.services.rates.row import RateRow
+from insurance_calc.services.rates.table import RateTable
+from insurance_calc.utils.batcher import MicroBatcher
+from insurance_calc.utils.single_flight import SingleFlight
+
+
+def get_rate_table(request: Request) -> RateTable | None:  # pragma: no cover
+    """
+    Returns the in-process rate table.
+
+    :param request: current request.
+    :returns: rate table or None if it's disabled.
+    """
+    return request.app.state.rate_table
+
+
+def get_rate_flights(request: Request) -> SingleFlight | None:  # pragma: no cover
+    """
+    Returns the single-flight layer of rate lookups.
+
+    :param request: current request.
+    :returns: single-flight layer or None if it's disabled.
+    """
+    return request.app.state.rate_flights
+
+
+def get_rate_batcher(
+    request: Request,
+) -> MicroBatcher[int, RateRow] | None:  # pragma: no cover
+    """
+    Returns the dispatcher batching rate lookups by ID.
+
+    :param request: current request.
+    :returns: dispatcher or None if it's disabled.
+    """
+    return request.app.state.rate_batcher
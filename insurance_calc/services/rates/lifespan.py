@@ -0,0 +1,78 @@
+from fastapi import FastAPI
+
+from insurance_calc.services.rates.table import RateTable
+from insurance_calc.settings import settings
+from insurance_calc.utils.batcher import MicroBatcher
+from insurance_calc.utils.single_flight import SingleFlight
+
+
+async def init_rate_table(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the in-process rate table and loads it.
+
+    The table is stored in the state, so each worker keeps its own
+    copy of the rates, unless they share snapshots of it.
+    It follows the shared version of the table, so redis has
+    to be set up before it.
+
+    :param app: current fastapi application.
+    """
+    app.state.rate_table = None
+    if not settings.rate_table_enabled:
+        return
+
+    app.state.rate_table = RateTable(
+        app.state.db_session_factory,
+        ttl=settings.rate_table_ttl,
+        snapshot_dir=settings.rate_table_snapshot_dir,
+        rate_version=app.state.rate_version,
+    )
+    await app.state.rate_table.refresh()
+
+
+async def shutdown_rate_table(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops a running reload of the rate table.
+
+    :param app: current fastapi application.
+    """
+    if app.state.rate_table:
+        await app.state.rate_table.stop()
+
+
+def init_rate_flights(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the single-flight layer of rate lookups.
+
+    Lookups are shared within a worker only.
+
+    :param app: current fastapi application.
+    """
+    app.state.rate_flights = None
+    if not settings.rate_single_flight_enabled:
+        return
+
+    app.state.rate_flights = SingleFlight(
+        settings.rate_single_flight_size,
+        settings.rate_single_flight_stale_ttl,
+        name="rates",
+    )
+
+
+def init_rate_batcher(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates the dispatcher batching rate lookups by ID.
+
+    Lookups are batched within a worker only.
+
+    :param app: current fastapi application.
+    """
+    app.state.rate_batcher = None
+    if not settings.rate_batch_enabled:
+        return
+
+    app.state.rate_batcher = MicroBatcher(
+        settings.rate_batch_window,
+        settings.rate_batch_size,
+        name="rates",
+    )
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from insurance_calc.db.models.insurance import Insurance
+
+# Columns selected to build a RateRow, in field order
+RATE_COLUMNS = (
+    Insurance.id,
+    Insurance.cargo_type,
+    Insurance.rate,
+    Insurance.date,
+    Insurance.created_date,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class RateRow:
+    """Lightweight read-only copy of an insurance row."""
+
+    id: int
+    cargo_type: str
+    rate: float
+    date: date
+    created_date: datetime
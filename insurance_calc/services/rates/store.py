@@ -0,0 +1,326 @@
+import asyncio
+import datetime
+import fcntl
+import os
+import shutil
+import time
+from collections.abc import AsyncIterator, Iterable, Sequence
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import orjson
+
+from insurance_calc.services.rates.row import RateRow
+
+# Rows are sorted by cargo type code and day under a single int64 key
+_CODE_SHIFT = 1 << 32
+_DAY_OFFSET = 1 << 31
+
+# Arrays of a store, saved as one .npy file each
+COLUMNS = ("ids", "cargo_codes", "days", "rates", "created", "keys", "id_order")
+META_FILE = "meta.json"
+LOCK_FILE = "snapshot.lock"
+# Symlink to the snapshot workers should load
+CURRENT_SNAPSHOT = "current"
+
+# Dates are converted by hand, numpy converts date objects one by one slowly
+_EPOCH = datetime.datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_MICROSECOND = datetime.timedelta(microseconds=1)
+
+
+def _keys(cargo_codes: np.ndarray, days: np.ndarray) -> np.ndarray:
+    return (
+        cargo_codes.astype(np.int64) * _CODE_SHIFT + days.astype(np.int64) + _DAY_OFFSET
+    )
+
+
+def _days(dates: Sequence[datetime.date]) -> np.ndarray:
+    return np.array([day.toordinal() - _EPOCH_ORDINAL for day in dates], dtype=np.int32)
+
+
+def _timestamps(moments: Sequence[datetime.datetime]) -> np.ndarray:
+    return np.array(
+        [(moment - _EPOCH) // _MICROSECOND for moment in moments], dtype=np.int64
+    ).view("datetime64[us]")
+
+
+class RateStoreBuilder:
+    """Collects rows in chunks, interning cargo types to codes."""
+
+    def __init__(self) -> None:
+        self.codes: dict[str, int] = {}
+        self._chunks: list[tuple[np.ndarray, ...]] = []
+
+    def add(self, rows: Sequence[Sequence[Any]]) -> None:
+        """Add rows of id, cargo type, rate, date and created date."""
+
+        if not rows:
+            return
+
+        ids, cargo_types, rates, dates, created = zip(*rows, strict=True)
+        codes = self.codes
+        self._chunks.append(
+            (
+                np.array(ids, dtype=np.int64),
+                np.array(
+                    [codes.setdefault(name, len(codes)) for name in cargo_types],
+                    dtype=np.int32,
+                ),
+                _days(dates),
+                np.array(rates, dtype=np.float64),
+                _timestamps(created),
+            )
+        )
+
+    def build(self) -> "ColumnarRateStore":
+        """Sort the collected rows and index them."""
+
+        if self._chunks:
+            ids, cargo_codes, days, rates, created = (
+                np.concatenate(column) for column in zip(*self._chunks, strict=True)
+            )
+        else:
+            ids = np.empty(0, dtype=np.int64)
+            cargo_codes = days = np.empty(0, dtype=np.int32)
+            rates = np.empty(0, dtype=np.float64)
+            created = np.empty(0, dtype="datetime64[us]")
+        self._chunks = []
+
+        keys = _keys(cargo_codes, days)
+        order = np.argsort(keys, kind="stable")
+        ids = ids[order]
+        return ColumnarRateStore(
+            list(self.codes),
+            ids=ids,
+            cargo_codes=cargo_codes[order],
+            days=days[order],
+            rates=rates[order],
+            created=created[order],
+            keys=keys[order],
+            id_order=np.argsort(ids, kind="stable"),
+        )
+
+
+class ColumnarRateStore:
+    """
+    Rates held as numpy columns sorted by cargo type and date.
+
+    Cargo types are interned to int32 codes, dates are stored as int32
+    day numbers and rates as float64, about 50 bytes per rate with the
+    indexes. Lookups are binary searches over the sorted columns and
+    take arrays of keys at once. Snapshots are directories of ``.npy``
+    files loaded memory-mapped, so workers share the same pages.
+    """
+
+    def __init__(self, cargo_types: list[str], **columns: np.ndarray) -> None:
+        self.cargo_types = cargo_types
+        self.codes = {name: code for code, name in enumerate(cargo_types)}
+        self.ids: np.ndarray = columns["ids"]
+        self.cargo_codes: np.ndarray = columns["cargo_codes"]
+        self.days: np.ndarray = columns["days"]
+        self.rates: np.ndarray = columns["rates"]
+        self.created: np.ndarray = columns["created"]
+        self.keys: np.ndarray = columns["keys"]
+        self.id_order: np.ndarray = columns["id_order"]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[Any]]) -> "ColumnarRateStore":
+        """Build a store from rows of id, cargo type, rate, date and created date."""
+
+        builder = RateStoreBuilder()
+        builder.add(list(rows))
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the columns and indexes."""
+
+        return sum(getattr(self, column).nbytes for column in COLUMNS)
+
+    def row(self, position: int) -> RateRow:
+        """Build a row at a position."""
+
+        return RateRow(
+            int(self.ids[position]),
+            self.cargo_types[self.cargo_codes[position]],
+            float(self.rates[position]),
+            self.days[position].astype("datetime64[D]").item(),
+            self.created[position].item(),
+        )
+
+    def rows(self, positions: np.ndarray) -> list[RateRow]:
+        """Build rows at positions."""
+
+        return [self.row(position) for position in positions.tolist()]
+
+    def _missing(self, count: int) -> np.ndarray:
+        return np.full(count, -1, dtype=np.int64)
+
+    def positions_by_id(self, ids: Sequence[int] | np.ndarray) -> np.ndarray:
+        """Get positions of rows by ID, -1 for missing ones."""
+
+        try:
+            ids = np.asarray(ids, dtype=np.int64)
+        except OverflowError:
+            # IDs out of the column range match no row, and neither does -1
+            bounds = np.iinfo(np.int64)
+            ids = np.array(
+                [id if bounds.min <= id <= bounds.max else -1 for id in ids],
+                dtype=np.int64,
+            )
+        if not len(self):
+            return self._missing(len(ids))
+
+        found = np.searchsorted(self.ids, ids, sorter=self.id_order)
+        positions = self.id_order[np.minimum(found, len(self) - 1)]
+        return np.where(self.ids[positions] == ids, positions, -1)
+
+    def _query_keys(
+        self, cargo_types: Sequence[str], dates: Sequence[datetime.date]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        # Unknown cargo types get a code past the last one, so they match nothing
+        unknown = len(self.cargo_types)
+        codes = np.array(
+            [self.codes.get(name, unknown) for name in cargo_types], dtype=np.int32
+        )
+        return codes, _keys(codes, _days(dates))
+
+    def positions_by_key(
+        self, cargo_types: Sequence[str], dates: Sequence[datetime.date]
+    ) -> np.ndarray:
+        """Get positions of rows by cargo type and date, -1 for missing ones."""
+
+        if not len(self):
+            return self._missing(len(cargo_types))
+
+        _, keys = self._query_keys(cargo_types, dates)
+        found = np.minimum(np.searchsorted(self.keys, keys), len(self) - 1)
+        return np.where(self.keys[found] == keys, found, -1)
+
+    def effective_positions(
+        self, cargo_types: Sequence[str], dates: Sequence[datetime.date]
+    ) -> np.ndarray:
+        """Get positions of rates effective on dates, -1 for missing ones."""
+
+        if not len(self):
+            return self._missing(len(cargo_types))
+
+        # The latest row at or before the key, if it has the same cargo type
+        codes, keys = self._query_keys(cargo_types, dates)
+        found = np.searchsorted(self.keys, keys, side="right") - 1
+        matches = self.cargo_codes[np.maximum(found, 0)] == codes
+        return np.where((found >= 0) & matches, found, -1)
+
+    def rates_at(self, positions: np.ndarray) -> np.ndarray:
+        """Get rates at positions, NaN for missing ones."""
+
+        if not len(self):
+            return np.full(len(positions), np.nan)
+        return np.where(positions >= 0, self.rates[np.maximum(positions, 0)], np.nan)
+
+    def query(self, **filters: Any) -> list[RateRow]:
+        """Get all rates matching the given column values, ordered by ID."""
+
+        if "id" in filters:
+            positions = self.positions_by_id([filters["id"]])
+            positions = positions[positions >= 0]
+        elif "cargo_type" in filters:
+            # Rows of a cargo type are contiguous
+            code = self.codes.get(filters["cargo_type"], len(self.cargo_types))
+            start, end = np.searchsorted(
+                self.keys, [code * _CODE_SHIFT, (code + 1) * _CODE_SHIFT]
+            )
+            positions = np.arange(start, end)
+        else:
+            positions = np.arange(len(self))
+
+        mask = np.ones(len(positions), dtype=bool)
+        for name, value in filters.items():
+            if name == "cargo_type":
+                mask &= self.cargo_codes[positions] == self.codes.get(value, -1)
+            elif name == "rate":
+                mask &= self.rates[positions] == value
+            elif name == "date":
+                mask &= self.days[positions] == _days([value])[0]
+            elif name == "id":
+                mask &= self.ids[positions] == value
+
+        positions = positions[mask]
+        return self.rows(positions[np.argsort(self.ids[positions], kind="stable")])
+
+    def save(self, directory: Path, **meta: Any) -> None:
+        """Write the store to a snapshot directory."""
+
+        directory.mkdir(parents=True)
+        for column in COLUMNS:
+            np.save(directory / f"{column}.npy", getattr(self, column))
+        (directory / META_FILE).write_bytes(
+            orjson.dumps({**meta, "cargo_types": self.cargo_types})
+        )
+
+    @classmethod
+    def load(cls, directory: Path) -> tuple["ColumnarRateStore", dict[str, Any]]:
+        """Map a snapshot directory read-only, with its metadata."""
+
+        meta = orjson.loads((directory / META_FILE).read_bytes())
+        columns = {
+            column: np.load(directory / f"{column}.npy", mmap_mode="r")
+            for column in COLUMNS
+        }
+        return cls(meta.pop("cargo_types"), **columns), meta
+
+
+def publish_snapshot(
+    root: Path, store: ColumnarRateStore, keep: int = 2, **meta: Any
+) -> Path:
+    """
+    Save a snapshot and point the current snapshot at it.
+
+    The snapshot is written under a temporary name and renamed,
+    then the ``current`` symlink is replaced atomically. Older
+    snapshots are removed, workers still mapping them keep
+    their pages until they load another one.
+    """
+    root.mkdir(parents=True, exist_ok=True)
+    name = f"snapshot-{time.time_ns()}"
+    staging = root / f"{name}.tmp"
+    store.save(staging, **meta)
+    staging.rename(root / name)
+
+    link = root / f"{CURRENT_SNAPSHOT}.tmp"
+    link.unlink(missing_ok=True)
+    link.symlink_to(name)
+    os.replace(link, root / CURRENT_SNAPSHOT)
+
+    for old in sorted(root.glob("snapshot-*"))[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return root / name
+
+
+def load_snapshot(root: Path) -> tuple[ColumnarRateStore, dict[str, Any]] | None:
+    """Map the current snapshot, None if there is none."""
+
+    try:
+        return ColumnarRateStore.load((root / CURRENT_SNAPSHOT).resolve(strict=True))
+    except FileNotFoundError:
+        return None
+
+
+@asynccontextmanager
+async def snapshot_lock(root: Path) -> AsyncIterator[None]:
+    """Hold the lock of a snapshot directory shared by all processes."""
+
+    root.mkdir(parents=True, exist_ok=True)
+    fd = os.open(root / LOCK_FILE, os.O_RDWR | os.O_CREAT)
+    try:
+        await asyncio.to_thread(fcntl.flock, fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        # Closing the file releases the lock
+        os.close(fd)
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import time
+from collections.abc import Sequence
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from insurance_calc.services.rates.row import RATE_COLUMNS, RateRow
+from insurance_calc.services.rates.store import (
+    ColumnarRateStore,
+    RateStoreBuilder,
+    load_snapshot,
+    publish_snapshot,
+    snapshot_lock,
+)
+from insurance_calc.services.redis.rate_version import RateVersion
+
+# Rows read from the database at once when loading the table
+LOAD_CHUNK_SIZE = 10000
+# Seconds before a failed reload is retried
+RELOAD_RETRY_INTERVAL = 1.0
+
+
+class RateTable:
+    """
+    Per-worker in-memory copy of the insurance table.
+
+    Mutations bump ``version`` and the table is reloaded in the
+    background on the next read, so calculations don't touch the
+    database in steady state and never wait for a reload. Until the
+    reload is done, and while it fails, the loaded rates are served.
+    Changes made by other workers are picked up after ``ttl`` seconds,
+    or as soon as a read asks for a newer shared version of the table.
+
+    Rates are kept in a columnar store. With a snapshot directory,
+    one worker at a time reads the table and publishes a snapshot,
+    and workers map the latest snapshot instead of keeping copies.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        ttl: float,
+        snapshot_dir: Path | None = None,
+        rate_version: RateVersion | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._ttl = ttl
+        self._snapshot_dir = snapshot_dir
+        self._rate_version = rate_version
+        self._lock = asyncio.Lock()
+        self._store = RateStoreBuilder().build()
+        self._loaded_version = -1
+        # Wall clock times of the loaded rates and of the last mutation,
+        # comparable with snapshots of other workers
+        self._read_at = 0.0
+        self._bumped_at = 0.0
+        self._reload_task: asyncio.Task | None = None
+        self._retry_at = 0.0
+        # Shared version read before the loaded rates, and the newest one
+        # a read asked for
+        self._required_version = 0
+        self.shared_version = 0
+        self.version = 0
+
+    @property
+    def is_loaded(self) -> bool:
+        """Whether rates were loaded at least once."""
+
+        return self._loaded_version >= 0
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the table has to be reloaded."""
+
+        return (
+            self._loaded_version != self.version
+            or time.time() - self._read_at > self._ttl
+            or self.shared_version < self._required_version
+        )
+
+    @property
+    def store(self) -> ColumnarRateStore:
+        """Columnar store of the loaded rates."""
+
+        return self._store
+
+    def covers(self, version: int) -> bool:
+        """Whether the loaded rates include every change up to a shared version."""
+
+        return self.shared_version >= version
+
+    def bump(self) -> None:
+        """Mark the table as outdated after a mutation."""
+
+        self.version += 1
+        self._bumped_at = time.time()
+
+    async def refresh(self, version: int = 0) -> None:
+        """
+        Load the table once, then reload it in the background when stale.
+
+        :param version: shared version the rates should include,
+            an older table is reloaded.
+        """
+
+        self._required_version = max(self._required_version, version)
+        if not self.is_stale:
+            return
+
+        if not self.is_loaded:
+            # There is nothing to serve yet, so the first load is awaited
+            async with self._lock:
+                if not self.is_loaded:
+                    await self._reload()
+            return
+
+        reloading = self._reload_task and not self._reload_task.done()
+        if not reloading and time.monotonic() >= self._retry_at:
+            self._reload_task = asyncio.create_task(self._reload_in_background())
+
+    async def stop(self) -> None:
+        """Stop a running reload."""
+
+        if self._reload_task:
+            self._reload_task.cancel()
+            try:
+                await self._reload_task
+            except asyncio.CancelledError:
+                pass
+            self._reload_task = None
+
+    async def _reload(self) -> None:
+        """Load the table from a snapshot or the database"""
+
+        version = self.version
+        if self._snapshot_dir:
+            store, meta = await self._load_snapshot(self._snapshot_dir)
+        else:
+            meta = await self._read_meta()
+            store = await self._read()
+        self._store = store
+        self._read_at = meta["read_at"]
+        self.shared_version = meta.get("shared_version", 0)
+        self._loaded_version = version
+
+    async def _reload_in_background(self) -> None:
+        """Reload the table, keeping the loaded rates if it fails"""
+
+        try:
+            await self._reload()
+        except Exception:
+            self._retry_at = time.monotonic() + RELOAD_RETRY_INTERVAL
+            logging.exception(
+                f"Failed to reload rate table, retrying in {RELOAD_RETRY_INTERVAL}s"
+            )
+
+    async def _read_meta(self) -> dict[str, Any]:
+        """Times of a read of the table, taken before reading it"""
+
+        versions = await self._rate_version.get() if self._rate_version else None
+        return {
+            "read_at": time.time(),
+            "shared_version": versions[0] if versions else 0,
+        }
+
+    async def _read(self) -> ColumnarRateStore:
+        """Read the table from the database in chunks"""
+
+        builder = RateStoreBuilder()
+        async with self._session_factory() as session:
+            result = await session.stream(
+                select(*RATE_COLUMNS),
+                execution_options={"yield_per": LOAD_CHUNK_SIZE},
+            )
+            async for rows in result.partitions():
+                builder.add(rows)
+
+        return await asyncio.to_thread(builder.build)
+
+    async def _load_snapshot(
+        self, root: Path
+    ) -> tuple[ColumnarRateStore, dict[str, Any]]:
+        """
+        Map a snapshot read after the last mutation, within the TTL
+        and at the shared version reads asked for
+        """
+
+        fresh_since = max(self._bumped_at, time.time() - self._ttl)
+        required_version = self._required_version
+
+        def fresh_snapshot() -> tuple[ColumnarRateStore, dict[str, Any]] | None:
+            snapshot = load_snapshot(root)
+            if (
+                snapshot
+                and snapshot[1]["read_at"] >= fresh_since
+                and snapshot[1].get("shared_version", 0) >= required_version
+            ):
+                return snapshot
+            return None
+
+        if snapshot := await asyncio.to_thread(fresh_snapshot):
+            return snapshot
+
+        async with snapshot_lock(root):
+            # Another worker may have published one while we waited
+            if snapshot := await asyncio.to_thread(fresh_snapshot):
+                return snapshot
+
+            meta = await self._read_meta()
+            store = await self._read()
+            await asyncio.to_thread(publish_snapshot, root, store, **meta)
+
+        # The mapped snapshot replaces the private copy
+        return await asyncio.to_thread(fresh_snapshot) or (store, meta)
+
+    def get(self, id: int) -> RateRow | None:
+        """Get a rate by ID."""
+
+        (position,) = self._store.positions_by_id([id])
+        return self._store.row(position) if position >= 0 else None
+
+    def rates_by_id(self, ids: Sequence[int]) -> np.ndarray:
+        """Get rates by ID, NaN for missing ones."""
+
+        return self._store.rates_at(self._store.positions_by_id(ids))
+
+    def rates_by_key(self, keys: Sequence[tuple[str, date]]) -> np.ndarray:
+        """Get rates by cargo type and date, NaN for missing ones."""
+
+        if not keys:
+            return np.empty(0)
+        cargo_types, dates = zip(*keys, strict=True)
+        return self._store.rates_at(self._store.positions_by_key(cargo_types, dates))
+
+    def effective_rates(self, keys: Sequence[tuple[str, date]]) -> np.ndarray:
+        """Get rates effective on dates for cargo types, NaN for missing ones."""
+
+        if not keys:
+            return np.empty(0)
+        cargo_types, dates = zip(*keys, strict=True)
+        return self._store.rates_at(self._store.effective_positions(cargo_types, dates))
+
+    def query(self, **filters: Any) -> list[RateRow]:
+        """Get all rates matching the given column values."""
+
+        return self._store.query(**filters)
@@ -3,6 +3,9 @@ from collections.abc import AsyncGenerator
 from redis.asyncio import Redis
 from starlette.requests import Request
 
+from insurance_calc.services.redis.rate_cache import RedisRateCache
+from insurance_calc.services.redis.rate_version import RateVersion
+
 
 async def get_redis_pool(
     request: Request,
@@ -24,3 +27,23 @@ async def get_redis_pool(
     :returns:  redis connection pool.
     """
     return request.app.state.redis_pool
+
+
+def get_rate_cache(request: Request) -> RedisRateCache | None:  # pragma: no cover
+    """
+    Returns redis-backed rate cache.
+
+    :param request: current request.
+    :returns: rate cache or None if it's disabled.
+    """
+    return request.app.state.rate_cache
+
+
+def get_rate_version(request: Request) -> RateVersion | None:  # pragma: no cover
+    """
+    Returns version of the insurance table.
+
+    :param request: current request.
+    :returns: rate version or None if redis isn't configured.
+    """
+    return request.app.state.rate_version
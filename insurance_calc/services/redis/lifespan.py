@@ -1,6 +1,8 @@
 from fastapi import FastAPI
-from redis.asyncio import ConnectionPool
+from redis.asyncio import ConnectionPool, Redis
 
+from insurance_calc.services.redis.rate_cache import RedisRateCache
+from insurance_calc.services.redis.rate_version import RateVersion
 from insurance_calc.settings import settings
 
 
@@ -13,6 +15,13 @@ def init_redis(app: FastAPI) -> None:  # pragma: no cover
     app.state.redis_pool = ConnectionPool.from_url(
         str(settings.redis_url),
     )
+    app.state.rate_version = RateVersion(Redis(connection_pool=app.state.redis_pool))
+    app.state.rate_cache = None
+    if settings.redis_rate_cache_enabled:
+        app.state.rate_cache = RedisRateCache(
+            Redis(connection_pool=app.state.redis_pool),
+            ttl=settings.redis_rate_cache_ttl,
+        )
 
 
 async def shutdown_redis(app: FastAPI) -> None:  # pragma: no cover
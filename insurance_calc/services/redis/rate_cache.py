@@ -0,0 +1,172 @@
+import logging
+from collections.abc import Iterable
+from datetime import date, datetime
+from typing import Any
+
+import orjson
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from insurance_calc.services.metrics.metrics import CACHE_REQUESTS
+from insurance_calc.services.rates.row import RateRow
+from insurance_calc.utils.spans import traced
+
+ROW_KEY = "insurance:row:{id}"
+ROW_PATTERN = "insurance:row:*"
+QUERY_KEY = "insurance:query"
+
+
+class RedisRateCache:
+    """
+    Read-through cache of insurance rows shared by all workers.
+
+    Rows are stored as compact JSON arrays under one key per ID.
+    Query results are stored as fields of a single hash, so a write
+    can drop all of them at once. They are keyed by the shared version
+    of the table they were read at, so a result read before a change
+    is never served after it. Redis errors are logged and treated
+    as cache misses, so Redis outages never fail a request.
+    """
+
+    def __init__(self, redis: Redis, ttl: int) -> None:
+        self.redis = redis
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._hit_counter = CACHE_REQUESTS.labels("redis_rates", "hit")
+        self._miss_counter = CACHE_REQUESTS.labels("redis_rates", "miss")
+
+    @staticmethod
+    def pack_row(row: RateRow) -> list[Any]:
+        """Pack a row to a list of its values."""
+
+        return [row.id, row.cargo_type, row.rate, row.date, row.created_date]
+
+    def dump_row(self, row: RateRow) -> bytes:
+        """Serialize a row to a compact JSON array."""
+
+        return orjson.dumps(self.pack_row(row))
+
+    @staticmethod
+    def load_row(data: bytes | list[Any]) -> RateRow:
+        """Deserialize a row from a JSON array."""
+
+        id, cargo_type, rate, day, created_date = (
+            orjson.loads(data) if isinstance(data, bytes) else data
+        )
+        return RateRow(
+            id,
+            cargo_type,
+            rate,
+            date.fromisoformat(day),
+            datetime.fromisoformat(created_date),
+        )
+
+    @staticmethod
+    def query_field(filters: dict[str, Any], version: int) -> bytes:
+        """Build a stable hash field for query filters at a table version."""
+
+        return orjson.dumps([version, filters], option=orjson.OPT_SORT_KEYS)
+
+    @traced("cache")
+    async def get_rows(self, ids: Iterable[int]) -> dict[int, RateRow]:
+        """Get cached rows by ID with a single round trip."""
+
+        ids = list(ids)
+        if not ids:
+            return {}
+
+        try:
+            values = await self.redis.mget([ROW_KEY.format(id=id) for id in ids])
+        except RedisError:
+            logging.exception("Failed to read rates from redis")
+            values = [None] * len(ids)
+
+        rows = {
+            id: self.load_row(value)
+            for id, value in zip(ids, values, strict=True)
+            if value
+        }
+        self.hits += len(rows)
+        self.misses += len(ids) - len(rows)
+        self._hit_counter.inc(len(rows))
+        self._miss_counter.inc(len(ids) - len(rows))
+
+        return rows
+
+    @traced("cache")
+    async def set_rows(self, rows: Iterable[RateRow]) -> None:
+        """Cache rows by ID in a single pipeline."""
+
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for row in rows:
+                    pipe.set(ROW_KEY.format(id=row.id), self.dump_row(row), ex=self.ttl)
+                await pipe.execute()
+        except RedisError:
+            logging.exception("Failed to write rates to redis")
+
+    @traced("cache")
+    async def get_query(
+        self, filters: dict[str, Any], version: int
+    ) -> list[RateRow] | None:
+        """Get a query result cached at a table version."""
+
+        try:
+            value = await self.redis.hget(QUERY_KEY, self.query_field(filters, version))
+        except RedisError:
+            logging.exception("Failed to read rates from redis")
+            value = None
+
+        if value is None:
+            self.misses += 1
+            self._miss_counter.inc()
+            return None
+
+        self.hits += 1
+        self._hit_counter.inc()
+        return [self.load_row(item) for item in orjson.loads(value)]
+
+    @traced("cache")
+    async def set_query(
+        self, filters: dict[str, Any], version: int, rows: list[RateRow]
+    ) -> None:
+        """Cache a query result read at a table version."""
+
+        value = orjson.dumps([self.pack_row(row) for row in rows])
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.hset(QUERY_KEY, self.query_field(filters, version), value)
+                pipe.expire(QUERY_KEY, self.ttl, nx=True)
+                await pipe.execute()
+        except RedisError:
+            logging.exception("Failed to write rates to redis")
+
+    @traced("cache")
+    async def invalidate(self, ids: Iterable[int] = ()) -> None:
+        """Drop cached rows for the given IDs and all cached queries."""
+
+        keys = [QUERY_KEY, *(ROW_KEY.format(id=id) for id in ids)]
+        try:
+            await self.redis.delete(*keys)
+        except RedisError:
+            logging.exception("Failed to invalidate rates in redis")
+
+    @traced("cache")
+    async def clear(self) -> None:
+        """Drop all cached rows and queries."""
+
+        try:
+            # Keys are collected before unlinking, so the scan
+            # doesn't depend on how its cursor copes with deletes
+            keys = [QUERY_KEY]
+            keys.extend(
+                [
+                    key
+                    async for key in self.redis.scan_iter(match=ROW_PATTERN, count=1000)
+                ]
+            )
+            for start in range(0, len(keys), 1000):
+                await self.redis.unlink(*keys[start : start + 1000])
+        except RedisError:
+            logging.exception("Failed to invalidate rates in redis")
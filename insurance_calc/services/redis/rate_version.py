@@ -0,0 +1,70 @@
+import logging
+import time
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from insurance_calc.utils.spans import traced
+
+VERSION_KEY = "insurance:version"
+DELETED_VERSION_KEY = "insurance:deleted_version"
+
+# The version never goes back, even if the clock of a worker does
+BUMP_SCRIPT = """
+local version = math.max(tonumber(ARGV[1]), tonumber(redis.call('GET', KEYS[1]) or 0) + 1)
+redis.call('SET', KEYS[1], version)
+if ARGV[2] == '1' then
+    redis.call('SET', KEYS[2], version)
+end
+return version
+"""
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+class RateVersion:
+    """
+    Version of the insurance table shared by all workers.
+
+    The version is the time of the last change in milliseconds,
+    so it keeps growing even if redis loses it. Redis errors
+    are logged and reported as an unknown version.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        self.redis = redis
+        self._bump = redis.register_script(BUMP_SCRIPT)
+
+    @traced("cache")
+    async def get(self) -> tuple[int, int] | None:
+        """Get the current version and the version of the last delete."""
+
+        try:
+            version, deleted_version = await self.redis.mget(
+                VERSION_KEY, DELETED_VERSION_KEY
+            )
+            if version is None:
+                # Unknown history, so treat it as a change that deleted rows
+                version = await self._bump(
+                    keys=[VERSION_KEY, DELETED_VERSION_KEY], args=[now_ms(), 1]
+                )
+                deleted_version = version
+        except RedisError:
+            logging.exception("Failed to read rate version from redis")
+            return None
+
+        return int(version), int(deleted_version or 0)
+
+    @traced("cache")
+    async def bump(self, deleted: bool = False) -> None:
+        """Move the version forward after a committed change."""
+
+        try:
+            await self._bump(
+                keys=[VERSION_KEY, DELETED_VERSION_KEY],
+                args=[now_ms(), int(deleted)],
+            )
+        except RedisError:
+            logging.exception("Failed to bump rate version in redis")
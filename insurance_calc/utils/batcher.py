@@ -0,0 +1,78 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+from insurance_calc.services.metrics.metrics import BATCH_SIZE
+from insurance_calc.utils.single_flight import retrieve_exception
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+BatchLoader = Callable[[list[K]], Awaitable[dict[K, V]]]
+
+
+class MicroBatcher(Generic[K, V]):
+    """
+    Collects concurrent lookups of a worker into batches.
+
+    The first lookup opens a batch, which is loaded with a single
+    call once the window passes or it holds ``max_size`` keys.
+    Every lookup then gets the value of its key, or None if it's
+    missing. Batches are loaded in their own tasks with the loader
+    of their first lookup, so a cancelled request doesn't fail
+    the others.
+    """
+
+    def __init__(self, window: float, max_size: int, name: str = "batcher"):
+        self.window = window
+        self.max_size = max_size
+        self._pending: dict[K, asyncio.Future] = {}
+        self._loader: BatchLoader | None = None
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+        self._batch_size = BATCH_SIZE.labels(name)
+
+    async def load(self, key: K, loader: BatchLoader) -> V | None:
+        """Get the value of a key with the next batch."""
+
+        loop = asyncio.get_running_loop()
+        if not self._pending:
+            self._loader = loader
+            self._timer = loop.call_later(self.window, self._dispatch)
+
+        future = self._pending.get(key)
+        if future is None:
+            future = self._pending[key] = loop.create_future()
+            future.add_done_callback(retrieve_exception)
+            if len(self._pending) >= self.max_size:
+                self._timer.cancel()
+                self._dispatch()
+
+        return await asyncio.shield(future)
+
+    def _dispatch(self) -> None:
+        pending, loader = self._pending, self._loader
+        self._pending, self._loader, self._timer = {}, None, None
+
+        task = asyncio.ensure_future(self._load(pending, loader))
+        # The loop keeps only weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _load(
+        self, pending: dict[K, asyncio.Future], loader: BatchLoader
+    ) -> None:
+        self._batch_size.observe(len(pending))
+        try:
+            values = await loader(list(pending))
+        except asyncio.CancelledError:
+            for future in pending.values():
+                future.cancel()
+            raise
+        except Exception as exc:
+            for future in pending.values():
+                future.set_exception(exc)
+            return
+
+        for key, future in pending.items():
+            future.set_result(values.get(key))
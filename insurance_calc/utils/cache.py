@@ -0,0 +1,73 @@
+import time
+from collections import OrderedDict
+from collections.abc import Hashable
+from typing import Any
+
+from insurance_calc.services.metrics.metrics import CACHE_REQUESTS
+
+
+class TTLCache:
+    """Bounded LRU cache with expiring entries."""
+
+    def __init__(self, maxsize: int, ttl: float, name: str = "ttl"):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.name = name
+        # Label children are bound on first use, metrics files of
+        # multiprocess mode can't be opened at import time
+        self._counters: dict[str, Any] = {}
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _count(self, result: str) -> None:
+        counter = self._counters.get(result)
+        if counter is None:
+            counter = self._counters[result] = CACHE_REQUESTS.labels(self.name, result)
+        counter.inc()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Get a live value and mark it as recently used."""
+
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            self._count("miss")
+            return None
+
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            self._count("miss")
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        self._count("hit")
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        """Store a value, evicting the least recently used one when full."""
+
+        if self.maxsize <= 0:
+            return
+
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Drop a value."""
+
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop all values."""
+
+        self._data.clear()
@@ -2,6 +2,6 @@ from pydantic import BaseModel
 
 
 def filter_payload(payload: BaseModel):
-    """Remove empty values from payload."""
+    """Remove unset values from payload."""
 
-    return {k: v for k, v in payload.dict().items() if v}
+    return payload.model_dump(exclude_none=True)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, TypeVar
+
+from insurance_calc.services.metrics.metrics import SINGLE_FLIGHT_LOOKUPS
+
+T = TypeVar("T")
+
+
+def retrieve_exception(future: asyncio.Future) -> None:
+    """Mark the exception of a finished lookup as retrieved."""
+
+    # Lookups awaited by nobody anymore must not warn about their exceptions
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical lookups of a worker.
+
+    The first lookup of a key runs in its own task and concurrent
+    ones await the same task, so a cancelled request doesn't fail
+    the others. While a lookup runs, the last result of its key
+    is served instead if it's younger than the stale TTL.
+    Invalidation drops the results and detaches running lookups,
+    so nothing read before a change is served after it.
+    """
+
+    def __init__(self, maxsize: int, stale_ttl: float, name: str = "single_flight"):
+        self.maxsize = maxsize
+        self.stale_ttl = stale_ttl
+        self.coalesced = 0
+        self.stale = 0
+        self._generation = 0
+        self._flights: dict[Hashable, asyncio.Task] = {}
+        self._results: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._counters = {
+            result: SINGLE_FLIGHT_LOOKUPS.labels(name, result)
+            for result in ("queried", "coalesced", "stale")
+        }
+
+    async def run(self, key: Hashable, fetch: Callable[[], Awaitable[T]]) -> T:
+        """Run a lookup, or share the running one for the key."""
+
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._fetch(key, fetch, self._generation))
+            flight.add_done_callback(retrieve_exception)
+            self._flights[key] = flight
+            self._counters["queried"].inc()
+        else:
+            result = self._results.get(key)
+            if result is not None and time.monotonic() - result[0] <= self.stale_ttl:
+                self.stale += 1
+                self._counters["stale"].inc()
+                return result[1]
+            self.coalesced += 1
+            self._counters["coalesced"].inc()
+
+        return await asyncio.shield(flight)
+
+    async def _fetch(
+        self, key: Hashable, fetch: Callable[[], Awaitable[T]], generation: int
+    ) -> T:
+        try:
+            value = await fetch()
+        finally:
+            if self._flights.get(key) is asyncio.current_task():
+                del self._flights[key]
+
+        if generation == self._generation and self.maxsize > 0:
+            self._results[key] = (time.monotonic(), value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+        return value
+
+    def invalidate(self) -> None:
+        """Drop results and stop sharing lookups started before a change."""
+
+        self._generation += 1
+        self._flights.clear()
+        self._results.clear()
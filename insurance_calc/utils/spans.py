@@ -0,0 +1,65 @@
+import functools
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+T = TypeVar("T")
+
+
+class Spans:
+    """Number of calls and time spent in each phase of a request."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, list[float]] = {}
+
+    def add(self, name: str, seconds: float) -> None:
+        phase = self.phases.setdefault(name, [0, 0.0])
+        phase[0] += 1
+        phase[1] += seconds
+
+
+# Spans of the request being profiled, shared with the tasks it starts
+current_spans: ContextVar[Spans | None] = ContextVar("current_spans", default=None)
+
+
+def add_span(name: str, seconds: float) -> None:
+    """Add time spent in a phase to the profiled request, if any."""
+
+    spans = current_spans.get()
+    if spans is not None:
+        spans.add(name, seconds)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    """Time a block as a phase of the profiled request, if any."""
+
+    spans = current_spans.get()
+    if spans is None:
+        yield
+        return
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        spans.add(name, time.perf_counter() - start)
+
+
+def traced(
+    name: str,
+) -> Callable[[Callable[P, Awaitable[T]]], Callable[P, Awaitable[T]]]:
+    """Time every call of a coroutine function as a phase."""
+
+    def decorator(func: Callable[P, Awaitable[T]]) -> Callable[P, Awaitable[T]]:
+        @functools.wraps(func)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> T:
+            with span(name):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
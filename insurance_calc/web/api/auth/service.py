@@ -1,23 +1,76 @@
 import asyncio
+import time
+from dataclasses import dataclass
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
-from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import event, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from insurance_calc.db.dependencies import get_db_session
 from insurance_calc.db.models.user import Role, User
+from insurance_calc.services.passwords.dependency import get_password_hasher
+from insurance_calc.services.passwords.hasher import (
+    PasswordHasher,
+    PasswordHasherBusyError,
+    hash_password,
+    verify_password,
+)
 from insurance_calc.settings import settings
+from insurance_calc.utils.cache import TTLCache
 from insurance_calc.web.api.base import BaseService
 
 reusable_oauth2 = OAuth2PasswordBearer(tokenUrl="/api/login/access-token")
 
+# Verified token claims by token and current users by ID
+token_cache = TTLCache(settings.auth_cache_size, settings.auth_cache_ttl, "auth_token")
+user_cache = TTLCache(settings.auth_cache_size, settings.auth_cache_ttl, "auth_user")
+
+
+@dataclass(frozen=True, slots=True)
+class CurrentUser:
+    """Snapshot of an authenticated user and its role."""
+
+    id: int
+    username: str
+    role: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "CurrentUser":
+        return cls(user.id, user.username, user.role.name, user.is_active)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(_mapper, _connection, user: User) -> None:
+    """Drop a changed or deleted user from the cache."""
+
+    user_cache.pop(user.id)
+
 
 class UserService(BaseService):
     """Service class for managing users and roles."""
 
+    def __init__(self, session: AsyncSession, hasher: PasswordHasher | None = None):
+        super().__init__(session)
+        self.hasher = hasher
+
+    async def _hash_password(self, password: str) -> str:
+        """Hash a password in the pool, or in a thread outside the app"""
+
+        if self.hasher:
+            return await self.hasher.hash(password)
+        return await asyncio.to_thread(hash_password, password)
+
+    async def _verify_password(self, password: str, password_hash: str) -> bool:
+        """Verify a password in the pool, or in a thread outside the app"""
+
+        if self.hasher:
+            return await self.hasher.verify(password, password_hash)
+        return await asyncio.to_thread(verify_password, password, password_hash)
+
     async def get_role_by_name(self, name: str) -> Role:
         """Retrieve a role by role name."""
 
@@ -57,9 +110,7 @@ class UserService(BaseService):
         """Create a new user."""
 
         role: Role = await self.get_role_by_name(role)
-        password_hash = await asyncio.to_thread(
-            CryptContext(schemes=["bcrypt"], deprecated="auto").hash, password
-        )
+        password_hash = await self._hash_password(password)
         user: User = User(
             username=username,
             password_hash=password_hash,
@@ -74,14 +125,16 @@ class UserService(BaseService):
         return user
 
     async def authenticate(self, username: str, password: str) -> User | None:
+        # Reject before touching the database when the login queue is full
+        if self.hasher and self.hasher.busy:
+            raise PasswordHasherBusyError("Password hashing queue is full")
+
         user: User | None = await self.get_user_by_username(username)
         if not user:
             return
-        password_verified = await asyncio.to_thread(
-            CryptContext(schemes=["bcrypt"], deprecated="auto").verify,
-            password,
-            user.password_hash,
-        )
+        # Give the connection back to the pool while the password is checked
+        await self.session.commit()
+        password_verified = await self._verify_password(password, user.password_hash)
         if not password_verified:
             return
         return user
@@ -89,24 +142,55 @@ class UserService(BaseService):
 
 async def get_user_service(
     session: AsyncSession = Depends(get_db_session),
+    hasher: PasswordHasher = Depends(get_password_hasher),
 ) -> UserService:
     """Get the user service."""
 
-    return UserService(session)
+    return UserService(session, hasher)
 
 
 async def get_current_user(
     token: str = Depends(reusable_oauth2),
     user_service: UserService = Depends(get_user_service),
-) -> User:
-    try:
-        payload = jwt.decode(
-            token, settings.secret_key, algorithms=[settings.algorithm]
-        )
-    except JWTError:
+) -> CurrentUser:
+    payload = token_cache.get(token) if settings.auth_cache_enabled else None
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token, settings.secret_key, algorithms=[settings.algorithm]
+            )
+        except JWTError:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+        if settings.auth_cache_enabled:
+            # A cached token must not outlive its expiration
+            token_cache.set(token, payload, ttl=payload["exp"] - time.time())
+
+    user_id = int(payload["sub"])
+    current_user = user_cache.get(user_id) if settings.auth_cache_enabled else None
+    if current_user is None:
+        user: User | None = await user_service.get_user(user_id)
+        if user is None:
+            # The token outlived its user
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Could not validate credentials",
+            )
+        current_user = CurrentUser.from_user(user)
+        if settings.auth_cache_enabled:
+            user_cache.set(user_id, current_user)
+
+    return current_user
+
+
+async def get_current_admin(
+    user: CurrentUser = Depends(get_current_user),
+) -> CurrentUser:
+    if not user.is_active or user.role != "Admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Could not validate credentials",
+            detail="Admin privileges required",
         )
-    user: User = await user_service.get_user(int(payload["sub"]))
     return user
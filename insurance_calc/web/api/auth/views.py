@@ -3,6 +3,7 @@ from http import HTTPStatus
 from fastapi import APIRouter, Body, Depends, HTTPException
 
 from insurance_calc.db.models.user import User
+from insurance_calc.services.passwords.hasher import PasswordHasherBusyError
 from insurance_calc.utils.auth import obtain_token
 from insurance_calc.web.api.auth import schema
 from insurance_calc.web.api.auth.service import UserService, get_user_service
@@ -19,9 +20,16 @@ async def login_access_token(
     OAuth2 compatible token login, get an access token for future requests
     """
 
-    user: User | None = await user_service.authenticate(
-        username=payload.username, password=payload.password
-    )
+    try:
+        user: User | None = await user_service.authenticate(
+            username=payload.username, password=payload.password
+        )
+    except PasswordHasherBusyError:
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": "1"},
+        )
 
     if not user:
         raise HTTPException(
@@ -0,0 +1,113 @@
+import csv
+import datetime
+import enum
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import Any
+
+import orjson
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
+
+
+class ImportFormat(str, enum.Enum):
+    """Supported formats of rate files."""
+
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ImportRateRow(BaseModel):
+    """
+    ImportRateRow class to represent a single row of a rate file.
+    """
+
+    cargo_type: str = Field(max_length=64)
+    date: datetime.date
+    rate: float
+
+
+ImportRateRows = TypeAdapter(list[ImportRateRow])
+
+
+class RateImportError(ValueError):
+    """Raised when a rate file can't be parsed or validated."""
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[bytes]:
+    """
+    Split a stream of bytes into lines.
+
+    Only the current incomplete line is kept in memory.
+
+    :param chunks: stream of bytes.
+    :yield: non-empty lines.
+    """
+    tail = b""
+    async for chunk in chunks:
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for line in lines:
+            if line.strip():
+                yield line
+    if tail.strip():
+        yield tail
+
+
+async def iter_records(
+    chunks: AsyncIterable[bytes], format: ImportFormat
+) -> AsyncIterator[dict[str, Any]]:
+    """
+    Parse a stream of NDJSON lines or CSV rows with a header.
+
+    :param chunks: stream of bytes.
+    :param format: format of the stream.
+    :yield: raw records.
+    """
+    header: list[str] | None = None
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        try:
+            if format == ImportFormat.NDJSON:
+                yield orjson.loads(line)
+                continue
+
+            values = next(csv.reader([line.decode().rstrip("\r")]))
+            if header is None:
+                header = values
+            else:
+                yield dict(zip(header, values, strict=True))
+        except (ValueError, UnicodeDecodeError) as err:
+            raise RateImportError(f"Line {number}: {err}") from err
+
+
+async def iter_validated_chunks(
+    chunks: AsyncIterable[bytes], format: ImportFormat, chunk_size: int
+) -> AsyncIterator[list[ImportRateRow]]:
+    """
+    Parse and validate a rate file in fixed-size chunks.
+
+    :param chunks: stream of bytes.
+    :param format: format of the stream.
+    :param chunk_size: number of rows in one chunk.
+    :yield: validated rows.
+    """
+    imported = 0
+    records: list[dict[str, Any]] = []
+
+    def validate() -> list[ImportRateRow]:
+        try:
+            return ImportRateRows.validate_python(records)
+        except ValidationError as err:
+            error = err.errors()[0]
+            row = imported + int(error["loc"][0]) + 1
+            raise RateImportError(f"Row {row}: {error['msg']}") from err
+
+    async for record in iter_records(chunks, format):
+        records.append(record)
+        if len(records) >= chunk_size:
+            yield validate()
+            imported += len(records)
+            records = []
+
+    if records:
+        yield validate()
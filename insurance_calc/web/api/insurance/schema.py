@@ -1,6 +1,7 @@
-from datetime import datetime
+import datetime
+import enum
 
-from pydantic import BaseModel, ConfigDict, RootModel
+from pydantic import BaseModel, ConfigDict, Field, RootModel
 
 
 class QueryInsurancePayload(BaseModel):
@@ -11,7 +12,36 @@ class QueryInsurancePayload(BaseModel):
     id: int = None
     cargo_type: str = None
     rate: float = None
-    date: str = None
+    date: datetime.date = None
+
+
+class QueryOrder(str, enum.Enum):
+    """
+    Possible keys to page and export insurance by.
+    """
+
+    ID = "id"
+    CARGO_TYPE_DATE = "cargo_type_date"
+
+
+class PageInsurancePayload(QueryInsurancePayload):
+    """
+    PageInsurancePayload class to represent a keyset paginated query.
+
+    ``cursor`` is the ``next_cursor`` of the previous page.
+    """
+
+    order: QueryOrder = QueryOrder.ID
+    limit: int = Field(default=100, gt=0, le=1000)
+    cursor: str | None = None
+
+
+class ExportInsurancePayload(QueryInsurancePayload):
+    """
+    ExportInsurancePayload class to represent a streamed NDJSON export.
+    """
+
+    order: QueryOrder = QueryOrder.ID
 
 
 class UpdateInsurancePayload(BaseModel):
@@ -28,7 +58,15 @@ class RateItem(BaseModel):
     rate: float
 
 
-UploadInsurancePayload = RootModel[dict[str, list[RateItem]]]
+UploadInsurancePayload = RootModel[dict[datetime.date, list[RateItem]]]
+
+
+class ImportResult(BaseModel):
+    """
+    ImportResult class to represent a result of a rate file import.
+    """
+
+    rows: int
 
 
 class Calculation(BaseModel):
@@ -56,6 +94,68 @@ class CalculationPayload(BaseModel):
     price: float
 
 
+class EffectiveCalculationPayload(BaseModel):
+    """
+    EffectiveCalculationPayload class to represent a calculation payload
+    using the rate effective on a date.
+    """
+
+    cargo_type: str
+    date: datetime.date
+    price: float
+
+
+class CalculationMode(str, enum.Enum):
+    """
+    Possible ways to resolve a rate by cargo type and date.
+
+    ``exact`` uses the rate set for that date, ``effective`` uses
+    the latest rate set on or before that date.
+    """
+
+    EXACT = "exact"
+    EFFECTIVE = "effective"
+
+
+class BatchCalculationItem(BaseModel):
+    """
+    BatchCalculationItem class to represent a single line of a batch calculation.
+
+    A rate is referenced either by ``id`` or by ``cargo_type`` and ``date``.
+    """
+
+    id: int | None = None
+    cargo_type: str | None = None
+    date: str | None = None
+    price: float
+
+
+class BatchCalculationPayload(BaseModel):
+    """
+    BatchCalculationPayload class to represent a batch calculation payload.
+    """
+
+    items: list[BatchCalculationItem]
+    mode: CalculationMode = CalculationMode.EXACT
+
+
+class BatchCalculationResult(BaseModel):
+    """
+    BatchCalculationResult class to represent a result of a single batch line.
+    """
+
+    total: float | None = None
+    error: str | None = None
+
+
+class BatchCalculation(BaseModel):
+    """
+    BatchCalculation class to represent a batch calculation in input order.
+    """
+
+    results: list[BatchCalculationResult]
+
+
 class InsuranceDTO(BaseModel):
     """
     Insurance class to represent a rate.
@@ -64,7 +164,18 @@ class InsuranceDTO(BaseModel):
     id: int
     cargo_type: str
     rate: float
-    date: str
-    created_date: datetime
+    date: datetime.date
+    created_date: datetime.datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class InsurancePage(BaseModel):
+    """
+    InsurancePage class to represent a page of rates.
+
+    ``next_cursor`` is empty on the last page.
+    """
+
+    items: list[InsuranceDTO]
+    next_cursor: str | None = None
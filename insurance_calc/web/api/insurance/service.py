@@ -1,103 +1,811 @@
+import base64
+import binascii
+import datetime
+import functools
+import logging
+import math
+import time
+from collections.abc import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+)
+from typing import Any, TypeVar
+
+import numpy as np
+import orjson
 from fastapi import Depends
-from sqlalchemy import delete, select
+from sqlalchemy import (
+    Select,
+    any_,
+    bindparam,
+    delete,
+    func,
+    literal_column,
+    or_,
+    select,
+    text,
+    true,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.types import Date, Integer, String
 
-from insurance_calc.db.dependencies import get_db_session
+from insurance_calc.db.dependencies import (
+    get_db_primary_read_session,
+    get_db_read_session,
+    get_db_session,
+)
 from insurance_calc.db.models.insurance import Insurance
+from insurance_calc.services.kafka.outbox import add_events
+from insurance_calc.services.kafka.publisher import EventType
+from insurance_calc.services.rates.dependency import (
+    get_rate_batcher,
+    get_rate_flights,
+    get_rate_table,
+)
+from insurance_calc.services.rates.row import RATE_COLUMNS, RateRow
+from insurance_calc.services.rates.table import RateTable
+from insurance_calc.services.redis.dependency import get_rate_cache, get_rate_version
+from insurance_calc.services.redis.rate_cache import RedisRateCache
+from insurance_calc.services.redis.rate_version import RateVersion
+from insurance_calc.settings import settings
+from insurance_calc.utils.batcher import MicroBatcher
 from insurance_calc.utils.common import filter_payload
+from insurance_calc.utils.single_flight import SingleFlight
 from insurance_calc.web.api.base import BaseService
+from insurance_calc.web.api.insurance.importer import ImportRateRow
 from insurance_calc.web.api.insurance.schema import (
+    BatchCalculationPayload,
+    BatchCalculationResult,
+    CalculationMode,
     CalculationPayload,
     DeleteInsurancePayload,
+    EffectiveCalculationPayload,
+    ExportInsurancePayload,
+    PageInsurancePayload,
     QueryInsurancePayload,
+    QueryOrder,
     UpdateInsurancePayload,
     UploadInsurancePayload,
 )
 
+T = TypeVar("T")
+
+# Largest ID of the 32 bit integer primary key
+MAX_ID = 2**31 - 1
+
+
+def _query_filters(payload: QueryInsurancePayload) -> dict[str, Any]:
+    """Column filters of a payload, in field order"""
+
+    return {
+        k: v
+        for k, v in filter_payload(payload).items()
+        if k in QueryInsurancePayload.model_fields
+    }
+
+
+def _matches_nothing(filters: dict[str, Any]) -> bool:
+    """Whether filters ask for an ID no row can have, which can't be bound either"""
+
+    return "id" in filters and not 0 < filters["id"] <= MAX_ID
+
+
+# Statements are built once and reused, so SQLAlchemy only has to look
+# up their compiled form instead of building and hashing them per request
+@functools.cache
+def _rate_query(
+    columns: tuple[str, ...],
+    order: QueryOrder | None = None,
+    after: bool = False,
+    limit: bool = False,
+    changed: bool = False,
+) -> Select:
+    """Rate query filtered on columns, with values bound at execution"""
+
+    query = select(*RATE_COLUMNS).where(
+        *(getattr(Insurance, name) == bindparam(name) for name in columns)
+    )
+    if changed:
+        query = query.where(Insurance.modified_date > bindparam("changed_after"))
+
+    if order == QueryOrder.ID:
+        if after:
+            query = query.where(Insurance.id > bindparam("after_id"))
+        query = query.order_by(Insurance.id)
+    elif order == QueryOrder.CARGO_TYPE_DATE:
+        if after:
+            query = query.where(
+                tuple_(Insurance.cargo_type, Insurance.date)
+                > tuple_(bindparam("after_cargo_type"), bindparam("after_date"))
+            )
+        query = query.order_by(Insurance.cargo_type, Insurance.date)
+
+    if limit:
+        query = query.limit(bindparam("limit", type_=Integer))
+    return query
+
+
+@functools.cache
+def _rate_lookup_query(by_id: bool, by_key: bool) -> Select:
+    """Rate query by ID and by cargo type and date arrays"""
+
+    conditions = []
+    if by_id:
+        # Arrays are bound as a single parameter, so the statement size
+        # doesn't depend on the batch size
+        conditions.append(Insurance.id == any_(bindparam("ids", type_=ARRAY(Integer))))
+    if by_key:
+        conditions.append(
+            tuple_(Insurance.cargo_type, Insurance.date).in_(
+                select(
+                    func.unnest(bindparam("cargo_types", type_=ARRAY(String))),
+                    func.unnest(bindparam("dates", type_=ARRAY(Date))),
+                )
+            )
+        )
+
+    return select(
+        Insurance.id, Insurance.cargo_type, Insurance.date, Insurance.rate
+    ).where(or_(*conditions))
+
+
+RATE_BATCH_QUERY = select(*RATE_COLUMNS).where(
+    Insurance.id == any_(bindparam("ids", type_=ARRAY(Integer)))
+)
+
+_EFFECTIVE_KEYS = select(
+    func.unnest(bindparam("cargo_types", type_=ARRAY(String))).label("cargo_type"),
+    func.unnest(bindparam("dates", type_=ARRAY(Date))).label("date"),
+).subquery("keys")
+# The latest rate of every key is read backwards from the cargo type
+# and date index, so the cost doesn't depend on the rate history
+_EFFECTIVE_RATE = (
+    select(Insurance.rate)
+    .where(
+        Insurance.cargo_type == _EFFECTIVE_KEYS.c.cargo_type,
+        Insurance.date <= _EFFECTIVE_KEYS.c.date,
+    )
+    .order_by(Insurance.date.desc())
+    .limit(1)
+    .lateral("effective")
+)
+EFFECTIVE_RATE_QUERY = select(
+    _EFFECTIVE_KEYS.c.cargo_type, _EFFECTIVE_KEYS.c.date, _EFFECTIVE_RATE.c.rate
+).select_from(_EFFECTIVE_KEYS.join(_EFFECTIVE_RATE, true()))
+
+
+def _found_rates(keys: list[Any], rates: np.ndarray) -> dict[Any, float]:
+    """Rates of keys that were found, NaN marks missing ones"""
+
+    return {
+        key: rate
+        for key, rate in zip(keys, rates.tolist(), strict=True)
+        if not math.isnan(rate)
+    }
+
 
 class InsuranceService(BaseService):
     """Service class for handling insurance-related operations"""
 
-    async def query_insurance(self, payload: QueryInsurancePayload) -> list[Insurance]:
-        """Query insurance based on payload"""
+    def __init__(
+        self,
+        session: AsyncSession,
+        rate_table: RateTable | None = None,
+        rate_cache: RedisRateCache | None = None,
+        rate_version: RateVersion | None = None,
+        rate_flights: SingleFlight | None = None,
+        rate_batcher: MicroBatcher[int, RateRow] | None = None,
+        primary_session: AsyncSession | None = None,
+    ):
+        super().__init__(session)
+        # Reads that must include every committed change skip the replica
+        self.primary_session = primary_session or session
+        self.rate_table = rate_table
+        self.rate_cache = rate_cache
+        self.rate_version = rate_version
+        self.rate_flights = rate_flights
+        self.rate_batcher = rate_batcher
+
+    async def _invalidate_rates(
+        self, *ids: int, deleted: bool = False, clear: bool = False
+    ) -> None:
+        """Invalidate cached rates after a committed mutation, or all of them"""
 
-        query = select(Insurance).filter_by(**filter_payload(payload))
-        insurance_list = await self.session.execute(query)
-        insurance_list: list[Insurance] = insurance_list.scalars().all()
+        if self.rate_table:
+            self.rate_table.bump()
+        if self.rate_flights:
+            self.rate_flights.invalidate()
+        if self.rate_cache:
+            if clear:
+                await self.rate_cache.clear()
+            else:
+                await self.rate_cache.invalidate(ids)
+        if self.rate_version:
+            await self.rate_version.bump(deleted)
+
+    def _detached_session(self) -> AsyncSession:
+        """Session for lookups shared with other requests, which may outlive this one"""
+
+        return AsyncSession(self.session.bind)
+
+    async def _shared_lookup(
+        self, key: tuple, lookup: Callable[[AsyncSession], Awaitable[T]]
+    ) -> T:
+        """Run a lookup, shared with identical concurrent lookups of the worker"""
+
+        if not self.rate_flights:
+            return await lookup(self.session)
+
+        async def detached_lookup() -> T:
+            async with self._detached_session() as session:
+                return await lookup(session)
+
+        return await self.rate_flights.run(key, detached_lookup)
+
+    async def query_insurance(
+        self, payload: QueryInsurancePayload, version: int | None = None
+    ) -> list[RateRow]:
+        """Query insurance based on payload, up to date with a table version"""
+
+        filters = _query_filters(payload)
+        if _matches_nothing(filters):
+            return []
+
+        if self.rate_table:
+            await self.rate_table.refresh(version or 0)
+            if version is None or self.rate_table.covers(version):
+                return self.rate_table.query(**filters)
+
+        if version is None:
+            # Without a version there is nothing to key cached results by
+            return await self._query_rows(self.session, filters)
+
+        if self.rate_cache:
+            insurance_list = await self.rate_cache.get_query(filters, version)
+            if insurance_list is not None:
+                return insurance_list
+
+        # Rows read from the primary after the version was read include
+        # every change up to it, a replica may lag behind it
+        insurance_list = await self._query_rows(self.primary_session, filters)
+
+        if self.rate_cache:
+            await self.rate_cache.set_query(filters, version, insurance_list)
 
         return insurance_list
 
-    async def get_insurance(self, id: int) -> Insurance | None:
+    @staticmethod
+    async def _query_rows(
+        session: AsyncSession, filters: dict[str, Any]
+    ) -> list[RateRow]:
+        """Query insurance from the database"""
+
+        insurance_list = await session.execute(_rate_query(tuple(filters)), filters)
+        return [RateRow(*row) for row in insurance_list]
+
+    @staticmethod
+    def _encode_cursor(row: RateRow, order: QueryOrder) -> str:
+        """Encode the keyset of the last row on a page"""
+
+        if order == QueryOrder.ID:
+            key = [order, row.id]
+        else:
+            key = [order, row.cargo_type, row.date]
+        return base64.urlsafe_b64encode(orjson.dumps(key)).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str, order: QueryOrder) -> list[Any]:
+        """Decode a keyset cursor made for the same order"""
+
+        try:
+            key = orjson.loads(base64.urlsafe_b64decode(cursor))
+        except (binascii.Error, orjson.JSONDecodeError):
+            raise ValueError("Invalid cursor")
+        if not isinstance(key, list) or not key or key[0] != order:
+            raise ValueError("Invalid cursor")
+
+        # Values are bound to the query, so they must have the column types
+        if order == QueryOrder.ID and len(key) == 2:
+            id = key[1]
+            if type(id) is int and 0 <= id <= MAX_ID:
+                return [id]
+        if (
+            order == QueryOrder.CARGO_TYPE_DATE
+            and len(key) == 3
+            and isinstance(key[1], str)
+        ):
+            try:
+                return [key[1], datetime.date.fromisoformat(key[2])]
+            except (TypeError, ValueError):
+                raise ValueError("Invalid cursor")
+        raise ValueError("Invalid cursor")
+
+    async def query_insurance_page(
+        self, payload: PageInsurancePayload
+    ) -> tuple[list[RateRow], str | None]:
+        """Query a page of insurance after a keyset cursor"""
+
+        filters = _query_filters(payload)
+        # One extra row tells whether there is a next page
+        params = {**filters, "limit": payload.limit + 1}
+        if payload.cursor:
+            key = self._decode_cursor(payload.cursor, payload.order)
+            if payload.order == QueryOrder.ID:
+                params["after_id"] = key[0]
+            else:
+                params["after_cargo_type"], params["after_date"] = key
+        if _matches_nothing(filters):
+            return [], None
+
+        query = _rate_query(
+            tuple(filters), payload.order, after=bool(payload.cursor), limit=True
+        )
+        insurance_list = await self.session.execute(query, params)
+        insurance_list: list[RateRow] = [RateRow(*row) for row in insurance_list]
+
+        if len(insurance_list) <= payload.limit:
+            return insurance_list, None
+
+        insurance_list = insurance_list[: payload.limit]
+        return insurance_list, self._encode_cursor(insurance_list[-1], payload.order)
+
+    async def export_insurance(
+        self, payload: ExportInsurancePayload
+    ) -> AsyncIterator[bytes]:
+        """Stream insurance as NDJSON from a server-side cursor"""
+
+        filters = _query_filters(payload)
+        if _matches_nothing(filters):
+            return
+
+        # Server-side cursors need a transaction, a read-only snapshot
+        # keeps the export consistent while it's streamed
+        await self.session.connection(
+            execution_options={
+                "isolation_level": "REPEATABLE READ",
+                "postgresql_readonly": True,
+            }
+        )
+        result = await self.session.stream(
+            _rate_query(tuple(filters), payload.order),
+            filters,
+            execution_options={"yield_per": settings.insurance_export_chunk_size},
+        )
+        async for partition in result.partitions():
+            yield b"".join(
+                orjson.dumps(RateRow(*row), option=orjson.OPT_APPEND_NEWLINE)
+                for row in partition
+            )
+
+    async def query_insurance_delta(
+        self, payload: QueryInsurancePayload, since: int
+    ) -> list[RateRow]:
+        """Query insurance changed after a table version"""
+
+        # Rows are stamped before their transaction commits, so a row
+        # committed after the version may carry an older modified date
+        changed_after = datetime.datetime.fromtimestamp(
+            since / 1000
+        ) - datetime.timedelta(seconds=settings.insurance_delta_overlap)
+        filters = _query_filters(payload)
+        if _matches_nothing(filters):
+            return []
+
+        # A replica lagging behind would drop the latest changes for good
+        insurance_list = await self.primary_session.execute(
+            _rate_query(tuple(filters), changed=True),
+            {**filters, "changed_after": changed_after},
+        )
+
+        return [RateRow(*row) for row in insurance_list]
+
+    async def get_insurance(self, id: int) -> RateRow:
         """Get insurance for a given cargo type and date"""
 
-        query = select(Insurance).where(Insurance.id == id)
+        return await self._shared_lookup(
+            ("get", id), lambda session: self._get_insurance(session, id)
+        )
+
+    async def _get_insurance(self, session: AsyncSession, id: int) -> RateRow:
+        """Get insurance by ID through the cache"""
+
+        if self.rate_batcher:
+            insurance = await self.rate_batcher.load(id, self._load_rates)
+            if insurance is None:
+                raise ValueError("Insurance not found")
+            return insurance
 
-        insurance = await self.session.execute(query)
-        insurance: Insurance = insurance.scalar_one_or_none()
+        if self.rate_cache:
+            cached = await self.rate_cache.get_rows([id])
+            if id in cached:
+                return cached[id]
+
+        insurance = await session.execute(_rate_query(("id",)), {"id": id})
+        insurance = insurance.one_or_none()
 
         if not insurance:
             raise ValueError("Insurance not found")
 
+        insurance = RateRow(*insurance)
+        if self.rate_cache:
+            await self.rate_cache.set_rows([insurance])
+
         return insurance
 
+    async def _load_rates(self, ids: list[int]) -> dict[int, RateRow]:
+        """Load a batch of insurance by ID through the cache with one query"""
+
+        rows = await self.rate_cache.get_rows(ids) if self.rate_cache else {}
+        missing = [id for id in ids if id not in rows]
+        if not missing:
+            return rows
+
+        async with self._detached_session() as session:
+            result = await session.execute(RATE_BATCH_QUERY, {"ids": missing})
+            loaded = [RateRow(*row) for row in result]
+
+        if self.rate_cache and loaded:
+            await self.rate_cache.set_rows(loaded)
+        rows.update((row.id, row) for row in loaded)
+        return rows
+
     async def calculate_insurance(self, payload: CalculationPayload) -> float:
         """Calculate insurance based on cargo type and date"""
 
-        insurance: Insurance = await self.get_insurance(payload.id)
+        if not 0 < payload.id <= MAX_ID:
+            raise ValueError("Insurance not found")
+
+        if self.rate_table:
+            await self.rate_table.refresh()
+            insurance = self.rate_table.get(payload.id)
+            if not insurance:
+                raise ValueError("Insurance not found")
+            return payload.price * insurance.rate
+
+        insurance: RateRow = await self.get_insurance(payload.id)
 
         return payload.price * insurance.rate
 
-    async def update_insurance(self, payload: UpdateInsurancePayload) -> Insurance:
+    async def get_rates(
+        self, ids: set[int], keys: set[tuple[str, datetime.date]]
+    ) -> tuple[dict[int, float], dict[tuple[str, datetime.date], float]]:
+        """Get rates by ID and by cargo type and date in a single query"""
+
+        rates_by_id: dict[int, float] = {}
+        rates_by_key: dict[tuple[str, datetime.date], float] = {}
+
+        if self.rate_table:
+            await self.rate_table.refresh()
+            id_list, key_list = list(ids), list(keys)
+            return (
+                _found_rates(id_list, self.rate_table.rates_by_id(id_list)),
+                _found_rates(key_list, self.rate_table.rates_by_key(key_list)),
+            )
+
+        if not ids and not keys:
+            return rates_by_id, rates_by_key
+
+        params: dict[str, list[Any]] = {}
+        if ids:
+            params["ids"] = list(ids)
+        if keys:
+            cargo_types, dates = zip(*keys, strict=True)
+            params["cargo_types"] = list(cargo_types)
+            params["dates"] = list(dates)
+
+        query = _rate_lookup_query(bool(ids), bool(keys))
+        for id, cargo_type, date, rate in await self.session.execute(query, params):
+            rates_by_id[id] = rate
+            rates_by_key[(cargo_type, date)] = rate
+
+        return rates_by_id, rates_by_key
+
+    async def get_effective_rates(
+        self, keys: set[tuple[str, datetime.date]]
+    ) -> dict[tuple[str, datetime.date], float]:
+        """Get rates effective on given dates for given cargo types"""
+
+        if not keys:
+            return {}
+
+        if self.rate_table:
+            await self.rate_table.refresh()
+            key_list = list(keys)
+            return _found_rates(key_list, self.rate_table.effective_rates(key_list))
+
+        cargo_types, dates = zip(*keys, strict=True)
+        result = await self.session.execute(
+            EFFECTIVE_RATE_QUERY,
+            {"cargo_types": list(cargo_types), "dates": list(dates)},
+        )
+
+        return {(cargo_type, date): rate for cargo_type, date, rate in result}
+
+    async def calculate_insurance_effective(
+        self, payload: EffectiveCalculationPayload
+    ) -> float:
+        """Calculate insurance using the rate effective on a date"""
+
+        key = (payload.cargo_type, payload.date)
+        rates = await self.get_effective_rates({key})
+
+        if key not in rates:
+            raise ValueError("Insurance not found")
+
+        return payload.price * rates[key]
+
+    async def calculate_insurance_batch(
+        self, payload: BatchCalculationPayload
+    ) -> list[BatchCalculationResult]:
+        """Calculate insurance for many items, keeping the input order"""
+
+        items = payload.items
+        effective = payload.mode == CalculationMode.EFFECTIVE
+
+        errors: list[str | None] = []
+        keys: list[tuple | None] = []
+        for item in items:
+            error = key = None
+            if item.id is not None:
+                pass
+            elif not (item.cargo_type and item.date):
+                error = "Either id or cargo_type and date must be provided"
+            else:
+                try:
+                    key = (item.cargo_type, datetime.date.fromisoformat(item.date))
+                except ValueError:
+                    error = "Invalid date"
+            errors.append(error)
+            keys.append(key)
+
+        # IDs out of the column range can't match a rate, nor be bound
+        ids = {
+            item.id for item in items if item.id is not None and 0 < item.id <= MAX_ID
+        }
+        key_set = {key for key in keys if key}
+        if effective:
+            rates_by_id, _ = await self.get_rates(ids, set())
+            rates_by_key = await self.get_effective_rates(key_set)
+        else:
+            rates_by_id, rates_by_key = await self.get_rates(ids, key_set)
+
+        rates = np.fromiter(
+            (
+                rates_by_id.get(item.id, np.nan)
+                if item.id is not None
+                else rates_by_key.get(key, np.nan)
+                for item, key in zip(items, keys, strict=True)
+            ),
+            dtype=np.float64,
+            count=len(items),
+        )
+        prices = np.fromiter(
+            (item.price for item in items), dtype=np.float64, count=len(items)
+        )
+        totals = prices * rates
+
+        results: list[BatchCalculationResult] = []
+        for error, total in zip(errors, totals.tolist(), strict=True):
+            if error:
+                results.append(BatchCalculationResult(error=error))
+            elif math.isnan(total):  # NaN marks a missing rate
+                results.append(BatchCalculationResult(error="Insurance not found"))
+            else:
+                results.append(BatchCalculationResult(total=total))
+
+        return results
+
+    async def update_insurance(
+        self, payload: UpdateInsurancePayload, user_id: int | None = None
+    ) -> Insurance:
         """Update insurance for a given cargo type and date"""
 
-        insurance = await self.get_insurance(payload.id)
+        insurance = await self.session.get(Insurance, payload.id)
+        if not insurance:
+            raise ValueError("Insurance not found")
+
         insurance.rate = payload.new_rate
 
         self.session.add(insurance)
+        if user_id is not None:
+            await add_events(
+                self.session, EventType.UPDATE, "insurance", user_id, [payload.id]
+            )
         await self.session.commit()
+        await self._invalidate_rates(payload.id)
 
         return insurance
 
-    async def delete_insurance(self, payload: DeleteInsurancePayload) -> None:
+    async def delete_insurance(
+        self, payload: DeleteInsurancePayload, user_id: int | None = None
+    ) -> None:
         """Delete insurance for a given cargo type and date"""
 
         query = delete(Insurance).where(Insurance.id == payload.id)
 
-        await self.session.execute(query)
+        result = await self.session.execute(query)
+        if result.rowcount and user_id is not None:
+            await add_events(
+                self.session, EventType.DELETE, "insurance", user_id, [payload.id]
+            )
+        await self.session.commit()
+        await self._invalidate_rates(payload.id, deleted=bool(result.rowcount))
 
-    async def upsert_insurance(
-        self, date: str, cargo_type: str, rate: float
-    ) -> Insurance:
-        """Upsert insurance for a given cargo type and date"""
+    async def bulk_upsert(
+        self,
+        rows: Iterable[dict[str, Any]],
+        chunk_size: int | None = None,
+        user_id: int | None = None,
+    ) -> list[Insurance]:
+        """Upsert many insurance records by cargo type and date"""
 
-        query = select(Insurance).filter_by(date=date, cargo_type=cargo_type, rate=rate)
-        insurance = await self.session.execute(query)
-        insurance = insurance.scalar_one_or_none()
+        chunk_size = chunk_size or settings.insurance_upsert_chunk_size
+        # A single statement can't update the same row twice, the last value wins
+        unique_rows = list(
+            {(row["cargo_type"], row["date"]): row for row in rows}.values()
+        )
 
-        if not insurance:
-            insurance = Insurance(cargo_type=cargo_type, rate=rate, date=date)
-            self.session.add(insurance)
-            await self.session.commit()
+        query = pg_insert(Insurance)
+        query = query.on_conflict_do_update(
+            index_elements=[Insurance.cargo_type, Insurance.date],
+            set_={
+                "rate": query.excluded.rate,
+                "modified_date": query.excluded.modified_date,
+            },
+        ).returning(
+            # Rows written by this transaction's insert have no xmax,
+            # rows it updated carry its own ID as their xmax
+            Insurance,
+            literal_column("xmax = 0").label("inserted"),
+        )
 
-        return insurance
+        start = time.perf_counter()
+        insurance_list: list[Insurance] = []
+        created_ids: list[int] = []
+        updated_ids: list[int] = []
+        for offset in range(0, len(unique_rows), chunk_size):
+            result = await self.session.execute(
+                query,
+                unique_rows[offset : offset + chunk_size],
+                execution_options={"populate_existing": True},
+            )
+            for insurance, inserted in result:
+                insurance_list.append(insurance)
+                (created_ids if inserted else updated_ids).append(insurance.id)
+        if user_id is not None:
+            await add_events(
+                self.session, EventType.CREATE, "insurance", user_id, created_ids
+            )
+            await add_events(
+                self.session, EventType.UPDATE, "insurance", user_id, updated_ids
+            )
+        await self.session.commit()
+        elapsed = time.perf_counter() - start
 
-    async def batch_create(self, payload: UploadInsurancePayload) -> list[Insurance]:
+        logging.info(
+            f"Upserted {len(unique_rows)} insurance records in {elapsed:.2f}s "
+            f"({len(unique_rows) / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        await self._invalidate_rates(*created_ids, *updated_ids)
+
+        return insurance_list
+
+    async def import_rates(
+        self,
+        chunks: AsyncIterable[list[ImportRateRow]],
+        user_id: int | None = None,
+    ) -> int:
+        """Import validated rate chunks through COPY and a staging table"""
+
+        start = time.perf_counter()
+        await self.session.execute(
+            text(
+                "CREATE TEMPORARY TABLE insurance_import ("
+                "seq BIGINT GENERATED ALWAYS AS IDENTITY, "
+                "cargo_type VARCHAR(64) NOT NULL, "
+                "rate FLOAT NOT NULL, "
+                "date DATE NOT NULL"
+                ") ON COMMIT DROP"
+            )
+        )
+        # COPY runs on the same connection, inside the session transaction
+        connection = await self.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        async for chunk in chunks:
+            await raw_connection.driver_connection.copy_records_to_table(
+                "insurance_import",
+                records=[(row.cargo_type, row.rate, row.date) for row in chunk],
+                columns=["cargo_type", "rate", "date"],
+            )
+
+        # The last row wins for duplicated cargo type and date
+        merge = (
+            "INSERT INTO insurance "
+            "(cargo_type, rate, date, created_date, modified_date) "
+            "SELECT DISTINCT ON (cargo_type, date) "
+            "cargo_type, rate, date, :now, :now "
+            "FROM insurance_import "
+            "ORDER BY cargo_type, date, seq DESC "
+            "ON CONFLICT (cargo_type, date) DO UPDATE "
+            "SET rate = excluded.rate, modified_date = excluded.modified_date"
+        )
+        params = {"now": datetime.datetime.now()}
+        if user_id is None:
+            result = await self.session.execute(text(merge), params)
+            rows = result.rowcount
+        else:
+            # Same as in bulk_upsert, rows inserted by this transaction have no xmax
+            result = await self.session.execute(
+                text(f"{merge} RETURNING id, xmax = 0 AS inserted"), params
+            )
+            created_ids: list[int] = []
+            updated_ids: list[int] = []
+            for id, inserted in result:
+                (created_ids if inserted else updated_ids).append(id)
+            await add_events(
+                self.session, EventType.CREATE, "insurance", user_id, created_ids
+            )
+            await add_events(
+                self.session, EventType.UPDATE, "insurance", user_id, updated_ids
+            )
+            rows = len(created_ids) + len(updated_ids)
+        await self.session.commit()
+        elapsed = time.perf_counter() - start
+
+        logging.info(
+            f"Imported {rows} insurance records in {elapsed:.2f}s "
+            f"({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
+        await self._invalidate_rates(clear=True)
+
+        return rows
+
+    async def batch_create(
+        self, payload: UploadInsurancePayload, user_id: int | None = None
+    ) -> list[Insurance]:
         """Batch create insurance records"""
 
         data_list: list = []
         for date, data in payload.dict().items():
             for data_chunk in data:
                 data_list.append({"date": date, **data_chunk})
-        insurance_list: list[Insurance] = [Insurance(**item) for item in data_list]
-        self.session.add_all(insurance_list)
-        await self.session.commit()
 
-        return insurance_list
+        return await self.bulk_upsert(data_list, user_id=user_id)
 
 
 async def get_insurance_service(
     session: AsyncSession = Depends(get_db_session),
+    rate_table: RateTable | None = Depends(get_rate_table),
+    rate_cache: RedisRateCache | None = Depends(get_rate_cache),
+    rate_version: RateVersion | None = Depends(get_rate_version),
+    rate_flights: SingleFlight | None = Depends(get_rate_flights),
 ) -> InsuranceService:
     """Get insurance service instance."""
 
-    return InsuranceService(session)
+    return InsuranceService(session, rate_table, rate_cache, rate_version, rate_flights)
+
+
+async def get_insurance_read_service(
+    session: AsyncSession = Depends(get_db_read_session),
+    primary_session: AsyncSession = Depends(get_db_primary_read_session),
+    rate_table: RateTable | None = Depends(get_rate_table),
+    rate_cache: RedisRateCache | None = Depends(get_rate_cache),
+    rate_flights: SingleFlight | None = Depends(get_rate_flights),
+    rate_batcher: MicroBatcher[int, RateRow] | None = Depends(get_rate_batcher),
+) -> InsuranceService:
+    """Get insurance service instance for read-only queries."""
+
+    return InsuranceService(
+        session,
+        rate_table,
+        rate_cache,
+        rate_flights=rate_flights,
+        rate_batcher=rate_batcher,
+        primary_session=primary_session,
+    )
@@ -1,60 +1,197 @@
-from aiokafka import AIOKafkaProducer
-from fastapi import APIRouter, Depends
+import datetime
+import hashlib
+from collections.abc import AsyncIterator
+from email.utils import formatdate
+from http import HTTPStatus
 
+import orjson
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+
+from insurance_calc.db.dependencies import get_read_session_factory
 from insurance_calc.db.models.insurance import Insurance
-from insurance_calc.db.models.user import User
-from insurance_calc.services.kafka.dependencies import get_kafka_producer
-from insurance_calc.services.kafka.utils import KafkaTopic, send_batch
+from insurance_calc.services.redis.dependency import get_rate_version
+from insurance_calc.services.redis.rate_version import RateVersion
+from insurance_calc.settings import settings
 from insurance_calc.utils import schema as utils_schema
-from insurance_calc.web.api.auth.service import get_current_user
+from insurance_calc.web.api.auth.service import CurrentUser, get_current_user
 from insurance_calc.web.api.insurance import schema
+from insurance_calc.web.api.insurance.importer import (
+    ImportFormat,
+    RateImportError,
+    iter_validated_chunks,
+)
 from insurance_calc.web.api.insurance.service import (
     InsuranceService,
+    get_insurance_read_service,
     get_insurance_service,
 )
 
 router = APIRouter()
 
+# Versions are milliseconds since the epoch, later ones are not valid dates
+MAX_VERSION = int(
+    datetime.datetime(9999, 1, 1, tzinfo=datetime.timezone.utc).timestamp() * 1000
+)
+
+
+def _etag(
+    version: int, payload: schema.QueryInsurancePayload, since: int | None
+) -> str:
+    """Entity tag of a query result at a table version"""
+
+    # Pydantic dumps IDs of any size, orjson stops at 64 bits
+    query = orjson.dumps([payload.model_dump_json(), since])
+    digest = hashlib.blake2b(query, digest_size=8).hexdigest()
+
+    return f'"{version}-{digest}"'
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header with an entity tag"""
+
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+
+    return any(
+        tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(",")
+    )
+
 
 @router.post("/upload_insurance", response_model=list[schema.InsuranceDTO])
 async def upload_insurance(
     payload: schema.UploadInsurancePayload,
-    user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
     insurance_service: InsuranceService = Depends(get_insurance_service),
-    producer: AIOKafkaProducer = Depends(get_kafka_producer),
 ) -> list[schema.InsuranceDTO]:
     """Endpoint to batch upload an insurance list."""
 
-    insurance_list: list[Insurance] = await insurance_service.batch_create(payload)
-
-    await send_batch(
-        producer, KafkaTopic.INSURANCE.value, user.id, "insurance", insurance_list
+    insurance_list: list[Insurance] = await insurance_service.batch_create(
+        payload, user.id
     )
 
     return insurance_list
 
 
+@router.post("/import_insurance", response_model=schema.ImportResult)
+async def import_insurance(
+    request: Request,
+    format: ImportFormat = ImportFormat.NDJSON,
+    insurance_service: InsuranceService = Depends(get_insurance_service),
+    user: CurrentUser = Depends(get_current_user),
+) -> schema.ImportResult:
+    """
+    Endpoint to import a large NDJSON or CSV rate file.
+
+    The body is streamed, validated and copied to the database in chunks,
+    so memory usage doesn't depend on the file size.
+    """
+
+    chunks = iter_validated_chunks(
+        request.stream(), format, settings.insurance_import_chunk_size
+    )
+    try:
+        rows = await insurance_service.import_rates(chunks, user.id)
+    except RateImportError as err:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY, detail=str(err)
+        )
+
+    return schema.ImportResult(rows=rows)
+
+
 @router.get("/query_insurance", response_model=list[schema.InsuranceDTO])
 async def query_insurance(
     payload: schema.QueryInsurancePayload,
-    insurance_service: InsuranceService = Depends(get_insurance_service),
+    request: Request,
+    response: Response,
+    since: int | None = Query(None, ge=0, le=MAX_VERSION),
+    insurance_service: InsuranceService = Depends(get_insurance_read_service),
+    rate_version: RateVersion | None = Depends(get_rate_version),
 ) -> list[schema.InsuranceDTO]:
-    """Endpoint to query insurance."""
-
-    insurance_list: list[Insurance] = await insurance_service.query_insurance(payload)
-
-    return insurance_list
+    """
+    Endpoint to query insurance.
+
+    The table version is returned in ``X-Insurance-Version`` along with
+    an ``ETag``, and a matching ``If-None-Match`` is answered with 304.
+    With ``since`` set to a previous version only rows changed after it
+    are returned, unless rows were deleted since. ``X-Insurance-Delta``
+    tells whether the response is ``partial`` or ``full``.
+    """
+
+    versions = await rate_version.get() if rate_version else None
+    if versions is None:
+        response.headers["X-Insurance-Delta"] = "full"
+        return await insurance_service.query_insurance(payload)
+
+    version, deleted_version = versions
+    headers = {
+        "ETag": _etag(version, payload, since),
+        "Last-Modified": formatdate(version / 1000, usegmt=True),
+        "Cache-Control": "no-cache",
+        "X-Insurance-Version": str(version),
+    }
+    if _etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    if since is not None and deleted_version <= since:
+        response.headers["X-Insurance-Delta"] = "partial"
+        return await insurance_service.query_insurance_delta(payload, since)
+
+    response.headers["X-Insurance-Delta"] = "full"
+    return await insurance_service.query_insurance(payload, version)
+
+
+@router.get("/query_insurance_page", response_model=schema.InsurancePage)
+async def query_insurance_page(
+    payload: schema.PageInsurancePayload,
+    insurance_service: InsuranceService = Depends(get_insurance_read_service),
+) -> schema.InsurancePage:
+    """Endpoint to query insurance page by page."""
+
+    try:
+        insurance_list, next_cursor = await insurance_service.query_insurance_page(
+            payload
+        )
+    except ValueError as err:
+        raise HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail=str(err))
+
+    return schema.InsurancePage(items=insurance_list, next_cursor=next_cursor)
+
+
+@router.get("/export_insurance", response_class=StreamingResponse)
+async def export_insurance(
+    payload: schema.ExportInsurancePayload,
+    request: Request,
+) -> StreamingResponse:
+    """
+    Endpoint to export insurance as NDJSON.
+
+    Rows are read from a server-side cursor and sent as they arrive.
+    """
+
+    async def stream() -> AsyncIterator[bytes]:
+        # The request session is closed before the body is sent,
+        # so the export holds its own session for the whole stream
+        async with get_read_session_factory(request.app)() as session:
+            async for chunk in InsuranceService(session).export_insurance(payload):
+                yield chunk
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
 
 
 @router.post("/update_insurance", response_model=schema.InsuranceDTO)
 async def update_insurance(
     payload: schema.UpdateInsurancePayload,
     insurance_service: InsuranceService = Depends(get_insurance_service),
-    _user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ) -> schema.InsuranceDTO:
     """Endpoint to update insurance."""
 
-    insurance = await insurance_service.update_insurance(payload)
+    insurance = await insurance_service.update_insurance(payload, user.id)
 
     return insurance
 
@@ -63,11 +200,11 @@ async def update_insurance(
 async def delete_insurance(
     payload: schema.DeleteInsurancePayload,
     insurance_service: InsuranceService = Depends(get_insurance_service),
-    _user: User = Depends(get_current_user),
+    user: CurrentUser = Depends(get_current_user),
 ) -> utils_schema.Message:
     """Endpoint to delete insurance."""
 
-    await insurance_service.delete_insurance(payload)
+    await insurance_service.delete_insurance(payload, user.id)
 
     return utils_schema.Message(message="Insurance deleted successfully")
 
@@ -75,10 +212,37 @@ async def delete_insurance(
 @router.get("/calculate_insurance", response_model=schema.Calculation)
 async def calculate_insurance(
     payload: schema.CalculationPayload,
-    insurance_service: InsuranceService = Depends(get_insurance_service),
+    insurance_service: InsuranceService = Depends(get_insurance_read_service),
 ) -> schema.Calculation:
     """Endpoint to calculate insurance."""
 
-    calculation = await insurance_service.calculate_insurance(payload)
+    try:
+        calculation = await insurance_service.calculate_insurance(payload)
+    except ValueError as err:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail=str(err))
+
+    return schema.Calculation(total=calculation)
+
+
+@router.get("/calculate_insurance_effective", response_model=schema.Calculation)
+async def calculate_insurance_effective(
+    payload: schema.EffectiveCalculationPayload,
+    insurance_service: InsuranceService = Depends(get_insurance_read_service),
+) -> schema.Calculation:
+    """Endpoint to calculate insurance with the rate effective on a date."""
+
+    calculation = await insurance_service.calculate_insurance_effective(payload)
 
     return schema.Calculation(total=calculation)
+
+
+@router.post("/calculate_insurance_batch", response_model=schema.BatchCalculation)
+async def calculate_insurance_batch(
+    payload: schema.BatchCalculationPayload,
+    insurance_service: InsuranceService = Depends(get_insurance_read_service),
+) -> schema.BatchCalculation:
+    """Endpoint to calculate insurance for many items at once."""
+
+    results = await insurance_service.calculate_insurance_batch(payload)
+
+    return schema.BatchCalculation(results=results)
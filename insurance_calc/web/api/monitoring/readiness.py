@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+
+from aiokafka import AIOKafkaProducer
+from redis.asyncio import ConnectionPool, Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from insurance_calc.web.api.monitoring.schema import ProbeStatus
+
+Probe = Callable[[], Awaitable[object]]
+
+
+def database_probe(engine: AsyncEngine) -> Probe:
+    """Probe checking out a pooled connection and running a query."""
+
+    async def probe() -> None:
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    return probe
+
+
+def redis_probe(pool: ConnectionPool) -> Probe:
+    """Probe pinging redis through the shared pool."""
+
+    return Redis(connection_pool=pool).ping
+
+
+def kafka_probe(producer: AIOKafkaProducer) -> Probe:
+    """Probe fetching cluster metadata over the producer's connections."""
+
+    return producer.client.fetch_all_metadata
+
+
+class ReadinessCheck:
+    """
+    Probes dependencies of a worker concurrently.
+
+    Results are cached for a short interval and concurrent checks
+    share a single round of probes, so load balancer probes
+    can't pile up on the database.
+    """
+
+    def __init__(self, probes: dict[str, Probe], timeout: float, ttl: float):
+        self.probes = probes
+        self.timeout = timeout
+        self.ttl = ttl
+        self._results: dict[str, ProbeStatus] | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _expired(self) -> bool:
+        return self._results is None or time.monotonic() - self._checked_at >= self.ttl
+
+    async def _run(self, name: str, probe: Probe) -> ProbeStatus:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(probe(), self.timeout)
+        except asyncio.TimeoutError:
+            error = f"Timed out after {self.timeout}s"
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        else:
+            error = None
+        latency_ms = (time.perf_counter() - start) * 1000
+
+        if error:
+            logging.warning(f"Readiness probe {name} failed: {error}")
+        return ProbeStatus(healthy=error is None, latency_ms=latency_ms, error=error)
+
+    async def check(self) -> dict[str, ProbeStatus]:
+        """Get probe results, probing again once the cached ones expire."""
+
+        if self._expired():
+            async with self._lock:
+                # Checks that waited on the lock reuse the fresh results
+                if self._expired():
+                    results = await asyncio.gather(
+                        *(self._run(name, probe) for name, probe in self.probes.items())
+                    )
+                    self._results = dict(zip(self.probes, results, strict=True))
+                    self._checked_at = time.monotonic()
+
+        return self._results
@@ -0,0 +1,37 @@
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    """DTO for cache hit and miss counters."""
+
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+
+
+class PoolStats(BaseModel):
+    """DTO for database connection pool usage."""
+
+    size: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    wait_time_total_ms: float
+    wait_time_max_ms: float
+
+
+class ProbeStatus(BaseModel):
+    """DTO for the result of a dependency probe."""
+
+    healthy: bool
+    latency_ms: float
+    error: str | None = None
+
+
+class Readiness(BaseModel):
+    """DTO for readiness of a worker and its dependencies."""
+
+    ready: bool
+    checks: dict[str, ProbeStatus]
@@ -1,4 +1,14 @@
-from fastapi import APIRouter
+from http import HTTPStatus
+
+from fastapi import APIRouter, Depends, Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST
+
+from insurance_calc.db.pool import TimedQueuePool
+from insurance_calc.services.metrics.metrics import generate_metrics
+from insurance_calc.services.redis.dependency import get_rate_cache
+from insurance_calc.services.redis.rate_cache import RedisRateCache
+from insurance_calc.web.api.monitoring.readiness import ReadinessCheck
+from insurance_calc.web.api.monitoring.schema import CacheStats, PoolStats, Readiness
 
 router = APIRouter()
 
@@ -8,5 +18,79 @@ def health_check() -> None:
     """
     Checks the health of a project.
 
-    It returns 200 if the project is healthy.
+    It returns 200 while the worker can serve requests.
+    Dependencies aren't checked, see ``/ready`` for that.
+    """
+
+
+@router.get(
+    "/ready",
+    response_model=Readiness,
+    responses={HTTPStatus.SERVICE_UNAVAILABLE: {"model": Readiness}},
+)
+async def readiness_check(request: Request, response: Response) -> Readiness:
+    """
+    Checks whether the worker can serve traffic.
+
+    Database, redis and kafka are probed concurrently with a timeout,
+    and results are reused for a short interval. It returns 503
+    with the failed probes if any dependency is unavailable.
     """
+
+    readiness: ReadinessCheck = request.app.state.readiness
+    checks = await readiness.check()
+    ready = all(check.healthy for check in checks.values())
+    if not ready:
+        response.status_code = HTTPStatus.SERVICE_UNAVAILABLE
+
+    return Readiness(ready=ready, checks=checks)
+
+
+@router.get("/cache_stats", response_model=CacheStats)
+def cache_stats(
+    rate_cache: RedisRateCache | None = Depends(get_rate_cache),
+) -> CacheStats:
+    """
+    Returns hit and miss counters of the redis rate cache.
+
+    Counters are kept per worker.
+    """
+
+    if not rate_cache:
+        return CacheStats(enabled=False)
+
+    return CacheStats(enabled=True, hits=rate_cache.hits, misses=rate_cache.misses)
+
+
+@router.get("/pool_stats", response_model=PoolStats)
+def pool_stats(request: Request) -> PoolStats:
+    """
+    Returns usage of the database connection pool.
+
+    Pools and counters are kept per worker.
+    """
+
+    pool: TimedQueuePool = request.app.state.db_engine.pool
+
+    return PoolStats(
+        size=pool.size(),
+        checked_in=pool.checkedin(),
+        checked_out=pool.checkedout(),
+        overflow=max(pool.overflow(), 0),
+        checkouts=pool.checkouts,
+        timeouts=pool.timeouts,
+        wait_time_total_ms=pool.wait_time_total * 1000,
+        wait_time_max_ms=pool.wait_time_max * 1000,
+    )
+
+
+@router.get("/metrics", response_class=Response)
+def metrics() -> Response:
+    """
+    Returns metrics in the Prometheus text format.
+
+    With PROMETHEUS_MULTIPROC_DIR set, metrics of all
+    gunicorn workers are aggregated.
+    """
+
+    return Response(generate_metrics(), media_type=CONTENT_TYPE_LATEST)
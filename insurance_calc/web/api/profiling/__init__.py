@@ -0,0 +1,5 @@
+"""API for request profiles."""
+
+from insurance_calc.web.api.profiling.views import router
+
+__all__ = ["router"]
@@ -0,0 +1,28 @@
+import datetime
+
+from pydantic import BaseModel
+
+
+class SpanStats(BaseModel):
+    """DTO for calls and time spent in a phase of a request."""
+
+    count: int
+    total_ms: float
+
+
+class ProfileInfo(BaseModel):
+    """DTO for a profiled request."""
+
+    id: str
+    method: str
+    path: str
+    status: int
+    duration_ms: float
+    created_at: datetime.datetime
+    spans: dict[str, SpanStats]
+
+
+class Profile(ProfileInfo):
+    """DTO for a profiled request with its top functions."""
+
+    stats: str
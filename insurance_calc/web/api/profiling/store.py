@@ -0,0 +1,94 @@
+import cProfile
+import io
+import pstats
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+import orjson
+
+# IDs start with the time in nanoseconds, so they sort by creation
+PROFILE_ID = re.compile(r"^\d{19}-[0-9a-f]{8}$")
+
+
+class ProfileStore:
+    """
+    Ring buffer of request profiles on disk.
+
+    Every profile is a pstats dump and a JSON file with
+    the request and its spans. Workers share the directory,
+    the oldest profiles are dropped once it's full.
+    """
+
+    def __init__(self, directory: Path, size: int) -> None:
+        self.directory = directory
+        self.size = size
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+
+    def _path(self, profile_id: str, suffix: str) -> Path | None:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{suffix}"
+        return path if path.exists() else None
+
+    def save(
+        self, profile_id: str, info: dict[str, Any], profiler: cProfile.Profile
+    ) -> None:
+        """Save a profile and drop the oldest ones over the size."""
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        if self.size > 0:
+            profiler.dump_stats(self.directory / f"{profile_id}.prof")
+            # The info is written last, so listed profiles are always complete
+            (self.directory / f"{profile_id}.json").write_bytes(
+                orjson.dumps({"id": profile_id, **info})
+            )
+
+        # With no room for profiles, all of them are dropped
+        paths = sorted(self.directory.glob("*.json"))
+        for path in paths[: -self.size] if self.size > 0 else paths:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".prof").unlink(missing_ok=True)
+
+    def list(self) -> list[dict[str, Any]]:
+        """Get info of all profiles, newest first."""
+
+        if not self.directory.exists():
+            return []
+
+        profiles = []
+        for path in sorted(self.directory.glob("*.json"), reverse=True):
+            try:
+                profiles.append(orjson.loads(path.read_bytes()))
+            except FileNotFoundError:
+                # Dropped by another worker
+                continue
+        return profiles
+
+    def get(self, profile_id: str) -> dict[str, Any] | None:
+        """Get info of a profile."""
+
+        path = self._path(profile_id, ".json")
+        return orjson.loads(path.read_bytes()) if path else None
+
+    def stats_path(self, profile_id: str) -> Path | None:
+        """Get the pstats dump of a profile."""
+
+        return self._path(profile_id, ".prof")
+
+    def stats(self, profile_id: str, sort: str, limit: int) -> str | None:
+        """Render the top functions of a profile."""
+
+        path = self.stats_path(profile_id)
+        if path is None:
+            return None
+
+        stream = io.StringIO()
+        stats = pstats.Stats(str(path), stream=stream)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        return stream.getvalue()
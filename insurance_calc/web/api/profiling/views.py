@@ -0,0 +1,72 @@
+from http import HTTPStatus
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import FileResponse
+
+from insurance_calc.settings import settings
+from insurance_calc.web.api.auth.service import CurrentUser, get_current_admin
+from insurance_calc.web.api.profiling.schema import Profile, ProfileInfo
+from insurance_calc.web.api.profiling.store import ProfileStore
+
+router = APIRouter()
+
+
+def get_profile_store() -> ProfileStore:
+    return ProfileStore(settings.profiling_dir, settings.profiling_buffer_size)
+
+
+def _not_found() -> HTTPException:
+    return HTTPException(status_code=HTTPStatus.NOT_FOUND, detail="Profile not found")
+
+
+@router.get("/", response_model=list[ProfileInfo])
+def list_profiles(
+    _admin: CurrentUser = Depends(get_current_admin),
+    store: ProfileStore = Depends(get_profile_store),
+) -> list[dict]:
+    """
+    Lists profiles of slow and explicitly profiled requests.
+
+    Profiles are listed newest first.
+    """
+
+    return store.list()
+
+
+@router.get("/{profile_id}", response_model=Profile)
+def get_profile(
+    profile_id: str,
+    sort: Literal["cumulative", "tottime", "ncalls"] = Query("cumulative"),
+    limit: int = Query(40, ge=1, le=500),
+    _admin: CurrentUser = Depends(get_current_admin),
+    store: ProfileStore = Depends(get_profile_store),
+) -> dict:
+    """
+    Gets a profile with its span breakdown and top functions.
+
+    :param sort: order of the functions.
+    :param limit: number of functions to show.
+    """
+
+    info = store.get(profile_id)
+    stats = store.stats(profile_id, sort, limit)
+    if info is None or stats is None:
+        raise _not_found()
+    return {**info, "stats": stats}
+
+
+@router.get("/{profile_id}/pstats", response_class=FileResponse)
+def download_profile(
+    profile_id: str,
+    _admin: CurrentUser = Depends(get_current_admin),
+    store: ProfileStore = Depends(get_profile_store),
+) -> FileResponse:
+    """
+    Downloads the raw profile, for snakeviz or ``python -m pstats``.
+    """
+
+    path = store.stats_path(profile_id)
+    if path is None:
+        raise _not_found()
+    return FileResponse(path, media_type="application/octet-stream", filename=path.name)
@@ -4,8 +4,16 @@ from fastapi import FastAPI
 from fastapi.responses import ORJSONResponse
 
 from insurance_calc.log import configure_logging
+from insurance_calc.settings import settings
+from insurance_calc.web.api.profiling.store import ProfileStore
 from insurance_calc.web.api.router import api_router
 from insurance_calc.web.lifespan import lifespan_setup
+from insurance_calc.web.middleware import (
+    AccessLogMiddleware,
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    RoundTripMiddleware,
+)
 
 
 def get_app() -> FastAPI:
@@ -27,6 +35,21 @@ def get_app() -> FastAPI:
         default_response_class=ORJSONResponse,
     )
 
+    if settings.db_round_trips_header:
+        app.add_middleware(RoundTripMiddleware)
+    if settings.metrics_enabled:
+        app.add_middleware(MetricsMiddleware)
+    if settings.profiling_enabled:
+        app.add_middleware(
+            ProfilingMiddleware,
+            store=ProfileStore(settings.profiling_dir, settings.profiling_buffer_size),
+            sample_rate=settings.profiling_sample_rate,
+            threshold_ms=settings.profiling_threshold_ms,
+            secret=settings.profiling_secret,
+        )
+    # Added last to run first, so every log of a request has its ID
+    app.add_middleware(AccessLogMiddleware, sample_rate=settings.log_access_sample_rate)
+
     # Main router for the API.
     app.include_router(router=api_router, prefix="/api")
 
@@ -2,11 +2,66 @@ from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 
-from insurance_calc.services.kafka.lifespan import init_kafka, shutdown_kafka
+from insurance_calc.db.metrics import track_query_duration
+from insurance_calc.db.pool import TimedQueuePool
+from insurance_calc.db.replica import ReplicaMonitor
+from insurance_calc.db.round_trips import track_round_trips
+from insurance_calc.services.kafka.lifespan import (
+    init_kafka,
+    init_outbox,
+    shutdown_kafka,
+    shutdown_outbox,
+)
+from insurance_calc.services.passwords.lifespan import (
+    init_password_hasher,
+    shutdown_password_hasher,
+)
+from insurance_calc.services.rates.lifespan import (
+    init_rate_batcher,
+    init_rate_flights,
+    init_rate_table,
+    shutdown_rate_table,
+)
 from insurance_calc.services.redis.lifespan import init_redis, shutdown_redis
 from insurance_calc.settings import settings
+from insurance_calc.web.api.monitoring.readiness import (
+    ReadinessCheck,
+    database_probe,
+    kafka_probe,
+    redis_probe,
+)
+
+
+def _create_engine(url: str) -> AsyncEngine:  # pragma: no cover
+    """
+    Creates SQLAlchemy engine with the configured pool.
+
+    Every worker has its own pool, so the database must allow
+    workers * (db_pool_size + db_max_overflow) connections.
+
+    :param url: database URL.
+    :return: engine.
+    """
+    engine = create_async_engine(
+        url,
+        echo=settings.db_echo,
+        poolclass=TimedQueuePool,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        connect_args={
+            "prepared_statement_cache_size": settings.db_statement_cache_size,
+        },
+    )
+    if settings.db_round_trips_header:
+        track_round_trips(engine)
+    if settings.metrics_enabled or settings.profiling_enabled:
+        track_query_duration(engine)
+    return engine
 
 
 def _setup_db(app: FastAPI) -> None:  # pragma: no cover
@@ -17,15 +72,77 @@ def _setup_db(app: FastAPI) -> None:  # pragma: no cover
     session_factory for creating sessions
     and stores them in the application's state property.
 
+    Read sessions share the engine in autocommit mode.
+
     :param app: fastAPI application.
     """
-    engine = create_async_engine(str(settings.db_url), echo=settings.db_echo)
+    engine = _create_engine(str(settings.db_url))
     session_factory = async_sessionmaker(
         engine,
         expire_on_commit=False,
     )
     app.state.db_engine = engine
     app.state.db_session_factory = session_factory
+    app.state.db_read_session_factory = async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        expire_on_commit=False,
+    )
+
+
+async def _setup_db_replica(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates connection to the read replica.
+
+    Without a replica URL read sessions come from the primary.
+    Otherwise the replica is checked in the background
+    and read sessions fall back to the primary while it's unhealthy.
+
+    :param app: fastAPI application.
+    """
+    app.state.db_replica_monitor = None
+    app.state.db_replica_session_factory = None
+    if not settings.db_replica_url:
+        return
+
+    engine = _create_engine(settings.db_replica_url)
+    app.state.db_replica_session_factory = async_sessionmaker(
+        engine.execution_options(isolation_level="AUTOCOMMIT"),
+        expire_on_commit=False,
+    )
+    app.state.db_replica_monitor = ReplicaMonitor(
+        engine,
+        interval=settings.db_replica_check_interval,
+        timeout=settings.db_replica_check_timeout,
+    )
+    await app.state.db_replica_monitor.start()
+
+
+async def _shutdown_db_replica(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Stops replica checks and closes its connections.
+
+    :param app: fastAPI application.
+    """
+    if app.state.db_replica_monitor:
+        await app.state.db_replica_monitor.stop()
+        await app.state.db_replica_monitor.engine.dispose()
+
+
+def _setup_readiness(app: FastAPI) -> None:  # pragma: no cover
+    """
+    Creates probes of the dependencies every request needs.
+
+    :param app: fastAPI application.
+    """
+    app.state.readiness = ReadinessCheck(
+        {
+            "database": database_probe(app.state.db_engine),
+            "redis": redis_probe(app.state.redis_pool),
+            "kafka": kafka_probe(app.state.kafka_producer),
+        },
+        timeout=settings.readiness_probe_timeout,
+        ttl=settings.readiness_cache_ttl,
+    )
 
 
 @asynccontextmanager
@@ -44,12 +161,23 @@ async def lifespan_setup(
 
     app.middleware_stack = None
     _setup_db(app)
+    await _setup_db_replica(app)
     init_redis(app)
+    await init_rate_table(app)
+    init_rate_flights(app)
+    init_rate_batcher(app)
     await init_kafka(app)
+    init_outbox(app)
+    init_password_hasher(app)
+    _setup_readiness(app)
     app.middleware_stack = app.build_middleware_stack()
 
     yield
+    await shutdown_outbox(app)
+    await shutdown_rate_table(app)
+    await _shutdown_db_replica(app)
     await app.state.db_engine.dispose()
 
     await shutdown_redis(app)
     await shutdown_kafka(app)
+    shutdown_password_hasher(app)
@@ -0,0 +1,240 @@
+import asyncio
+import cProfile
+import datetime
+import hmac
+import logging
+import random
+import time
+import uuid
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from insurance_calc.db.round_trips import round_trips
+from insurance_calc.log import request_id
+from insurance_calc.services.metrics.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUEST_EXCEPTIONS,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_PROGRESS,
+)
+from insurance_calc.utils.spans import Spans, current_spans
+from insurance_calc.web.api.profiling.store import ProfileStore
+
+
+class RoundTripMiddleware:
+    """Reports database round trips of a request in the X-DB-Round-Trips header."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = round_trips.set(counter)
+
+        async def send_with_round_trips(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-round-trips", str(counter[0]).encode()))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_round_trips)
+        finally:
+            round_trips.reset(token)
+
+
+class MetricsMiddleware:
+    """Records latency, status codes and requests in progress of every route."""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    @staticmethod
+    def _route(scope: Scope) -> str:
+        # The router stores the matched route, its path keeps label values bounded
+        route = scope.get("route")
+        return getattr(route, "path", "unmatched")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+
+        async def send_with_status(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as exc:
+            HTTP_REQUEST_EXCEPTIONS.labels(
+                method, self._route(scope), type(exc).__name__
+            ).inc()
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            in_progress.dec()
+            route = self._route(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status[0])).inc()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles sampled requests and keeps the slow ones.
+
+    Requests sent with the secret in the X-Profile header are always
+    profiled and kept, their profile ID is returned in the X-Profile-Id
+    header. Without a secret, clients can't force profiling.
+    Others are sampled at the rate and kept if they take longer than
+    the threshold. cProfile sees every coroutine on the event loop,
+    so a worker profiles one request at a time and its stats include
+    requests running concurrently; spans only count the profiled one.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        store: ProfileStore,
+        sample_rate: float,
+        threshold_ms: float,
+        secret: str | None = None,
+    ):
+        self.app = app
+        self.store = store
+        self.sample_rate = sample_rate
+        self.threshold_ms = threshold_ms
+        self.secret = secret.encode() if secret else None
+        self._profiling = False
+
+    def _is_forced(self, scope: Scope) -> bool:
+        if not self.secret:
+            return False
+        return any(
+            name == b"x-profile" and hmac.compare_digest(value, self.secret)
+            for name, value in scope["headers"]
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._profiling:
+            await self.app(scope, receive, send)
+            return
+
+        forced = self._is_forced(scope)
+        if not forced and random.random() >= self.sample_rate:
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = self.store.new_id()
+        status = [500]
+
+        async def send_with_profile_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                if forced:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"x-profile-id", profile_id.encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        spans = Spans()
+        token = current_spans.set(spans)
+        profiler = cProfile.Profile()
+        self._profiling = True
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            profiler.disable()
+            duration_ms = (time.perf_counter() - start) * 1000
+            self._profiling = False
+            current_spans.reset(token)
+
+            if forced or duration_ms >= self.threshold_ms:
+                info = {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status[0],
+                    "duration_ms": duration_ms,
+                    "created_at": datetime.datetime.now(datetime.timezone.utc),
+                    "spans": {
+                        name: {"count": count, "total_ms": seconds * 1000}
+                        for name, (count, seconds) in spans.phases.items()
+                    },
+                }
+                try:
+                    await asyncio.to_thread(self.store.save, profile_id, info, profiler)
+                except OSError:
+                    logging.exception("Failed to save a request profile")
+
+
+class AccessLogMiddleware:
+    """
+    Assigns request IDs and writes a sampled access log.
+
+    The ID is taken from the X-Request-ID header or generated,
+    returned in the same header and added to every log record
+    of the request. Server errors are always logged, other
+    requests are logged at the sample rate.
+    """
+
+    def __init__(self, app: ASGIApp, sample_rate: float):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.logger = logging.getLogger("insurance_calc.access")
+
+    @staticmethod
+    def _request_id(scope: Scope) -> bytes:
+        for name, value in scope["headers"]:
+            if name == b"x-request-id" and 0 < len(value) <= 128:
+                return value
+        return uuid.uuid4().hex.encode()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        raw_id = self._request_id(scope)
+        token = request_id.set(raw_id.decode("latin-1"))
+        status = [500]
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", raw_id))
+                message["headers"] = headers
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            if status[0] >= 500 or random.random() < self.sample_rate:
+                self._log(scope, status[0], time.perf_counter() - start)
+            request_id.reset(token)
+
+    def _log(self, scope: Scope, status: int, elapsed: float) -> None:
+        client = scope.get("client")
+        path = scope["path"]
+        if scope["query_string"]:
+            path = f"{path}?{scope['query_string'].decode('latin-1')}"
+        self.logger.info(
+            f"{client[0] if client else '-'} - "
+            f'"{scope["method"]} {path} HTTP/{scope["http_version"]}" '
+            f"{status} {elapsed * 1000:.2f}ms"
+        )
@@ -0,0 +1,137 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from jose import jwt
+from sqlalchemy import inspect
+
+from insurance_calc.db.models.user import Role, User
+from insurance_calc.settings import settings
+from insurance_calc.utils import cache as cache_module
+from insurance_calc.utils.cache import TTLCache
+from insurance_calc.web.api.auth.service import (
+    get_current_user,
+    token_cache,
+    user_cache,
+)
+
+
+class StubUserService:
+    """User service holding a single user."""
+
+    def __init__(self, user: User) -> None:
+        self.user = user
+        self.calls = 0
+
+    async def get_user(self, user_id: int) -> User | None:
+        self.calls += 1
+        return self.user if user_id == self.user.id else None
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> SimpleNamespace:
+    """
+    Clock of the TTL caches, moved by hand.
+
+    :param monkeypatch: pytest monkeypatch.
+    :return: clock with the current monotonic time in ``now``.
+    """
+    clock = SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(
+        cache_module, "time", SimpleNamespace(monotonic=lambda: clock.now)
+    )
+    return clock
+
+
+@pytest.fixture(autouse=True)
+def clear_auth_caches() -> None:
+    """Start every test with empty module-level auth caches."""
+
+    token_cache.clear()
+    user_cache.clear()
+
+
+def make_user(id: int = 7) -> User:
+    """
+    Active admin user.
+
+    :param id: ID of the user.
+    :return: the user.
+    """
+    return User(id=id, username="admin", role=Role(name="Admin"), is_active=True)
+
+
+def test_entries_expire(clock: SimpleNamespace) -> None:
+    """Checks that entries are dropped once their TTL passes."""
+
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("key", "value")
+
+    clock.now += 59
+    assert cache.get("key") == "value"
+    clock.now += 1
+    assert cache.get("key") is None
+    assert len(cache) == 0
+
+
+def test_ttl_is_capped(clock: SimpleNamespace) -> None:
+    """Checks that an entry never outlives the TTL of the cache."""
+
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", "value", ttl=5)
+    cache.set("long", "value", ttl=3600)
+
+    clock.now += 5
+    assert cache.get("short") is None
+    clock.now += 55
+    assert cache.get("long") is None
+
+
+def test_least_recently_used_is_evicted() -> None:
+    """Checks that a full cache evicts the entry read least recently."""
+
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set(1, "a")
+    cache.set(2, "b")
+    cache.get(1)
+    cache.set(3, "c")
+
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == ("a", "c")
+
+
+@pytest.mark.anyio
+async def test_token_is_cached_until_it_expires(clock: SimpleNamespace) -> None:
+    """Checks that a verified token and its user are cached up to its expiration."""
+
+    token = jwt.encode(
+        {"sub": "7", "exp": int(time.time()) + 5},
+        settings.secret_key,
+        algorithm=settings.algorithm,
+    )
+    user_service = StubUserService(make_user())
+
+    first = await get_current_user(token, user_service)
+    second = await get_current_user(token, user_service)
+
+    assert first == second
+    assert first.role == "Admin"
+    assert user_service.calls == 1
+
+    # The token expires long before the TTL of the cache
+    clock.now += 6
+    assert token_cache.get(token) is None
+
+
+@pytest.mark.parametrize("event", ["after_update", "after_delete"])
+def test_changed_users_are_evicted(event: str) -> None:
+    """Checks that updating or deleting a user drops it from the cache."""
+
+    user = make_user()
+    user_cache.set(user.id, "cached")
+
+    # Mapper events fire on flush, dispatched here without a database
+    mapper = inspect(User)
+    getattr(mapper.dispatch, event)(mapper, None, inspect(user))
+
+    assert user_cache.get(user.id) is None
@@ -0,0 +1,53 @@
+import pytest
+
+from insurance_calc.web.api.insurance.schema import (
+    BatchCalculationPayload,
+    CalculationPayload,
+    QueryInsurancePayload,
+)
+from insurance_calc.web.api.insurance.service import InsuranceService
+from tests.test_rate_table import StubRateTable, make_store
+
+
+@pytest.mark.anyio
+async def test_out_of_range_ids_are_not_found() -> None:
+    """Checks that IDs out of the column range fail only their own items."""
+
+    table = StubRateTable()
+    table.results = [make_store(0.1)]
+    service = InsuranceService(None, rate_table=table)
+    payload = BatchCalculationPayload(
+        items=[
+            {"id": 1, "price": 10},
+            {"id": 2**31, "price": 10},
+            {"id": 2**64, "price": 10},
+            {"id": -1, "price": 10},
+        ]
+    )
+
+    results = await service.calculate_insurance_batch(payload)
+
+    assert results[0].total == pytest.approx(1.0)
+    assert [result.error for result in results[1:]] == ["Insurance not found"] * 3
+
+
+def test_store_ignores_out_of_range_ids() -> None:
+    """Checks that IDs past int64 are missing instead of failing the lookup."""
+
+    positions = make_store(0.1).positions_by_id([1, 2**64, -(2**64)])
+
+    assert positions.tolist() == [0, -1, -1]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("id", [2**31, 2**64])
+async def test_out_of_range_id_is_not_found(id: int) -> None:
+    """Checks that single lookups of out of range IDs find nothing."""
+
+    table = StubRateTable()
+    table.results = [make_store(0.1)]
+    service = InsuranceService(None, rate_table=table)
+
+    with pytest.raises(ValueError, match="Insurance not found"):
+        await service.calculate_insurance(CalculationPayload(id=id, price=10))
+    assert await service.query_insurance(QueryInsurancePayload(id=id)) == []
@@ -0,0 +1,75 @@
+import asyncio
+
+import pytest
+
+from insurance_calc.utils.batcher import MicroBatcher
+
+
+class Loader:
+    """Batch loader recording its batches."""
+
+    def __init__(self, values: dict[int, str], error: Exception | None = None):
+        self.values = values
+        self.error = error
+        self.batches: list[list[int]] = []
+
+    async def __call__(self, keys: list[int]) -> dict[int, str]:
+        self.batches.append(keys)
+        if self.error:
+            raise self.error
+        return {key: self.values[key] for key in keys if key in self.values}
+
+
+@pytest.mark.anyio
+async def test_full_batches_are_split() -> None:
+    """Checks that a batch is loaded as soon as it holds the maximum of keys."""
+
+    batcher = MicroBatcher(window=60, max_size=2)
+    loader = Loader({1: "a", 2: "b", 3: "c", 4: "d"})
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*(batcher.load(key, loader) for key in (1, 2, 3, 4))), 1
+    )
+
+    assert results == ["a", "b", "c", "d"]
+    assert loader.batches == [[1, 2], [3, 4]]
+
+
+@pytest.mark.anyio
+async def test_duplicate_keys_share_a_lookup() -> None:
+    """Checks that a key looked up twice in a window is loaded once."""
+
+    batcher = MicroBatcher(window=0.01, max_size=10)
+    loader = Loader({1: "a", 2: "b"})
+
+    results = await asyncio.gather(*(batcher.load(key, loader) for key in (1, 2, 1)))
+
+    assert results == ["a", "b", "a"]
+    assert loader.batches == [[1, 2]]
+
+
+@pytest.mark.anyio
+async def test_missing_keys_are_none() -> None:
+    """Checks that keys missing from the loaded values resolve to None."""
+
+    batcher = MicroBatcher(window=0.01, max_size=10)
+    loader = Loader({1: "a"})
+
+    results = await asyncio.gather(*(batcher.load(key, loader) for key in (1, 2)))
+
+    assert results == ["a", None]
+
+
+@pytest.mark.anyio
+async def test_loader_errors_reach_every_lookup() -> None:
+    """Checks that a failed batch fails every lookup waiting for it."""
+
+    batcher = MicroBatcher(window=0.01, max_size=10)
+    loader = Loader({}, error=ConnectionError("down"))
+
+    results = await asyncio.gather(
+        *(batcher.load(key, loader) for key in (1, 2, 1)), return_exceptions=True
+    )
+
+    assert [type(result) for result in results] == [ConnectionError] * 3
+    assert loader.batches == [[1, 2]]
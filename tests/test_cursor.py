@@ -0,0 +1,56 @@
+import base64
+from datetime import date, datetime
+
+import orjson
+import pytest
+
+from insurance_calc.services.rates.row import RateRow
+from insurance_calc.web.api.insurance.schema import QueryOrder
+from insurance_calc.web.api.insurance.service import InsuranceService
+
+
+def encode(key: object) -> str:
+    """
+    Encode a cursor the way the service does.
+
+    :param key: cursor content.
+    :return: encoded cursor.
+    """
+    return base64.urlsafe_b64encode(orjson.dumps(key)).decode()
+
+
+@pytest.mark.parametrize("order", list(QueryOrder))
+def test_cursor_round_trip(order: QueryOrder) -> None:
+    """Checks that cursors decode to the keyset of their row."""
+
+    row = RateRow(7, "Glass", 0.1, date(2024, 1, 1), datetime(2024, 1, 1))
+
+    key = InsuranceService._decode_cursor(
+        InsuranceService._encode_cursor(row, order), order
+    )
+
+    if order == QueryOrder.ID:
+        assert key == [7]
+    else:
+        assert key == ["Glass", date(2024, 1, 1)]
+
+
+@pytest.mark.parametrize(
+    ("order", "cursor"),
+    [
+        (QueryOrder.ID, "!!!"),
+        (QueryOrder.ID, encode({"id": 1})),
+        (QueryOrder.ID, encode(["id", "x"])),
+        (QueryOrder.ID, encode(["id", True])),
+        (QueryOrder.ID, encode(["id", 1.5])),
+        (QueryOrder.ID, encode(["id", 2**40])),
+        (QueryOrder.ID, encode(["cargo_type_date", "Glass", "2024-01-01"])),
+        (QueryOrder.CARGO_TYPE_DATE, encode(["cargo_type_date", 5, "2024-01-01"])),
+        (QueryOrder.CARGO_TYPE_DATE, encode(["cargo_type_date", "Glass", 5])),
+    ],
+)
+def test_invalid_cursor(order: QueryOrder, cursor: str) -> None:
+    """Checks that crafted cursors are rejected before reaching the database."""
+
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        InsuranceService._decode_cursor(cursor, order)
@@ -0,0 +1,182 @@
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from fastapi import FastAPI
+
+from insurance_calc.services.redis.dependency import get_rate_version
+from insurance_calc.services.redis.rate_version import (
+    DELETED_VERSION_KEY,
+    VERSION_KEY,
+    RateVersion,
+)
+from insurance_calc.web.api.insurance.schema import QueryInsurancePayload
+from insurance_calc.web.api.insurance.service import get_insurance_read_service
+from insurance_calc.web.api.insurance.views import _etag_matches, router
+
+# Current version of the table and version of its last delete
+VERSION = 2000
+DELETED_VERSION = 1000
+
+
+class StubInsuranceService:
+    """Read service recording which query answered a request."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, int | None]] = []
+
+    async def query_insurance(
+        self, _payload: QueryInsurancePayload, version: int | None = None
+    ) -> list:
+        self.calls.append(("full", version))
+        return []
+
+    async def query_insurance_delta(
+        self, _payload: QueryInsurancePayload, since: int
+    ) -> list:
+        self.calls.append(("partial", since))
+        return []
+
+
+@pytest.fixture
+def server() -> FakeServer:
+    """
+    In-process redis stand-in.
+
+    :return: fake redis server.
+    """
+    return FakeServer()
+
+
+@pytest.fixture
+def service() -> StubInsuranceService:
+    """
+    Read service of the application.
+
+    :return: stub service.
+    """
+    return StubInsuranceService()
+
+
+@pytest.fixture
+async def client(
+    server: FakeServer, service: StubInsuranceService
+) -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Client of the insurance endpoints at a known table version.
+
+    :param server: fake redis server.
+    :param service: read service of the application.
+    :yield: http client.
+    """
+    redis = FakeAsyncRedis(server=server)
+    await redis.mset({VERSION_KEY: VERSION, DELETED_VERSION_KEY: DELETED_VERSION})
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_rate_version] = lambda: RateVersion(redis)
+    app.dependency_overrides[get_insurance_read_service] = lambda: service
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
+async def query(
+    client: httpx.AsyncClient,
+    since: int | None = None,
+    if_none_match: str | None = None,
+) -> httpx.Response:
+    """
+    Query all insurance, as a GET with a JSON body.
+
+    :param client: http client.
+    :param since: version of a previous response.
+    :param if_none_match: entity tag of a previous response.
+    :return: the response.
+    """
+    return await client.request(
+        "GET",
+        "/query_insurance",
+        json={},
+        params={} if since is None else {"since": since},
+        headers={} if if_none_match is None else {"If-None-Match": if_none_match},
+    )
+
+
+@pytest.mark.parametrize(
+    ("if_none_match", "matches"),
+    [
+        (None, False),
+        ("", False),
+        ("*", True),
+        ('"1-a"', True),
+        ('W/"1-a"', True),
+        ('"0-a", W/"1-a"', True),
+        ('"0-a","1-a"', True),
+        ('"1-b"', False),
+        ('"1-a-b"', False),
+    ],
+)
+def test_etag_matches(if_none_match: str | None, matches: bool) -> None:
+    """Checks weak comparison of If-None-Match with an entity tag."""
+
+    assert _etag_matches(if_none_match, '"1-a"') == matches
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("since", "delta", "call"),
+    [
+        (None, "full", ("full", VERSION)),
+        (DELETED_VERSION - 1, "full", ("full", VERSION)),
+        (DELETED_VERSION, "partial", ("partial", DELETED_VERSION)),
+        (VERSION - 1, "partial", ("partial", VERSION - 1)),
+    ],
+)
+async def test_delta_only_without_deletes(
+    client: httpx.AsyncClient,
+    service: StubInsuranceService,
+    since: int | None,
+    delta: str,
+    call: tuple[str, int],
+) -> None:
+    """Checks that changes are sent alone only if nothing was deleted since."""
+
+    response = await query(client, since)
+
+    assert response.status_code == 200
+    assert response.headers["X-Insurance-Delta"] == delta
+    assert response.headers["X-Insurance-Version"] == str(VERSION)
+    assert service.calls == [call]
+
+
+@pytest.mark.anyio
+async def test_unchanged_result_is_not_sent(
+    client: httpx.AsyncClient, service: StubInsuranceService
+) -> None:
+    """Checks that a request with the current entity tag gets 304 without a query."""
+
+    etag = (await query(client, DELETED_VERSION)).headers["ETag"]
+
+    assert (await query(client, DELETED_VERSION, f"W/{etag}")).status_code == 304
+    # The same version queried with other parameters is another result
+    assert (await query(client, None, etag)).status_code == 200
+    assert len(service.calls) == 2
+
+
+@pytest.mark.anyio
+async def test_full_result_without_redis(
+    client: httpx.AsyncClient, service: StubInsuranceService, server: FakeServer
+) -> None:
+    """Checks that an unknown version gets a full result without a version."""
+
+    server.connected = False
+
+    response = await query(client, DELETED_VERSION)
+
+    assert response.headers["X-Insurance-Delta"] == "full"
+    assert "ETag" not in response.headers
+    assert service.calls == [("full", None)]
@@ -0,0 +1,108 @@
+from collections.abc import AsyncIterator
+from datetime import date
+
+import pytest
+
+from insurance_calc.web.api.insurance.importer import (
+    ImportFormat,
+    ImportRateRow,
+    RateImportError,
+    iter_validated_chunks,
+)
+
+
+async def stream(*chunks: bytes) -> AsyncIterator[bytes]:
+    """
+    Stream bytes the way a request body arrives.
+
+    :param chunks: chunks of the body.
+    :yield: the chunks.
+    """
+    for chunk in chunks:
+        yield chunk
+
+
+async def import_chunks(
+    format: ImportFormat, *chunks: bytes, chunk_size: int = 2
+) -> list[list[ImportRateRow]]:
+    """
+    Parse and validate a streamed rate file.
+
+    :param format: format of the file.
+    :param chunks: chunks of the file.
+    :param chunk_size: number of rows in one chunk.
+    :return: validated chunks of rows.
+    """
+    return [
+        rows
+        async for rows in iter_validated_chunks(stream(*chunks), format, chunk_size)
+    ]
+
+
+def rates(chunks: list[list[ImportRateRow]]) -> list[list[tuple]]:
+    """
+    Plain values of validated chunks.
+
+    :param chunks: validated chunks of rows.
+    :return: cargo type, date and rate of every row.
+    """
+    return [[(row.cargo_type, row.date, row.rate) for row in rows] for rows in chunks]
+
+
+@pytest.mark.anyio
+async def test_ndjson_lines_split_across_chunks() -> None:
+    """Checks that NDJSON lines split by the stream are parsed whole."""
+
+    chunks = await import_chunks(
+        ImportFormat.NDJSON,
+        b'{"cargo_type": "Glass", "date": "2024-01-01", "rate": 0.1}\n{"cargo_',
+        b'type": "Other", "date": "2024-01-02", "rate": 0.2}\n\n',
+        b'{"cargo_type": "Glass", "date": "2024-01-03", "rate": 0.3}',
+    )
+
+    assert rates(chunks) == [
+        [("Glass", date(2024, 1, 1), 0.1), ("Other", date(2024, 1, 2), 0.2)],
+        [("Glass", date(2024, 1, 3), 0.3)],
+    ]
+
+
+@pytest.mark.anyio
+async def test_csv_rows_follow_the_header() -> None:
+    """Checks that CSV rows are read by the header, whatever the line endings."""
+
+    chunks = await import_chunks(
+        ImportFormat.CSV,
+        b"rate,cargo_type,date\r\n0.1,Glass,2024-01-01\r",
+        b'\n0.2,"Other, fragile",2024-01-02\n',
+    )
+
+    assert rates(chunks) == [
+        [("Glass", date(2024, 1, 1), 0.1), ("Other, fragile", date(2024, 1, 2), 0.2)],
+    ]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("format", "body", "error"),
+    [
+        (ImportFormat.NDJSON, b'{"cargo_type": "Glass"}\n{', "Line 2"),
+        (ImportFormat.CSV, b"cargo_type,date,rate\nGlass,2024-01-01\n", "Line 2"),
+        (ImportFormat.CSV, b"cargo_type,date,rate\n\xff,2024-01-01,0.1\n", "Line 2"),
+    ],
+)
+async def test_unparsable_lines(format: ImportFormat, body: bytes, error: str) -> None:
+    """Checks that unparsable lines are reported with their number."""
+
+    with pytest.raises(RateImportError, match=error):
+        await import_chunks(format, body)
+
+
+@pytest.mark.anyio
+async def test_invalid_rows_are_numbered_across_chunks() -> None:
+    """Checks that invalid rows are reported with their number in the file."""
+
+    body = b"cargo_type,date,rate\n" + b"Glass,2024-01-01,0.1\n" * 2
+    body += b"Glass,not a date,0.1\n"
+
+    with pytest.raises(RateImportError, match="Row 3"):
+        await import_chunks(ImportFormat.CSV, body)
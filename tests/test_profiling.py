@@ -0,0 +1,79 @@
+import cProfile
+from pathlib import Path
+
+import httpx
+import pytest
+from starlette.types import Receive, Scope, Send
+
+from insurance_calc.web.api.profiling.store import ProfileStore
+from insurance_calc.web.middleware import ProfilingMiddleware
+
+
+async def ok_app(_scope: Scope, _receive: Receive, send: Send) -> None:
+    """Application answering every request with 204."""
+
+    await send({"type": "http.response.start", "status": 204, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def save_profiles(store: ProfileStore, count: int) -> None:
+    """
+    Save empty profiles to a store.
+
+    :param store: profile store.
+    :param count: number of profiles.
+    """
+    for _ in range(count):
+        store.save(store.new_id(), {}, cProfile.Profile())
+
+
+def test_store_keeps_newest_profiles(tmp_path: Path) -> None:
+    """Checks that the store drops the oldest profiles over its size."""
+
+    store = ProfileStore(tmp_path, 2)
+    save_profiles(store, 2)
+    newest = store.new_id()
+    store.save(newest, {}, cProfile.Profile())
+
+    assert len(store.list()) == 2
+    assert store.list()[0]["id"] == newest
+    assert len(list(tmp_path.glob("*.prof"))) == 2
+
+
+def test_store_without_size_keeps_nothing(tmp_path: Path) -> None:
+    """Checks that a store of size 0 keeps no profiles."""
+
+    save_profiles(ProfileStore(tmp_path, 3), 3)
+    save_profiles(ProfileStore(tmp_path, 0), 1)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    ("secret", "header", "profiled"),
+    [
+        (None, "1", False),
+        ("secret", "1", False),
+        ("secret", "wrong", False),
+        ("secret", "secret", True),
+    ],
+)
+async def test_forced_profiling_needs_secret(
+    tmp_path: Path,
+    secret: str | None,
+    header: str,
+    profiled: bool,
+) -> None:
+    """Checks that only requests carrying the secret can force a profile."""
+
+    store = ProfileStore(tmp_path, 10)
+    app = ProfilingMiddleware(ok_app, store, 0.0, 0.0, secret=secret)
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        response = await client.get("/", headers={"X-Profile": header})
+
+    assert ("x-profile-id" in response.headers) == profiled
+    assert len(store.list()) == int(profiled)
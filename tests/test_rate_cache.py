@@ -0,0 +1,170 @@
+from datetime import date, datetime
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from insurance_calc.services.rates.row import RateRow
+from insurance_calc.services.redis.rate_cache import (
+    QUERY_KEY,
+    ROW_KEY,
+    RedisRateCache,
+)
+
+ROWS = [
+    RateRow(1, "Glass", 0.04, date(2024, 1, 1), datetime(2024, 1, 2, 3, 4, 5, 6)),
+    RateRow(2, "Other", 0.01, date(2024, 2, 1), datetime(2024, 2, 2)),
+]
+
+
+@pytest.fixture
+def server() -> FakeServer:
+    """
+    In-process redis stand-in.
+
+    :return: fake redis server.
+    """
+    return FakeServer()
+
+
+@pytest.fixture
+def redis(server: FakeServer) -> FakeAsyncRedis:
+    """
+    Client of the fake redis server.
+
+    :param server: fake redis server.
+    :return: fake redis client.
+    """
+    return FakeAsyncRedis(server=server)
+
+
+@pytest.fixture
+def cache(redis: FakeAsyncRedis) -> RedisRateCache:
+    """
+    Rate cache over the fake redis.
+
+    :param redis: fake redis client.
+    :return: rate cache.
+    """
+    return RedisRateCache(redis, ttl=60)
+
+
+@pytest.mark.anyio
+async def test_rows_round_trip(cache: RedisRateCache) -> None:
+    """Checks that cached rows are read back as they were written."""
+
+    await cache.set_rows(ROWS)
+
+    assert await cache.get_rows([1, 2, 3]) == {1: ROWS[0], 2: ROWS[1]}
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+@pytest.mark.anyio
+async def test_get_rows_without_ids(cache: RedisRateCache) -> None:
+    """Checks that no IDs are a no-op instead of an empty MGET."""
+
+    assert await cache.get_rows([]) == {}
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+@pytest.mark.anyio
+async def test_query_round_trip(cache: RedisRateCache) -> None:
+    """Checks that query results are cached per filters."""
+
+    assert await cache.get_query({"cargo_type": "Glass"}, 1) is None
+
+    await cache.set_query({"cargo_type": "Glass", "rate": 0.04}, 1, ROWS[:1])
+    await cache.set_query({"cargo_type": "Other"}, 1, [])
+
+    # Filters are matched regardless of their order
+    assert await cache.get_query({"rate": 0.04, "cargo_type": "Glass"}, 1) == ROWS[:1]
+    assert await cache.get_query({"cargo_type": "Other"}, 1) == []
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+@pytest.mark.anyio
+async def test_query_is_cached_per_version(cache: RedisRateCache) -> None:
+    """Checks that results cached at one table version are not served at another."""
+
+    await cache.set_query({}, 1, ROWS)
+
+    assert await cache.get_query({}, 2) is None
+    assert await cache.get_query({}, 1) == ROWS
+
+
+@pytest.mark.anyio
+async def test_entries_expire(cache: RedisRateCache, redis: FakeAsyncRedis) -> None:
+    """Checks that rows and queries are written with the cache TTL."""
+
+    await cache.set_rows(ROWS[:1])
+    await cache.set_query({}, 1, ROWS)
+
+    assert 0 < await redis.ttl(ROW_KEY.format(id=1)) <= 60
+    assert 0 < await redis.ttl(QUERY_KEY) <= 60
+
+
+@pytest.mark.anyio
+async def test_query_ttl_is_not_extended(
+    cache: RedisRateCache,
+    redis: FakeAsyncRedis,
+) -> None:
+    """Checks that later queries don't keep older ones alive."""
+
+    await cache.set_query({}, 1, ROWS)
+    await redis.expire(QUERY_KEY, 5)
+    await cache.set_query({"cargo_type": "Glass"}, 1, ROWS[:1])
+
+    assert await redis.ttl(QUERY_KEY) <= 5
+
+
+@pytest.mark.anyio
+async def test_invalidate(cache: RedisRateCache) -> None:
+    """Checks that invalidation drops the given rows and all queries."""
+
+    await cache.set_rows(ROWS)
+    await cache.set_query({}, 1, ROWS)
+
+    await cache.invalidate([1])
+
+    assert await cache.get_rows([1, 2]) == {2: ROWS[1]}
+    assert await cache.get_query({}, 1) is None
+
+
+@pytest.mark.anyio
+async def test_clear(cache: RedisRateCache, redis: FakeAsyncRedis) -> None:
+    """Checks that clearing drops every cached row and query."""
+
+    rows = [
+        RateRow(id, "Glass", 0.01, date(2024, 1, 1), datetime.now())
+        for id in range(1, 2500)
+    ]
+    await cache.set_rows(rows)
+    await cache.set_query({}, 1, rows[:1])
+    await redis.set("unrelated", b"1")
+
+    await cache.clear()
+
+    assert await cache.get_rows(row.id for row in rows) == {}
+    assert await cache.get_query({}, 1) is None
+    assert await redis.get("unrelated") == b"1"
+
+
+@pytest.mark.anyio
+async def test_redis_errors_are_misses(
+    cache: RedisRateCache,
+    server: FakeServer,
+) -> None:
+    """Checks that an unavailable redis counts as a miss instead of failing."""
+
+    await cache.set_rows(ROWS)
+    await cache.set_query({}, 1, ROWS)
+    server.connected = False
+
+    assert await cache.get_rows([1, 2]) == {}
+    assert await cache.get_query({}, 1) is None
+    assert (cache.hits, cache.misses) == (0, 3)
+
+    # Writes and invalidation are swallowed as well
+    await cache.set_rows(ROWS)
+    await cache.set_query({}, 1, ROWS)
+    await cache.invalidate([1])
+    await cache.clear()
@@ -0,0 +1,173 @@
+import asyncio
+import time
+from datetime import date, datetime
+from pathlib import Path
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from insurance_calc.services.rates.store import ColumnarRateStore, publish_snapshot
+from insurance_calc.services.rates.table import RateTable
+from insurance_calc.services.redis.rate_version import RateVersion
+
+
+def make_store(rate: float) -> ColumnarRateStore:
+    """
+    Store holding a single rate.
+
+    :param rate: the rate.
+    :return: columnar store.
+    """
+    return ColumnarRateStore.from_rows(
+        [(1, "Glass", rate, date(2024, 1, 1), datetime(2024, 1, 1))]
+    )
+
+
+class StubRateTable(RateTable):
+    """Rate table reading prepared stores instead of the database."""
+
+    def __init__(
+        self,
+        ttl: float = 60,
+        snapshot_dir: Path | None = None,
+        rate_version: RateVersion | None = None,
+    ) -> None:
+        super().__init__(None, ttl, snapshot_dir, rate_version)
+        self.results: list[ColumnarRateStore | Exception] = []
+        self.reads = 0
+
+    async def _read(self) -> ColumnarRateStore:
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+async def wait_reloaded(table: RateTable) -> None:
+    """
+    Wait for the background reload of a table.
+
+    :param table: rate table.
+    """
+    if table._reload_task:
+        await table._reload_task
+
+
+@pytest.mark.anyio
+async def test_first_load_is_awaited() -> None:
+    """Checks that the first refresh loads the table before returning."""
+
+    table = StubRateTable()
+    table.results = [make_store(0.1)]
+
+    await asyncio.gather(table.refresh(), table.refresh())
+
+    assert table.get(1).rate == 0.1
+    assert table.reads == 1
+    assert not table.is_stale
+
+
+@pytest.mark.anyio
+async def test_reload_runs_in_background() -> None:
+    """Checks that reads keep the loaded rates while the table reloads."""
+
+    table = StubRateTable()
+    table.results = [make_store(0.1), make_store(0.2)]
+    await table.refresh()
+
+    table.bump()
+    await asyncio.gather(table.refresh(), table.refresh())
+
+    assert table.get(1).rate == 0.1
+    await wait_reloaded(table)
+    assert table.get(1).rate == 0.2
+    assert table.reads == 2
+    assert not table.is_stale
+
+
+@pytest.mark.anyio
+async def test_failed_reload_keeps_rates(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Checks that loaded rates are served while reloads fail."""
+
+    monkeypatch.setattr(
+        "insurance_calc.services.rates.table.RELOAD_RETRY_INTERVAL", 0.05
+    )
+    table = StubRateTable()
+    table.results = [make_store(0.1), ConnectionError("down"), make_store(0.2)]
+    await table.refresh()
+
+    table.bump()
+    await table.refresh()
+    await wait_reloaded(table)
+    assert table.get(1).rate == 0.1
+    assert table.is_stale
+
+    # Failed reloads are not retried on every read
+    await table.refresh()
+    assert table.reads == 2
+
+    await asyncio.sleep(0.05)
+    await table.refresh()
+    await wait_reloaded(table)
+    assert table.get(1).rate == 0.2
+
+
+@pytest.mark.anyio
+async def test_stop_cancels_reload() -> None:
+    """Checks that stopping the table cancels a running reload."""
+
+    table = StubRateTable()
+    table.results = [make_store(0.1), make_store(0.2)]
+    await table.refresh()
+
+    table.bump()
+    await table.refresh()
+    await table.stop()
+
+    assert table.get(1).rate == 0.1
+
+
+@pytest.mark.anyio
+async def test_snapshot_age_counts_towards_ttl(tmp_path: Path) -> None:
+    """Checks that rates mapped from a snapshot expire with the snapshot."""
+
+    publish_snapshot(tmp_path, make_store(0.1), read_at=time.time() - 59.95)
+    table = StubRateTable(ttl=60, snapshot_dir=tmp_path)
+
+    await table.refresh()
+    assert table.get(1).rate == 0.1
+    assert table.reads == 0
+
+    await asyncio.sleep(0.1)
+    assert table.is_stale
+
+    # An expired snapshot is rebuilt from the database
+    table.results = [make_store(0.2)]
+    await table.refresh()
+    await wait_reloaded(table)
+    assert table.get(1).rate == 0.2
+    assert table.reads == 1
+
+
+@pytest.mark.anyio
+async def test_newer_shared_version_reloads() -> None:
+    """Checks that a read asking for a newer shared version reloads the table."""
+
+    rate_version = RateVersion(FakeAsyncRedis(server=FakeServer()))
+    table = StubRateTable(rate_version=rate_version)
+    table.results = [make_store(0.1), make_store(0.2)]
+    await table.refresh()
+    version, _ = await rate_version.get()
+    assert table.covers(version)
+
+    # Another worker changes the table
+    await rate_version.bump()
+    version, _ = await rate_version.get()
+    assert not table.covers(version)
+
+    await table.refresh(version)
+    await wait_reloaded(table)
+    assert table.covers(version)
+    assert table.get(1).rate == 0.2
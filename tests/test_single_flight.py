@@ -0,0 +1,106 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+
+import pytest
+
+from insurance_calc.utils.single_flight import SingleFlight
+
+
+class Lookup:
+    """Slow lookup counting its calls."""
+
+    def __init__(self, *values: object) -> None:
+        self.values = list(values)
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    def __call__(self) -> Callable[[], Awaitable[object]]:
+        """
+        Build a fetch of the next value, finishing once released.
+
+        :return: fetch function.
+        """
+
+        async def fetch() -> object:
+            self.calls += 1
+            value = self.values.pop(0)
+            await self.release.wait()
+            return value
+
+        return fetch
+
+
+@pytest.mark.anyio
+async def test_concurrent_lookups_are_coalesced() -> None:
+    """Checks that concurrent lookups of a key share a single call."""
+
+    flights = SingleFlight(maxsize=10, stale_ttl=0)
+    lookup = Lookup("a")
+
+    first = asyncio.ensure_future(flights.run("key", lookup()))
+    second = asyncio.ensure_future(flights.run("key", lookup()))
+    await asyncio.sleep(0)
+    lookup.release.set()
+
+    assert await asyncio.gather(first, second) == ["a", "a"]
+    assert lookup.calls == 1
+    assert flights.coalesced == 1
+
+
+@pytest.mark.anyio
+async def test_stale_result_is_served_while_refreshing() -> None:
+    """Checks that the last result is served while its key is looked up again."""
+
+    flights = SingleFlight(maxsize=10, stale_ttl=60)
+    lookup = Lookup("old", "new")
+    lookup.release.set()
+    assert await flights.run("key", lookup()) == "old"
+
+    lookup.release.clear()
+    refresh = asyncio.ensure_future(flights.run("key", lookup()))
+    await asyncio.sleep(0)
+
+    assert await flights.run("key", lookup()) == "old"
+    assert flights.stale == 1
+
+    lookup.release.set()
+    assert await refresh == "new"
+
+
+@pytest.mark.anyio
+async def test_cancelled_first_caller_does_not_fail_others() -> None:
+    """Checks that cancelling the caller that started a lookup keeps it running."""
+
+    flights = SingleFlight(maxsize=10, stale_ttl=0)
+    lookup = Lookup("a")
+
+    first = asyncio.ensure_future(flights.run("key", lookup()))
+    second = asyncio.ensure_future(flights.run("key", lookup()))
+    await asyncio.sleep(0)
+    first.cancel()
+    lookup.release.set()
+
+    assert await second == "a"
+    assert first.cancelled()
+    assert lookup.calls == 1
+
+
+@pytest.mark.anyio
+async def test_invalidate_detaches_running_lookups() -> None:
+    """Checks that lookups started before an invalidation are not shared after it."""
+
+    flights = SingleFlight(maxsize=10, stale_ttl=60)
+    lookup = Lookup("old", "new")
+
+    before = asyncio.ensure_future(flights.run("key", lookup()))
+    await asyncio.sleep(0)
+    flights.invalidate()
+    after = asyncio.ensure_future(flights.run("key", lookup()))
+    await asyncio.sleep(0)
+    lookup.release.set()
+
+    assert await asyncio.gather(before, after) == ["old", "new"]
+    assert lookup.calls == 2
+
+    # The result read before the change is not kept either
+    assert flights._results["key"][1] == "new"